@@ -0,0 +1,75 @@
+"""
+Measures the memory of a `vsall` report over many groups, the number of objects it retains,
+and the time of a full garbage collection while it is alive. Run from the top directory of the repository
+with `PYTHONPATH=. python benchmarks/memory.py`.
+"""
+
+import fairbench as fb
+import numpy as np
+import tracemalloc
+import time
+import gc
+
+
+def retained_objects(value, seen=None) -> int:
+    # counts the distinct objects reachable from a report that belong to its representation
+    if seen is None:
+        seen = set()
+    stack = [value]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        if isinstance(obj, fb.core.Value):
+            stack.append(obj.descriptor)
+            stack.append(obj.value)
+            stack.extend(obj.depends.values())
+        elif isinstance(obj, fb.core.Descriptor):
+            stack.extend([obj.name, obj.role, obj.details, obj.alias, obj.prototype])
+            stack.append(obj.preferred_units)
+    return len(seen)
+
+
+def main(groups: int = 1000, samples: int = 100_000, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    codes = rng.integers(0, groups, samples)
+    labels = rng.integers(0, 2, samples)
+    scores = rng.random(samples)
+    predictions = scores > 0.5
+
+    def create():
+        return fb.reports.vsall(
+            sensitive=fb.Coded(codes),
+            predictions=predictions,
+            labels=labels,
+            scores=scores,
+        )
+
+    start = time.perf_counter()
+    report = create()
+    duration = time.perf_counter() - start
+    del report
+
+    # memory is traced in a separate run, because tracing slows down allocations
+    gc.collect()
+    tracemalloc.start()
+    report = create()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    gc.collect()
+    pause = time.perf_counter() - start
+
+    print(f"groups:            {groups}")
+    print(f"report time:       {duration:.2f} s")
+    print(f"retained memory:   {current / 2**20:.1f} MB")
+    print(f"peak memory:       {peak / 2**20:.1f} MB")
+    print(f"retained objects:  {retained_objects(report)}")
+    print(f"full gc pause:     {pause * 1000:.1f} ms")
+    return report
+
+
+if __name__ == "__main__":
+    main()
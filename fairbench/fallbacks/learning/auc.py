@@ -1,39 +1,56 @@
 import numpy as np
 
 
-def roc_curve(labels, scores):
+def roc_curve(labels, scores, max_points=None):
+    """
+    Computes the receiver operating characteristics curve with cumulative sums over scores sorted
+    in descending order. Like sklearn, samples with tied scores form one point of the curve.
+
+    Args:
+        labels: Binary labels, where 1 indicates the positive class.
+        scores: The scores to rank samples by.
+        max_points: If provided, the curve is downsampled to at most this many points, always
+            keeping its first and last ones.
+
+    Returns:
+        The false positive rates, true positive rates, and the score thresholds of curve points.
+    """
+    labels = np.asarray(labels)
+    scores = np.asarray(scores)
+
     # Sort by score descending
-    desc_score_indices = np.argsort(scores)[::-1]
-    sorted_labels = labels[desc_score_indices]
+    desc_score_indices = np.argsort(scores, kind="stable")[::-1]
+    sorted_labels = labels[desc_score_indices] == 1
     sorted_scores = scores[desc_score_indices]
 
-    # Initialize TPR and FPR arrays
-    tpr = [0]
-    fpr = [0]
-    pos_count = np.sum(labels == 1)
-    neg_count = np.sum(labels == 0)
-
-    # Track true positives and false positives
-    tp = 0
-    fp = 0
-
-    for label in sorted_labels:
-        if label == 1:
-            tp += 1
-        else:
-            fp += 1
-        tpr.append(tp / pos_count)
-        fpr.append(fp / neg_count)
-
-    tpr = np.array(tpr)
-    fpr = np.array(fpr)
-
-    sorted_indices = np.argsort(fpr)
-    fpr = fpr[sorted_indices]
-    tpr = tpr[sorted_indices]
-    # sorted_scores = sorted_scores[sorted_indices]
-
-    return fpr, tpr, sorted_scores
+    # Keep the last sample of each group of tied scores
+    threshold_indices = np.flatnonzero(
+        np.r_[sorted_scores[1:] != sorted_scores[:-1], sorted_scores.shape[0] > 0]
+    )
+    tps = np.r_[0, np.cumsum(sorted_labels)[threshold_indices]]
+    fps = np.r_[0, threshold_indices + 1] - tps
+    thresholds = np.r_[np.inf, sorted_scores[threshold_indices]]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tpr = tps / tps[-1]
+        fpr = fps / fps[-1]
+
+    return downsample(max_points, fpr, tpr, thresholds)
+
+
+def downsample(max_points, *curve):
+    """
+    Keeps at most `max_points` evenly spaced points of curves given as arrays of the same length,
+    always keeping their first and last points. Curves are returned as they are if `max_points` is None.
+    """
+    if max_points is None or curve[0].shape[0] <= max_points:
+        return curve
+    kept = np.unique(
+        np.linspace(0, curve[0].shape[0] - 1, max(int(max_points), 2))
+        .round()
+        .astype(int)
+    )
+    return tuple(array[kept] for array in curve)
 
 
 def auc(fpr, tpr):
@@ -75,16 +75,24 @@ def barea(
         n_max = min(
             n_max, value.explain.distribution.points
         )  # get the same discretization as the densest curve
-    x = values[0].explain.distribution.togrid(n_max).x
-    values = [skew(x, value.explain.distribution.togrid(n_max).y) for value in values]
-    base = [skew(x, value.explain.distribution.togrid(n_max).y) for value in base]
+    # each curve is resampled once, and compared to all base curves at once
+    x = values[0].explain.distribution.togrid(n_max).x.copy()  # skews may edit x
+    skewed = np.array(
+        [skew(x, value.explain.distribution.togrid(n_max).y) for value in values]
+    )
+    base = (
+        skewed
+        if base is values
+        else np.array(
+            [skew(x, value.explain.distribution.togrid(n_max).y) for value in base]
+        )
+    )
     x_integral = np.mean(skew(x, np.ones_like(x)))
 
     return [
-        np.mean(comparator(value1, value2))
-        / x_integral  # TODO: find why this prompts syntax warning
-        for value1 in values
-        for value2 in base
+        area
+        for value1 in skewed
+        for area in np.mean(comparator(value1, base), axis=1) / x_integral
     ]
 
 
@@ -40,8 +40,11 @@ def avgscore(scores: Tensor, sensitive: Optional[Tensor] = None, bins: int = 100
 @role("metric")
 @parallel
 @unit_bounded
-def auc(scores: Tensor, labels: Tensor, sensitive: Tensor = None):
+def auc(
+    scores: Tensor, labels: Tensor, sensitive: Tensor = None, max_points: int = None
+):
     from fairbench.fallbacks import auc as _auc, roc_curve as _roc_curve
+    from fairbench.fallbacks.learning.auc import downsample
 
     if sensitive is None:
         sensitive = scores.ones_like()
@@ -53,6 +56,9 @@ def auc(scores: Tensor, labels: Tensor, sensitive: Tensor = None):
         not math.isnan(value),
         f"Cannot compute AUC when all instances have the same label for branch",
     )
+    if max_points is not None:
+        # only the explanation is downsampled, as the value is computed from the full curve
+        fpr, tpr = downsample(int(max_points.numpy()), fpr, tpr)
     return Explainable(
         value,
         curve=ExplanationCurve(fpr, tpr, "ROC"),
@@ -172,17 +178,13 @@ def avghr(scores: Tensor, labels: Tensor, sensitive: Tensor = None, top: int = 3
         k <= len(indexes),
         f"There are only {len(indexes)} members but top={top} were requested for ranking analysis",
     )
-    curve = list()
-    accum = 0
-    for num in range(1, k + 1):
-        accum += labels[indexes[len(indexes) - num]].numpy()
-        curve.append(accum / num * labels[indexes[len(indexes) - num]].numpy())
-    curve = [v for v in curve]
+    ranked = labels.numpy()[indexes.numpy()[::-1][:k]]
+    curve = np.cumsum(ranked) / np.arange(1, k + 1) * ranked
     return Explainable(
-        sum(curve) / len(curve),
+        float(np.mean(curve)),
         top=k,
         curve=ExplanationCurve(
-            np.array(list(range(len(curve))), dtype=float) + 1,
+            np.arange(1, len(curve) + 1, dtype=float),
             np.array(curve, dtype=float),
             "precision",
         ),
@@ -207,17 +209,13 @@ def avgrepr(scores: Tensor, sensitive: Tensor = None, top: int = 3):
         k <= len(indexes),
         f"There are only {len(indexes)} members but top={top} were requested for ranking analysis",
     )
-    curve = list()
-    accum = 0
-    for num in range(1, k + 1):
-        accum += sensitive[indexes[-num]].numpy()
-        curve.append(accum / num / expected)
-    curve = [v for v in curve]
+    ranked = sensitive.numpy()[indexes.numpy()[::-1][:k]]
+    curve = np.cumsum(ranked) / np.arange(1, k + 1) / expected
     return Explainable(
-        0 if len(curve) == 0 else sum(curve) / len(curve),
+        0 if len(curve) == 0 else float(np.mean(curve)),
         top=k,
         curve=ExplanationCurve(
-            np.array(list(range(len(curve))), dtype=float) + 1,
+            np.arange(1, len(curve) + 1, dtype=float),
             np.array(curve, dtype=float),
             "hks",
         ),
@@ -1,14 +1,16 @@
 import eagerpy as ep
-from fairbench.v1.core import verify
+from fairbench.v1.core import verify, astensor
 from fairbench.v1.core import Explainable, ExplainableError
 from typing import List
 
 
-def _sum(values):
-    ret = 0
-    for value in values:
-        ret = value + ret
-    return ret
+def _stack(values) -> ep.Tensor:
+    # values are stacked along a new first axis, so that reducers run as one backend operation over it
+    return ep.stack([astensor(value, _allow_explanation=False) for value in values])
+
+
+def _explainable(values) -> bool:
+    return any(isinstance(value, Explainable) for value in values)
 
 
 def min(values: List[ep.Tensor]) -> ep.Tensor:
@@ -16,11 +18,14 @@ def min(values: List[ep.Tensor]) -> ep.Tensor:
         isinstance(values, list),
         "fairbench.min can only reduce lists. Maybe you meant to use eagerpy.minimum?",
     )
-    ret = float("inf")
-    for value in values:
-        if value < ret:
-            ret = value
-    return ret
+    if not values or _explainable(values):
+        # the smallest element itself is returned, which retains its explanation
+        ret = float("inf")
+        for value in values:
+            if value < ret:
+                ret = value
+        return ret
+    return _stack(values).min(axis=0)
 
 
 def sum(values: List[ep.Tensor]) -> ep.Tensor:
@@ -28,18 +33,14 @@ def sum(values: List[ep.Tensor]) -> ep.Tensor:
         isinstance(values, list),
         "fairbench.sum can only reduce lists. Maybe you meant to use eagerpy.sum?",
     )
-    ret = 0
-    for value in values:
-        ret = ret + value
-    return ret
+    if not values:
+        return 0
+    return _stack(values).sum(axis=0)
 
 
 def gm(values: List[ep.Tensor]) -> ep.Tensor:
     verify(isinstance(values, list), "fairbench.gm can only reduce lists.")
-    ret = 1
-    for value in values:
-        ret = ret * value
-    return ret ** (1.0 / len(values))
+    return _stack(values).prod(axis=0) ** (1.0 / len(values))
 
 
 def mean(values: List[ep.Tensor]) -> ep.Tensor:
@@ -47,7 +48,7 @@ def mean(values: List[ep.Tensor]) -> ep.Tensor:
         isinstance(values, list),
         "fairbench.mean can only reduce lists. Maybe you meant to use eagerpy.mean?",
     )
-    return _sum(values) / len(values)
+    return _stack(values).sum(axis=0) / len(values)
 
 
 def wmean(values: List[ep.Tensor]) -> ep.Tensor:
@@ -59,6 +60,7 @@ def wmean(values: List[ep.Tensor]) -> ep.Tensor:
         ):
             raise ExplainableError("Explanation absent or does not store `samples`")
     # print([(value, value.explain.samples) for value in values])  # TODO: this is an issue with jax
-    nom = _sum([value * value.explain.samples for value in values])
-    denom = _sum([value.explain.samples for value in values])
+    samples = _stack([value.explain.samples for value in values])
+    nom = (_stack(values) * samples).sum(axis=0)
+    denom = samples.sum(axis=0)
     return nom if denom == 0 else nom / denom
@@ -1,6 +1,7 @@
 import eagerpy as ep
 from fairbench.v1.core import Explainable, ExplainableError
 from fairbench.v1.core import verify
+from fairbench.v1.blocks.reducers.tomaximize import _stack, _explainable
 from typing import List
 
 
@@ -10,11 +11,8 @@ def abs(value):
     return value
 
 
-def _sum(values):
-    ret = 0
-    for value in values:
-        ret = value + ret
-    return ret
+def _unit(values: ep.Tensor) -> bool:
+    return bool((values >= 0).all()) and bool((values <= 1).all())
 
 
 def tprod(values: List[ep.Tensor]) -> ep.Tensor:
@@ -22,14 +20,15 @@ def tprod(values: List[ep.Tensor]) -> ep.Tensor:
         isinstance(values, list),
         "fairbench.tproduct can only reduce lists.",
     )
-    ret = 0
-    for value in values:
-        verify(
-            value >= 0 and value <= 1,
-            "fairbench.tproduct can only reduce values in the range [0,1].",
-        )
-        ret = ret + value - ret * value
-    return ret
+    if not values:
+        return 0
+    values = _stack(values)
+    verify(
+        _unit(values),
+        "fairbench.tproduct can only reduce values in the range [0,1].",
+    )
+    # the probabilistic sum of all values
+    return 1 - (1 - values).prod(axis=0)
 
 
 def tluka(values: List[ep.Tensor]) -> ep.Tensor:
@@ -37,17 +36,15 @@ def tluka(values: List[ep.Tensor]) -> ep.Tensor:
         isinstance(values, list),
         "fairbench.tlukasiewicz can only reduce lists.",
     )
-    ret = 1
-    for value in values:
-        verify(
-            value >= 0 and value <= 1,
-            "fairbench.tlukasiewicz can only reduce values in the range [0,1].",
-        )
-        value = 1 - value
-        ret = ret + value - 1
-        if ret < 0:
-            ret = ret - ret
-    return 1 - ret
+    if not values:
+        return 0
+    values = _stack(values)
+    verify(
+        _unit(values),
+        "fairbench.tlukasiewicz can only reduce values in the range [0,1].",
+    )
+    # the bounded sum of all values, as non-negative values can only be clipped to zero once
+    return 1 - ep.maximum(1 - values.sum(axis=0), 0)
 
 
 def notone(values: List[ep.Tensor]) -> ep.Tensor:
@@ -55,11 +52,9 @@ def notone(values: List[ep.Tensor]) -> ep.Tensor:
         isinstance(values, list),
         "fairbench.min can only reduce lists. Maybe you meant to use eagerpy.minimum?",
     )
-    ret = float("inf")
-    for value in values:
-        if value < ret:
-            ret = value
-    return abs(1 - ret)
+    if not values:
+        return abs(1 - float("inf"))
+    return (1 - _stack(values).min(axis=0)).abs()
 
 
 def identical(values: List[ep.Tensor]) -> ep.Tensor:
@@ -67,11 +62,11 @@ def identical(values: List[ep.Tensor]) -> ep.Tensor:
         isinstance(values, list),
         "Can only reduce lists with fairbench.identical. Maybe you meant to use an eagerpy method?",
     )
-    for value in values:
-        if (value - values[0]).abs().sum() != 0:
-            raise ExplainableError(
-                "The same value should reside in all branches for identical reducers."
-            )
+    stacked = _stack(values)
+    if (stacked - stacked[0]).abs().sum() != 0:
+        raise ExplainableError(
+            "The same value should reside in all branches for identical reducers."
+        )
     return values[0]
 
 
@@ -80,11 +75,14 @@ def max(values: List[ep.Tensor]) -> ep.Tensor:
         isinstance(values, list),
         "fairbench.max can only reduce lists. Maybe you meant to use eagerpy.maximum?",
     )
-    ret = float("-inf")
-    for value in values:
-        if value > ret:
-            ret = value
-    return ret
+    if not values or _explainable(values):
+        # the largest element itself is returned, which retains its explanation
+        ret = float("-inf")
+        for value in values:
+            if value > ret:
+                ret = value
+        return ret
+    return _stack(values).max(axis=0)
 
 
 def budget(values: List[ep.Tensor]) -> ep.Tensor:
@@ -98,11 +96,9 @@ def budget(values: List[ep.Tensor]) -> ep.Tensor:
 def std(values: List[ep.Tensor]) -> ep.Tensor:
     verify(isinstance(values, list), "fairbench.std can only reduce lists.")
     n = len(values)
-    s = 0
-    ss = 0
-    for val in values:
-        s = val + s
-        ss = val * val + ss
+    values = _stack(values)
+    s = values.sum(axis=0)
+    ss = (values * values).sum(axis=0)
     variance = (ss - (s * s) / n) / n
     return variance**0.5
 
@@ -112,11 +108,9 @@ def coefvar(values: List[ep.Tensor]) -> ep.Tensor:
     # adhered to requirements by Campano, F., & Salvatore, D. (2006). Income Distribution: Includes CD. Oxford University Press.
     verify(isinstance(values, list), "fairbench.std can only reduce lists.")
     n = len(values)
-    s = 0
-    ss = 0
-    for val in values:
-        s = val + s
-        ss = val * val + ss
+    values = _stack(values)
+    s = values.sum(axis=0)
+    ss = (values * values).sum(axis=0)
     variance = (ss - (s * s) / n) / n
     return variance**0.5 * n / s
 
@@ -125,15 +119,17 @@ def gini(values: List[ep.Tensor]) -> ep.Tensor:
     # coefficient of variation
     verify(isinstance(values, list), "fairbench.std can only reduce lists.")
     n = len(values)
+    values = _stack(values)
 
     # Mean of the values
-    mean = _sum(values) / n
-
-    # Calculate the Gini numerator
-    gini_sum = 0
-    for i in range(n):
-        for j in range(n):
-            gini_sum = abs(values[i] - values[j]) + gini_sum
+    mean = values.sum(axis=0) / n
+
+    # Calculate the Gini numerator, which is the sum of absolute differences of all pairs,
+    # in O(n log n) from sorted values: the i-th smallest value is subtracted from i-1 others
+    # and has n-i others subtracted from it
+    weights = 2 * ep.arange(values, 1, n + 1) - n - 1
+    weights = weights.astype(values.dtype).reshape((n,) + (1,) * (values.ndim - 1))
+    gini_sum = 2 * (values.sort(axis=0) * weights).sum(axis=0)
 
     # Calculate the Gini coefficient
     gini_coefficient = gini_sum / (2 * n * n * mean)
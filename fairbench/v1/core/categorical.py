@@ -1,6 +1,7 @@
 from fairbench.v1.core.compute import tobackend, istensor
 from fairbench.v1.core.fork import Fork
 from typing import Iterable, Mapping
+import eagerpy as ep
 import numpy as np
 
 
@@ -83,18 +84,65 @@ class Categories:
         )
 
 
+def factorize(x):
+    """
+    Finds the distinct values of an iterable in order of first appearance, and codes each of its elements
+    with the position of its value among them. All NaNs form one more value. Arrays and tensors of non-object
+    types are factorized with one sort, whereas other iterables, including lists of mixed types, fall back
+    to hashing their elements.
+
+    Returns:
+        A list of the distinct values and a numpy array of int32 codes.
+    """
+    if isinstance(x, ep.Tensor):
+        x = x.raw
+    if hasattr(x, "detach"):
+        x = x.detach().cpu()
+    values = (
+        np.asarray(x)
+        if hasattr(x, "__array__") or isinstance(x, (list, tuple))
+        else None
+    )
+    if isinstance(x, (list, tuple)) and len(set(map(type, x))) > 1:
+        # numpy would convert mixed elements to strings or floats, which would tell apart
+        # equal values like 1 and 1.0 or rename them, so they are hashed instead
+        values = None
+    if values is not None and values.dtype != object and values.ndim == 1:
+        missing = values != values  # nans are not equal to themselves
+        vals, first, codes = np.unique(
+            values[~missing], return_index=True, return_inverse=True
+        )
+        vals = list(vals)
+        first = np.flatnonzero(~missing)[first]
+        ret = np.empty(values.shape[0], dtype=np.int32)
+        ret[~missing] = codes.ravel()
+        if missing.any():
+            ret[missing] = len(vals)
+            vals.append(values[missing][0])
+            first = np.r_[first, np.flatnonzero(missing)[0]]
+        # renumbers values by their first appearance
+        order = np.argsort(first, kind="stable")
+        positions = np.empty(order.shape[0], dtype=np.int32)
+        positions[order] = np.arange(order.shape[0], dtype=np.int32)
+        return [vals[i] for i in order], positions[ret]
+    table = dict()
+    codes = np.fromiter(
+        (table.setdefault(val if val == val else _nan, len(table)) for val in x),
+        dtype=np.int32,
+    )
+    return list(table), codes
+
+
+_nan = float("nan")  # the one key of all nans, which are otherwise distinct keys
+
+
 @Transform
 def categories(x):
     assert isinstance(x, Iterable)
     if isinstance(x, Mapping):
         return Categorical(x)
-    vals = list(set(x) - {np.nan})  # ignores nones
-    return {
-        str(val.numpy()) if istensor(val) else str(val): tobackend(
-            [1 if val == xval else 0 for xval in x]
-        )
-        for val in vals
-    }
+    vals, codes = factorize(x)
+    return {str(val): tobackend((codes == i).astype(int)) for i, val in enumerate(vals)}
 
 
 @Transform
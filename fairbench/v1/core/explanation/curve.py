@@ -8,12 +8,17 @@ class ExplanationCurve:
         self.x = x
         self.y = y
         self.name = name
+        self._grid = None
         assert x.shape == y.shape
 
     def togrid(self, grid):
+        # the last grid is retained, because curves are compared to many others on the same grid
+        if self._grid is not None and self._grid.points == grid:
+            return self._grid
         new_x = np.linspace(self.x.min(), self.x.max(), num=grid)
         approx_y = np.interp(new_x, self.x, self.y)
-        return ExplanationCurve(new_x, approx_y)
+        self._grid = ExplanationCurve(new_x, approx_y)
+        return self._grid
 
     @property
     def points(self):
@@ -0,0 +1,74 @@
+from fairbench.v1.core.compute import asprimitive
+import numpy as np
+
+_popcount = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
+
+
+def _numpy(value):
+    value = asprimitive(value)
+    if hasattr(value, "detach"):
+        value = value.detach().cpu()
+    return np.asarray(value)
+
+
+class Bitsets:
+    """
+    Packs the masks of fork branches into bits, so that their intersections, supports, complements,
+    and subset relations are computed with bitwise operations over eight samples per byte. If some
+    masks are not binary (e.g., fuzzy), all of them are kept as they are and the same operations
+    fall back to arithmetic.
+    """
+
+    def __init__(self, masks: list):
+        masks = [_numpy(mask) for mask in masks]
+        self.samples = masks[0].shape[0] if masks else 0
+        self.dtype = np.result_type(*masks) if masks else np.float64
+        self.binary = all(((mask == 0) | (mask == 1)).all() for mask in masks)
+        if self.binary:
+            self.masks = [np.packbits(mask.astype(bool)) for mask in masks]
+        else:
+            # a common floating point type makes equal contents hash equally
+            dtype = np.result_type(self.dtype, np.float32)
+            self.masks = [mask.astype(dtype) for mask in masks]
+        self._matrix = None
+
+    @property
+    def matrix(self):
+        """All masks stacked in a (masks x packed samples) matrix."""
+        if self._matrix is None:
+            self._matrix = np.stack(self.masks)
+        return self._matrix
+
+    def intersect(self, first, second):
+        if self.binary:
+            return first & second
+        return first * second
+
+    def support(self, bits) -> float:
+        """The number of samples in a packed mask, or the sum of a fuzzy one."""
+        if self.binary:
+            return int(_popcount[bits].sum())
+        return float(np.abs(bits).sum())
+
+    def complemented(self) -> list[bool]:
+        """Whether each mask has its complement among the masks, found by hashing their contents."""
+        if self.binary:
+            full = np.packbits(np.ones(self.samples, dtype=bool))
+            contents = {bits.tobytes() for bits in self.masks}
+            return [(bits ^ full).tobytes() in contents for bits in self.masks]
+        # the same check as |mask| - 1 + |other| == 0, where adding 0.0 turns -0.0 into 0.0
+        contents = {(np.abs(mask) + 0.0).tobytes() for mask in self.masks}
+        return [(1 - np.abs(mask) + 0.0).tobytes() in contents for mask in self.masks]
+
+    def subsets(self, i):
+        """Whether each mask is a subset of the i-th one, i.e., whether the i-th mask is one for all its samples."""
+        mask = self.masks[i]
+        if self.binary:
+            return ~(self.matrix & ~mask).any(axis=1)
+        return ~(self.matrix * mask < self.matrix).any(axis=1)
+
+    def unpack(self, bits):
+        """Converts a packed mask back to an array of the same type as the original masks."""
+        if self.binary:
+            return np.unpackbits(bits, count=self.samples).astype(self.dtype)
+        return bits
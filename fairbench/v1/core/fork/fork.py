@@ -3,6 +3,7 @@ from collections.abc import Mapping
 from fairbench.v1.core.compute import *
 from fairbench.v1.core.explanation.error import verify
 from fairbench.v1.core.fork.utils import call, _result, _str_foreign
+from fairbench.v1.core.fork.bitsets import Bitsets
 from typing import List
 
 
@@ -84,39 +85,56 @@ class Fork(Mapping):
     def withcomplements(self):
         # find missing branch complements
         branches = self.branches()
+        complemented = Bitsets(list(branches.values())).complemented()
         new_branches = dict()
-        for branch in branches:
-            has_complement = False
-            for branch2 in branches:
-                if (
-                    astensor(branches[branch]).abs()
-                    - 1
-                    + astensor(branches[branch2]).abs()
-                ).abs().sum() == 0:
-                    has_complement = True
-                    break
+        for branch, has_complement in zip(branches, complemented):
             if not has_complement:
                 new_branches[branch + "'"] = 1 - branches[branch]
         return Fork({**branches, **new_branches})
 
-    def iterate_intersections(self):
-        # get branches
-        branches = self.branches()
-        ids2names = dict(enumerate(branches))
-        vec = [0] * len(branches)
-        while True:
-            # iterate through all different combinations
-            vec[-1] += 1
-            j = len(vec) - 1
-            while j > 0 and vec[j] > 1:
-                vec[j] = 0
-                vec[j - 1] += 1
-                j -= 1
-            if j == 0 and vec[0] > 1:
-                break
-            candidates = [ids2names[i] for i in range(len(vec)) if vec[i] != 0]
+    def iterate_intersections(self, min_support=None, max_order=None):
+        """
+        Iterates through combinations of branch names, in the order of a binary counter where the last
+        branch changes fastest. If a minimum support is provided, the lattice of branch intersections is
+        walked instead, and combinations whose intersection has fewer samples or zero samples are pruned
+        together with all their supersets. Combinations of more than max_order branches are skipped.
+        """
+        intersections, _ = self._intersections(min_support, max_order)
+        for candidates, _ in intersections:
             yield candidates
 
+    def _intersections(self, min_support=None, max_order=None):
+        # depth-first walk that excludes each branch before including it, which visits
+        # combinations in binary counter order, where supersets of pruned intersections are skipped
+        branches = self.branches()
+        names = list(branches)
+        bitsets = None if min_support is None else Bitsets(list(branches.values()))
+        if max_order is None:
+            max_order = len(names)
+
+        def walk(i, candidates, bits):
+            if i == len(names):
+                if candidates:
+                    yield candidates, bits
+                return
+            yield from walk(i + 1, candidates, bits)
+            if len(candidates) >= max_order:
+                return
+            if bitsets is None:
+                yield from walk(i + 1, candidates + [names[i]], None)
+                return
+            new_bits = (
+                bitsets.masks[i]
+                if bits is None
+                else bitsets.intersect(bits, bitsets.masks[i])
+            )
+            support = bitsets.support(new_bits)
+            if support == 0 or support < min_support:
+                return
+            yield from walk(i + 1, candidates + [names[i]], new_bits)
+
+        return walk(0, [], None), bitsets
+
     def relax(self):
         branches = {
             name: asprimitive(branch) for name, branch in self.branches().items()
@@ -132,36 +150,32 @@ class Fork(Mapping):
             new_branches[name] = new_branches[name] / new_branches[name].max()
         return Fork(new_branches)
 
-    def intersectional(self, delimiter="&"):
-        # get branches
+    def intersectional(self, delimiter="&", min_support=0, max_order=None):
+        """
+        Creates all non-empty intersections of branches. Intersections are found by walking their lattice
+        with packed bit masks, where intersections with fewer than min_support samples are pruned
+        together with their supersets. Intersections of more than max_order branches are skipped.
+        """
         branches = self.branches()
         new_branches = dict()
-        for candidates in self.iterate_intersections():
-            new_mask = 1
-            for branch in candidates:
-                new_mask = tobackend(branches[branch]) * new_mask
-            if astensor(new_mask).abs().sum() == 0:
-                continue
-            new_branches[
-                (delimiter.join(candidates)) if len(candidates) > 1 else candidates[0]
-            ] = new_mask
+        intersections, bitsets = self._intersections(min_support, max_order)
+        for candidates, bits in intersections:
+            if len(candidates) == 1:
+                new_mask = tobackend(branches[candidates[0]])
+            else:
+                new_mask = tobackend(bitsets.unpack(bits))
+            new_branches[delimiter.join(candidates)] = new_mask
         return Fork(new_branches)
 
     def strict(self):
         branches = self.branches()
+        bitsets = Bitsets(list(branches.values()))
         remaining_branches = dict()
-        for branch_name, branch_mask in branches.items():
-            specification_exists = False
-            for other_name, other_mask in branches.items():
-                if branch_name == other_name:
-                    continue
-                branch = tobackend(branch_mask)
-                other = tobackend(other_mask)
-                both = branch * other
-                could_not_be_child = float((both < other).abs().sum().raw) == 0
-                if could_not_be_child:
-                    specification_exists = True
-            if not specification_exists:
+        for i, (branch_name, branch_mask) in enumerate(branches.items()):
+            # other branches that could be children of this one
+            specifications = bitsets.subsets(i)
+            specifications[i] = False
+            if not specifications.any():
                 remaining_branches[branch_name] = branch_mask
 
         return Fork(remaining_branches)
@@ -2,7 +2,7 @@ from fairbench import fallbacks
 from fairbench import bench
 
 from fairbench.v2.blocks import *
-from fairbench.v2.core import Sensitive, Progress
+from fairbench.v2.core import Sensitive, Progress, Coded
 from fairbench.v2 import core
 from fairbench.v2 import export
 from fairbench.v2.export import help
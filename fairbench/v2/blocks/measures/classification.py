@@ -1,31 +1,27 @@
 from fairbench.v2 import core as c
 from fairbench.v2.blocks.quantities import quantities
-import numpy as np
 
 
 @c.measure("the positive rate")
-def pr(predictions, sensitive=None):
-    predictions = np.array(predictions)
-    sensitive = np.ones_like(predictions) if sensitive is None else np.array(sensitive)
-    positives = (predictions * sensitive).sum()
-    samples = sensitive.sum()
-    value = 0 if samples == 0 else positives / samples
+def pr(predictions, sensitive=None, statistics=None):
+    counts = c.statistics.confusion(predictions, None, sensitive, statistics)
+    positives = counts.positives
+    samples = counts.samples
+    value = c.statistics.fraction(positives, samples)
     return c.Value(
         value, depends=[quantities.positives(positives), quantities.samples(samples)]
     )
 
 
 @c.measure("the accuracy")
-def acc(predictions, labels, sensitive=None):
-    predictions = np.array(predictions)
-    labels = np.array(labels)
-    sensitive = np.ones_like(predictions) if sensitive is None else np.array(sensitive)
-    ap = (sensitive * labels).sum()
-    an = (sensitive * (1 - labels)).sum()
-    tp = (predictions * sensitive * labels).sum()
-    tn = ((1 - predictions) * sensitive * (1 - labels)).sum()
-    samples = sensitive.sum()
-    value = 0 if samples == 0 else (tp + tn) / samples
+def acc(predictions, labels, sensitive=None, statistics=None):
+    counts = c.statistics.confusion(predictions, labels, sensitive, statistics)
+    ap = counts.ap
+    an = counts.an
+    tp = counts.tp
+    tn = counts.tn
+    samples = counts.samples
+    value = c.statistics.fraction(tp + tn, samples)
     return c.Value(
         c.TargetedNumber(value, 1),
         depends=[
@@ -39,15 +35,13 @@ def acc(predictions, labels, sensitive=None):
 
 
 @c.measure("the true positive rate")
-def tpr(predictions, labels, sensitive=None):
-    predictions = np.array(predictions)
-    labels = np.array(labels)
-    sensitive = np.ones_like(predictions) if sensitive is None else np.array(sensitive)
-    positives = (predictions * sensitive).sum()
-    ap = (labels * sensitive).sum()
-    tp = (predictions * sensitive * labels).sum()
-    samples = sensitive.sum()
-    value = 0 if ap == 0 else tp / ap
+def tpr(predictions, labels, sensitive=None, statistics=None):
+    counts = c.statistics.confusion(predictions, labels, sensitive, statistics)
+    positives = counts.positives
+    ap = counts.ap
+    tp = counts.tp
+    samples = counts.samples
+    value = c.statistics.fraction(tp, ap)
     return c.Value(
         c.TargetedNumber(value, 1),
         depends=[
@@ -60,15 +54,13 @@ def tpr(predictions, labels, sensitive=None):
 
 
 @c.measure("the true negative rate")
-def tnr(predictions, labels, sensitive=None):
-    predictions = np.array(predictions)
-    labels = np.array(labels)
-    sensitive = np.ones_like(predictions) if sensitive is None else np.array(sensitive)
-    negatives = ((1 - predictions) * sensitive).sum()
-    tn = ((1 - predictions) * sensitive * (1 - labels)).sum()
-    an = ((1 - labels) * sensitive).sum()
-    samples = sensitive.sum()
-    value = 0 if an == 0.0 else tn / an
+def tnr(predictions, labels, sensitive=None, statistics=None):
+    counts = c.statistics.confusion(predictions, labels, sensitive, statistics)
+    negatives = counts.negatives
+    tn = counts.tn
+    an = counts.an
+    samples = counts.samples
+    value = c.statistics.fraction(tn, an)
     return c.Value(
         c.TargetedNumber(value, 1),
         depends=[
@@ -81,13 +73,11 @@ def tnr(predictions, labels, sensitive=None):
 
 
 @c.measure("the true acceptance rate")
-def tar(predictions, labels, sensitive=None):
-    predictions = np.array(predictions)
-    labels = np.array(labels)
-    sensitive = np.ones_like(predictions) if sensitive is None else np.array(sensitive)
-    tp = (predictions * sensitive * labels).sum()
-    samples = sensitive.sum()
-    value = 0 if samples == 0 else tp / samples
+def tar(predictions, labels, sensitive=None, statistics=None):
+    counts = c.statistics.confusion(predictions, labels, sensitive, statistics)
+    tp = counts.tp
+    samples = counts.samples
+    value = c.statistics.fraction(tp, samples)
     return c.Value(
         value,
         depends=[
@@ -98,13 +88,11 @@ def tar(predictions, labels, sensitive=None):
 
 
 @c.measure("the true rejection rate")
-def trr(predictions, labels, sensitive=None):
-    predictions = np.array(predictions)
-    labels = np.array(labels)
-    sensitive = np.ones_like(predictions) if sensitive is None else np.array(sensitive)
-    tn = ((1 - predictions) * sensitive * (1 - labels)).sum()
-    samples = sensitive.sum()
-    value = 0 if samples == 0.0 else tn / samples
+def trr(predictions, labels, sensitive=None, statistics=None):
+    counts = c.statistics.confusion(predictions, labels, sensitive, statistics)
+    tn = counts.tn
+    samples = counts.samples
+    value = c.statistics.fraction(tn, samples)
     return c.Value(
         value,
         depends=[
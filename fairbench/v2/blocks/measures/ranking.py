@@ -4,24 +4,24 @@ import numpy as np
 
 
 @c.measure("the average score")
-def avgscore(scores, sensitive=None, bins=100):
-    scores = np.array(scores, dtype=np.float64)
-    sensitive = np.ones_like(scores) if sensitive is None else np.array(sensitive)
-    positives = (scores * sensitive).sum()
-    samples = sensitive.sum()
-    value = 0 if samples == 0 else positives / samples
-
-    hist, bin_edges = np.histogram(
-        scores[sensitive == 1], bins=bins, density=True, range=(0, 1)
-    )
-    bin_edges = np.concatenate([[0], bin_edges[:-1][hist != 0], [bin_edges[-1], 1]])
-    hist = np.concatenate([[0], hist[hist != 0], [0]])
+def avgscore(scores, sensitive=None, bins=100, statistics=None):
+    distribution = c.statistics.distribution(scores, sensitive, bins, statistics)
+    positives = distribution.total
+    samples = distribution.samples
+    value = c.statistics.fraction(positives, samples)
+
+    def density():
+        hist = distribution.density()
+        bin_edges = distribution.edges
+        bin_edges = np.concatenate([[0], bin_edges[:-1][hist != 0], [bin_edges[-1], 1]])
+        hist = np.concatenate([[0], hist[hist != 0], [0]])
+        return (
+            np.array((bin_edges[:-1] + bin_edges[1:]) / 2, dtype=float),
+            np.array(hist, dtype=float),
+        )
 
-    curve = c.Curve(
-        x=np.array((bin_edges[:-1] + bin_edges[1:]) / 2, dtype=float),
-        y=np.array(hist, dtype=float),
-        units="",
-    )
+    # the curve is computed only if reductions or exports use it
+    curve = c.Curve.deferred(density, units="")
 
     return c.Value(
         value,
@@ -34,58 +34,37 @@ def avgscore(scores, sensitive=None, bins=100):
 
 
 @c.measure("the area under curve of the receiver operating characteristics")
-def auc(scores, labels, sensitive=None):
-    from fairbench.fallbacks import auc as _auc, roc_curve as _roc_curve
-    import math
+def auc(scores, labels, sensitive=None, max_points=None, statistics=None):
+    from fairbench.fallbacks.learning.auc import downsample
 
-    scores = np.array(scores, dtype=np.float64)
-    labels = np.array(labels, dtype=np.float64)
-    sensitive = np.ones_like(scores) if sensitive is None else np.array(sensitive)
+    roc = c.statistics.roc(scores, labels, sensitive, statistics)
+    value = roc.auc
 
-    scores = scores[sensitive == 1]
-    labels = labels[sensitive == 1]
-    fpr, tpr, _ = _roc_curve(labels, scores)
-    value = _auc(fpr, tpr)
-
-    if math.isnan(value):  # TODO: temporary solution
-        return c.NotComputable(
+    if np.all(np.isnan(value)):
+        raise c.NotComputable(
             f"Cannot compute AUC when all instances have the same label for branch"
         )
 
-    assert not math.isnan(
-        value
-    ), f"Cannot compute AUC when all instances have the same label for branch"
-
-    curve = c.Curve(
-        x=fpr,
-        y=tpr,
-        units="",
-    )
+    # the curve is computed only if reductions or exports use it, and only it is downsampled
+    curve = c.Curve.deferred(lambda: downsample(max_points, *roc.curve()), units="")
 
     return c.Value(
         value,
-        depends=[quantities.samples(sensitive.sum()), quantities.roc(curve)],
+        depends=[quantities.samples(roc.samples), quantities.roc(curve)],
     )
 
 
 @c.measure("the hit ratio of top recommendations")
-def tophr(scores, labels, sensitive=None, top=3):
-    scores = np.array(scores, dtype=np.float64)
-    labels = np.array(labels, dtype=np.float64)
-    sensitive = np.ones_like(scores) if sensitive is None else np.array(sensitive)
-
+def tophr(scores, labels, sensitive=None, top=3, statistics=None):
     k = int(top)
     assert (
-        0 < k <= scores.shape[0]
-    ), f"There are only {scores.shape[0]} inputs but top={top} was requested for ranking analysis"
-
-    scores = scores[sensitive == 1]
-    labels = labels[sensitive == 1]
-    indexes = np.argsort(scores)[-k:]
+        0 < k <= len(scores)
+    ), f"There are only {len(scores)} inputs but top={top} was requested for ranking analysis"
 
-    value = labels[indexes].mean()
-    true_top = labels[indexes].sum()
-    samples = sensitive.sum()
+    ranking = c.statistics.ranking(scores, labels, sensitive, statistics)
+    true_top, members = ranking.top(k)
+    value = true_top / members
+    samples = ranking.samples
 
     return c.Value(
         value,
@@ -98,24 +77,17 @@ def tophr(scores, labels, sensitive=None, top=3):
 
 
 @c.measure("the precision of top recommendations")
-def toprec(scores, labels, sensitive=None, top=3):
-    scores = np.array(scores, dtype=np.float64)
-    labels = np.array(labels, dtype=np.float64)
-    sensitive = np.ones_like(scores) if sensitive is None else np.array(sensitive)
-
+def toprec(scores, labels, sensitive=None, top=3, statistics=None):
     k = int(top)
     assert (
-        0 < k <= scores.shape[0]
-    ), f"There are only {scores.shape[0]} inputs but top={top} was requested for ranking analysis"
+        0 < k <= len(scores)
+    ), f"There are only {len(scores)} inputs but top={top} was requested for ranking analysis"
 
-    scores = scores[sensitive == 1]
-    labels = labels[sensitive == 1]
-    indexes = np.argsort(scores)[-k:]
-
-    true_top = labels[indexes].sum()
-    denom = labels.sum()
-    value = 0 if denom == 0 else true_top / denom
-    samples = sensitive.sum()
+    ranking = c.statistics.ranking(scores, labels, sensitive, statistics)
+    true_top, _ = ranking.top(k)
+    denom = ranking.ap
+    value = c.statistics.fraction(true_top, denom)
+    samples = ranking.samples
 
     return c.Value(
         value,
@@ -129,27 +101,20 @@ def toprec(scores, labels, sensitive=None, top=3):
 
 
 @c.measure("the F1 score of top recommendations")
-def topf1(scores, labels, sensitive=None, top=3):
-    scores = np.array(scores, dtype=np.float64)
-    labels = np.array(labels, dtype=np.float64)
-    sensitive = np.ones_like(scores) if sensitive is None else np.array(sensitive)
-
+def topf1(scores, labels, sensitive=None, top=3, statistics=None):
     k = int(top)
     assert (
-        0 < k <= scores.shape[0]
-    ), f"There are only {scores.shape[0]} inputs but top={top} was requested for ranking analysis"
-
-    scores = scores[sensitive == 1]
-    labels = labels[sensitive == 1]
-    indexes = np.argsort(scores)[-k:]
-
-    prec = labels[indexes].mean()
-    denom_rec = labels.sum()
-    rec = 0 if denom_rec == 0 else labels[indexes].sum() / denom_rec
+        0 < k <= len(scores)
+    ), f"There are only {len(scores)} inputs but top={top} was requested for ranking analysis"
+
+    ranking = c.statistics.ranking(scores, labels, sensitive, statistics)
+    true_top, members = ranking.top(k)
+    prec = true_top / members
+    denom_rec = ranking.ap
+    rec = c.statistics.fraction(true_top, denom_rec)
     denom = prec + rec
-    value = 0 if denom == 0 else 2 * prec * rec / denom
-    true_top = labels[indexes].sum()
-    samples = sensitive.sum()
+    value = c.statistics.fraction(2 * prec * rec, denom)
+    samples = ranking.samples
 
     return c.Value(
         value,
@@ -163,23 +128,16 @@ def topf1(scores, labels, sensitive=None, top=3):
 
 
 @c.measure("the average representation at top recommendations", unit=False)
-def avgrepr(scores, sensitive=None, top=3):
-    scores = np.array(scores, dtype=np.float64)
-    sensitive = np.ones_like(scores) if sensitive is None else np.array(sensitive)
-
+def avgrepr(scores, sensitive=None, top=3, statistics=None):
     k = int(top)
     assert (
-        0 < k <= scores.shape[0]
-    ), f"There are only {scores.shape[0]} inputs but top={top} was requested for ranking analysis"
+        0 < k <= len(scores)
+    ), f"There are only {len(scores)} inputs but top={top} was requested for ranking analysis"
 
+    sensitive = np.ones(len(scores)) if sensitive is None else np.array(sensitive)
     expected = float(np.mean(sensitive))
-    indexes = np.argsort(scores)[-k:]
-
-    accum = 0
-    curve = []
-    for num in range(1, k + 1):
-        accum += sensitive[indexes[-num]]
-        curve.append(accum / num / expected)
+    indexes = c.statistics.order(scores, statistics)[:k]
+    curve = np.cumsum(sensitive[indexes]) / np.arange(1, k + 1) / expected
 
     avg_representation = 0 if len(curve) == 0 else np.mean(curve)
     samples = sensitive.sum()
@@ -4,13 +4,11 @@ import numpy as np
 
 
 @c.measure("mean absolute error")
-def mabs(scores, targets, sensitive=None, bins=100):
-    scores = np.array(scores, dtype=np.float64)
-    targets = np.array(targets, dtype=np.float64)
-    sensitive = np.ones_like(scores) if sensitive is None else np.array(sensitive)
-    error = (np.abs(scores - targets) * sensitive).sum()
-    samples = sensitive.sum()
-    value = 0 if samples == 0.0 else error / samples
+def mabs(scores, targets, sensitive=None, bins=100, statistics=None):
+    errors = c.statistics.errors(scores, targets, sensitive, statistics)
+    error = errors.absolute
+    samples = errors.samples
+    value = c.statistics.fraction(error, samples)
 
     """hist, bin_edges = np.histogram(scores[sensitive == 1], bins=bins, density=True, range=(0, 1))
     bin_edges = np.concatenate([[0], bin_edges[:-1][hist != 0], [bin_edges[-1], 1]])
@@ -28,13 +26,11 @@ def mabs(scores, targets, sensitive=None, bins=100):
 
 
 @c.measure("root mean square error")
-def rmse(scores, targets, sensitive=None):
-    scores = np.array(scores, dtype=np.float64)
-    targets = np.array(targets, dtype=np.float64)
-    sensitive = np.ones_like(scores) if sensitive is None else np.array(sensitive)
-    error = ((scores - targets) ** 2 * sensitive).sum()
-    samples = sensitive.sum()
-    value = 0 if samples == 0.0 else error / samples
+def rmse(scores, targets, sensitive=None, statistics=None):
+    errors = c.statistics.errors(scores, targets, sensitive, statistics)
+    error = errors.square
+    samples = errors.samples
+    value = c.statistics.fraction(error, samples)
     return c.Value(
         c.TargetedNumber(value**0.5, 0),
         depends=[
@@ -44,13 +40,11 @@ def rmse(scores, targets, sensitive=None):
 
 
 @c.measure("mean square error")
-def mse(scores, targets, sensitive=None):
-    scores = np.array(scores, dtype=np.float64)
-    targets = np.array(targets, dtype=np.float64)
-    sensitive = np.ones_like(scores) if sensitive is None else np.array(sensitive)
-    error = ((scores - targets) ** 2 * sensitive).sum()
-    samples = sensitive.sum()
-    value = 0 if samples == 0.0 else error / samples
+def mse(scores, targets, sensitive=None, statistics=None):
+    errors = c.statistics.errors(scores, targets, sensitive, statistics)
+    error = errors.square
+    samples = errors.samples
+    value = c.statistics.fraction(error, samples)
     return c.Value(
         c.TargetedNumber(value, 0),
         depends=[
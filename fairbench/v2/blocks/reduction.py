@@ -3,7 +3,86 @@ from fairbench.v2 import core as c
 from fairbench.v2.core import NotComputable
 
 
-@c.reduction("the minimum")
+def _min(values, targets):
+    targeted = ~np.isnan(targets)
+    computable = ~(targeted & (values > targets)).any(axis=1)
+    result_targets = np.where(targeted, targets, -np.inf).max(axis=1)
+    result_targets[~targeted.any(axis=1)] = np.nan
+    return values.min(axis=1), result_targets, computable
+
+
+def _max(values, targets):
+    targeted = ~np.isnan(targets)
+    computable = ~(targeted & (values < targets)).any(axis=1)
+    result_targets = np.where(targeted, targets, np.inf).min(axis=1)
+    result_targets[~targeted.any(axis=1)] = np.nan
+    return values.max(axis=1), result_targets, computable
+
+
+def _maxerror(values, targets):
+    computable = (~np.isnan(targets)).all(axis=1)
+    return np.abs(values - targets).max(axis=1), np.zeros(len(values)), computable
+
+
+def _std(values, targets):
+    return np.std(values, axis=1), np.zeros(len(values)), np.ones(len(values), bool)
+
+
+def _gini(values, targets):
+    # the sum of absolute differences between all pairs is obtained from sorted values in O(n log n)
+    n = values.shape[1]
+    weights = 2 * np.arange(1, n + 1) - n - 1
+    pairs = 2 * np.sort(values, axis=1) @ weights
+    mean = values.sum(axis=1) / n
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ret = np.where(mean == 0, 0, pairs / (2 * n * n * mean))
+    return ret, np.zeros(len(values)), np.ones(len(values), bool)
+
+
+def _mean(values, targets):
+    nan = np.full(len(values), np.nan)
+    return np.mean(values, axis=1), nan, np.ones(len(values), bool)
+
+
+def _maxdiff(values, targets):
+    ret = values.max(axis=1) - values.min(axis=1)
+    return ret, np.zeros(len(values)), np.ones(len(values), bool)
+
+
+def _maxrel(values, targets):
+    nonzero = values != 0
+    smallest = np.where(nonzero, values, np.inf).min(axis=1)
+    largest = np.where(nonzero, values, -np.inf).max(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ret = np.where(nonzero.any(axis=1), np.abs(1 - smallest / largest), 0.0)
+    # rows with negative numbers or nans are not covered by the closed form
+    for i in np.flatnonzero((values < 0).any(axis=1) | np.isnan(values).any(axis=1)):
+        ret[i] = c.transform.max_relative(values[i])
+    return ret, np.zeros(len(values)), np.ones(len(values), bool)
+
+
+def _wmean(values, targets, samples):
+    weights = samples.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ret = np.sum(values * samples / weights[:, np.newaxis], axis=1)
+    # without any weights, all numbers weigh the same, which also covers a single group
+    ret = np.where(weights == 0, np.mean(values, axis=1), ret)
+    return ret, np.full(len(values), np.nan), np.ones(len(values), bool)
+
+
+def _largestmaxrel(values, targets, samples):
+    # compares to the first of the numbers with the most samples, like c.transform.at_max_samples
+    computable = samples.max(axis=1) > 0
+    compared_to = values[np.arange(len(values)), samples.argmax(axis=1)][:, np.newaxis]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ret = np.abs(
+            1 - np.minimum(values, compared_to) / np.maximum(values, compared_to)
+        )
+    ret = np.where((values != 0) & (compared_to != 0), ret, 0).max(axis=1)
+    return ret, np.zeros(len(values)), computable
+
+
+@c.reduction("the minimum", kernel=_min)
 def min(values):
     min_target = None
     for value in values:
@@ -19,7 +98,7 @@ def min(values):
     return ret if min_target is None else c.TargetedNumber(ret, min_target)
 
 
-@c.reduction("the maximum")
+@c.reduction("the maximum", kernel=_max)
 def max(values):
     max_target = None
     for value in values:
@@ -34,7 +113,11 @@ def max(values):
     return ret if max_target is None else c.TargetedNumber(ret, max_target)
 
 
-@c.reduction("the maximum deviation from the ideal value")
+@c.reduction(
+    "the maximum deviation from the ideal value",
+    requires=c.TargetedNumber,
+    kernel=_maxerror,
+)
 def maxerror(values):
     for value in values:
         value = value.value
@@ -45,31 +128,28 @@ def maxerror(values):
     )
 
 
-@c.reduction("the standard deviation")
+@c.reduction("the standard deviation", kernel=_std)
 def std(values):
     values = c.transform.number(values)
     return c.TargetedNumber(np.std(values), 0)
 
 
-@c.reduction("the gini coefficient")
+@c.reduction("the gini coefficient", kernel=_gini)
 def gini(values):
     values = c.transform.number(values)
-    n = len(values)
-    if n == 0:
+    if len(values) == 0:
         return c.TargetedNumber(0, 0)
-    mean = sum(values) / n
-    gini_sum = sum(abs(values[i] - values[j]) for i in range(n) for j in range(n))
-    gini_coefficient = 0 if mean == 0 else gini_sum / (2 * n * n * mean)
-    return c.TargetedNumber(gini_coefficient, 0)
+    values = np.array(values, dtype=np.float64)[np.newaxis]
+    return c.TargetedNumber(_gini(values, None)[0][0], 0)
 
 
-@c.reduction("the average")
+@c.reduction("the average", kernel=_mean)
 def mean(values):
     values = c.transform.number(values)
     return np.mean(values)
 
 
-@c.reduction("the weighted average")
+@c.reduction("the weighted average", kernel=_wmean)
 def wmean(values, weight_by=None):
     if weight_by is None:
         from fairbench.v2 import measures
@@ -83,47 +163,46 @@ def wmean(values, weight_by=None):
     weights = np.array(weights)
     weights_sum = weights.sum()
     if weights_sum == 0:
-        return values
+        return np.mean(values)
     return np.sum(values * weights / weights_sum)
 
 
-@c.reduction("the maximum difference")
+@c.reduction("the maximum difference", kernel=_maxdiff)
 def maxdiff(values):
-    values = c.transform.diff(values)
-    return c.TargetedNumber(np.max(values), 0)
+    return c.TargetedNumber(c.transform.max_diff(values), 0)
 
 
-@c.reduction("the maximum area between curves")
+@c.reduction("the maximum area between curves", requires="curve")
 def maxbarea(values):
     values = c.transform.curve_diff(values)
     return c.TargetedNumber(np.max(values), 0)
 
 
-@c.reduction("the maximum relative difference")
+@c.reduction("the maximum relative difference", kernel=_maxrel)
 def maxrel(values):
-    values = c.transform.relative(values)
-    return c.TargetedNumber(np.max(values), 0)
+    return c.TargetedNumber(c.transform.max_relative(values), 0)
 
 
 @c.reduction(
-    "the maximum difference from the largest group (the whole population if included)"
+    "the maximum difference from the largest group (the whole population if included)",
+    kernel=_maxdiff,
 )
 def largestmaxdiff(values):
-    values = c.transform.diff(values)
-    return c.TargetedNumber(np.max(values), 0)
+    return c.TargetedNumber(c.transform.max_diff(values), 0)
 
 
 @c.reduction(
-    "the maximum relative difference from the largest group (the whole population if included)"
+    "the maximum relative difference from the largest group (the whole population if included)",
+    kernel=_largestmaxrel,
 )
 def largestmaxrel(values):
     compared_to = c.transform.at_max_samples(values)
-    values = c.transform.relative(values, compared_to=compared_to)
-    return c.TargetedNumber(np.max(values), 0)
+    return c.TargetedNumber(c.transform.max_relative(values, compared_to), 0)
 
 
 @c.reduction(
-    "the maximum area between curves and the curve of the largest group (the whole population if included)"
+    "the maximum area between curves and the curve of the largest group (the whole population if included)",
+    requires="curve",
 )
 def largestmaxbarea(values):
     compared_to = c.transform.at_max_samples(values)
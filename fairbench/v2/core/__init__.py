@@ -5,8 +5,13 @@ from fairbench.v2.core.values import (
     Number,
     Curve,
 )
+from fairbench.v2.core.coded import Coded
+from fairbench.v2.core.statistics import Statistics
+from fairbench.v2.core.cache import Cache
+from fairbench.v2.core import statistics
 from fairbench.v2.core.sensitive import Sensitive, NotComputable, DataError
+from fairbench.v2.core.bootstrap import Bootstrap
 from fairbench.v2.core.framework import measure, reduction
 from fairbench.v2.core import transform
-from fairbench.v2.core.report import report
+from fairbench.v2.core.report import report, Plan
 from fairbench.v2.core.progress import Progress
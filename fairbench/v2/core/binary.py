@@ -0,0 +1,228 @@
+from fairbench.v2.core.values import Value, Descriptor, Number, TargetedNumber, Curve
+from fairbench.v2.core.values import _restored, _segments, _matches
+import numpy as np
+import json
+
+magic = b"FBREPORT"
+version = 1
+alignment = 64
+kinds = [type(None), Number, TargetedNumber, Curve]
+
+
+def to_bytes(value: Value) -> bytes:
+    """
+    Serializes a value tree to a compact binary format. Strings are deduplicated into one table, and so are
+    descriptors and values that appear in several places of the tree. The tree is stored as flat arrays of
+    node attributes and of child indexes, and curve points as raw float arrays. The format consists of
+    a magic string, the byte length of a json header that describes the arrays and holds the strings, and
+    the arrays themselves aligned to 64 bytes, so that they can be memory-mapped when loaded.
+    """
+    strings = dict()
+    descriptors = dict()
+    nodes = dict()
+    order = list()
+    stack = [(value, False)]
+    # children are placed before their parents, so that loading needs only one pass
+    while stack:
+        node, expanded = stack.pop()
+        if id(node) in nodes:
+            continue
+        if expanded:
+            nodes[id(node)] = len(order)
+            order.append(node)
+            continue
+        stack.append((node, True))
+        for dep in reversed(list(node.depends.values())):
+            if id(dep) not in nodes:
+                stack.append((dep, False))
+
+    def string(text):
+        if text not in strings:
+            strings[text] = len(strings)
+        return strings[text]
+
+    descriptor_fields = list()
+    for node in order:
+        descriptor = node.descriptor
+        if id(descriptor) not in descriptors:
+            descriptors[id(descriptor)] = len(descriptor_fields)
+            descriptor_fields.append(
+                [
+                    string(descriptor.name),
+                    string(descriptor.role),
+                    string(descriptor.details),
+                    string(descriptor.alias),
+                    string(descriptor.preferred_units),
+                ]
+            )
+    kind = np.zeros(len(order), dtype=np.int8)
+    numbers = np.zeros(len(order), dtype=np.float64)
+    targets = np.zeros(len(order), dtype=np.float64)
+    units = np.zeros(len(order), dtype=np.int32)
+    offsets = np.zeros(len(order) + 1, dtype=np.int64)
+    children = list()
+    curves = [0]
+    xs = list()
+    ys = list()
+    for i, node in enumerate(order):
+        children.extend(nodes[id(dep)] for dep in node.depends.values())
+        offsets[i + 1] = len(children)
+        number = node.value
+        kind[i] = kinds.index(type(number))
+        if number is None:
+            continue
+        units[i] = string(number.units)
+        if isinstance(number, Curve):
+            numbers[i] = len(curves) - 1
+            xs.append(np.asarray(number.x, dtype=np.float64).ravel())
+            ys.append(np.asarray(number.y, dtype=np.float64).ravel())
+            assert len(xs[-1]) == len(ys[-1]), "Curves must have as many x as y points"
+            curves.append(curves[-1] + len(xs[-1]))
+            continue
+        numbers[i] = number.value
+        if isinstance(number, TargetedNumber):
+            targets[i] = number.target
+    arrays = {
+        "descriptors": np.array(descriptor_fields, dtype=np.int32).reshape(-1, 5),
+        "node_descriptors": np.array(
+            [descriptors[id(node.descriptor)] for node in order], dtype=np.int32
+        ),
+        "kinds": kind,
+        "numbers": numbers,
+        "targets": targets,
+        "units": units,
+        "offsets": offsets,
+        "children": np.array(children, dtype=np.int32),
+        "curves": np.array(curves, dtype=np.int64),
+        "x": np.concatenate(xs) if xs else np.zeros(0),
+        "y": np.concatenate(ys) if ys else np.zeros(0),
+    }
+
+    specs = dict()
+    position = 0
+    for name, array in arrays.items():
+        specs[name] = [array.dtype.str, list(array.shape), position]
+        position += _padded(array.nbytes)
+    header = json.dumps(
+        {"version": version, "strings": list(strings), "arrays": specs}
+    ).encode()
+    start = _padded(len(magic) + 8 + len(header))
+    out = bytearray(start + position)
+    out[: len(magic)] = magic
+    out[len(magic) : len(magic) + 8] = np.uint64(len(header)).tobytes()
+    out[len(magic) + 8 : len(magic) + 8 + len(header)] = header
+    for name, array in arrays.items():
+        offset = start + specs[name][2]
+        out[offset : offset + array.nbytes] = np.ascontiguousarray(array).tobytes()
+    return bytes(out)
+
+
+def from_bytes(data, select: str | None = None) -> Value:
+    """
+    Restores a value tree from the outcome of `to_bytes`. Data can be bytes or any other buffer,
+    such as a memory map, in which case curve points remain views of that buffer. If a `select` path
+    of aliases is given, such as "min.acc" or "*.acc", the path is followed through the child index
+    and only the selected subtrees and their ancestors are created.
+    """
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    assert bytes(buffer[: len(magic)]) == magic, "This is not a serialized report"
+    length = int(buffer[len(magic) : len(magic) + 8].view(np.uint64)[0])
+    header = json.loads(bytes(buffer[len(magic) + 8 : len(magic) + 8 + length]))
+    assert (
+        header["version"] <= version
+    ), "This report was serialized by a newer version of FairBench"
+    start = _padded(len(magic) + 8 + length)
+    arrays = dict()
+    for name, (dtype, shape, offset) in header["arrays"].items():
+        dtype = np.dtype(dtype)
+        count = int(np.prod(shape))
+        arrays[name] = (
+            buffer[start + offset : start + offset + count * dtype.itemsize]
+            .view(dtype)
+            .reshape(shape)
+        )
+    strings = header["strings"]
+    fields = arrays["descriptors"]
+    node_descriptors = arrays["node_descriptors"]
+    offsets = arrays["offsets"]
+    children = arrays["children"]
+    root = len(node_descriptors) - 1
+
+    # follow the path to find the ancestors, which get only their matching children, and the selected subtrees
+    partial = dict()
+    frontier = [root]
+    for segment in _segments(select):
+        following = list()
+        for node in frontier:
+            matching = [
+                child
+                for child in children[offsets[node] : offsets[node + 1]].tolist()
+                if _matches(strings[fields[node_descriptors[child], 3]], segment)
+            ]
+            partial.setdefault(node, list()).extend(matching)
+            following.extend(matching)
+        frontier = following
+    full = set()
+    stack = list(frontier)
+    while stack:
+        node = stack.pop()
+        if node not in full:
+            full.add(node)
+            stack.extend(children[offsets[node] : offsets[node + 1]].tolist())
+
+    descriptors = dict()
+    kind_indexes = arrays["kinds"]
+    numbers = arrays["numbers"]
+    targets = arrays["targets"]
+    units = arrays["units"]
+    curves = arrays["curves"]
+    nodes = dict()
+    for i in sorted(full | partial.keys()):
+        kind = kinds[kind_indexes[i]]
+        number = None
+        if kind is Number:
+            number = Number(numbers[i], strings[units[i]])
+        elif kind is TargetedNumber:
+            number = TargetedNumber(numbers[i], targets[i], strings[units[i]])
+        elif kind is Curve:
+            # set points directly instead of through the constructor, which would copy them
+            begin, end = curves[int(numbers[i])], curves[int(numbers[i]) + 1]
+            number = Curve.__new__(Curve)
+            number._x = arrays["x"][begin:end]
+            number._y = arrays["y"][begin:end]
+            number.units = strings[units[i]]
+            number._grid = None
+            number._points = None
+        descriptor = int(node_descriptors[i])
+        if descriptor not in descriptors:
+            name, role, details, alias, preferred_units = fields[descriptor].tolist()
+            descriptors[descriptor] = Descriptor(
+                name=strings[name],
+                role=strings[role],
+                details=strings[details],
+                alias=strings[alias],
+                preferred_units=strings[preferred_units],
+            )
+        if i in full:
+            depends = children[offsets[i] : offsets[i + 1]].tolist()
+        else:
+            depends = partial[i]
+        nodes[i] = _restored(
+            number,
+            descriptors[descriptor],
+            [nodes[child] for child in depends],
+            i == root,
+        )
+    return nodes[root]
+
+
+def load(path: str, mmap: bool = True, select: str | None = None) -> Value:
+    """Loads a value tree from a file holding the outcome of `to_bytes`, by default memory-mapping it."""
+    if mmap:
+        return from_bytes(np.memmap(path, dtype=np.uint8, mode="r"), select)
+    with open(path, "rb") as file:
+        return from_bytes(file.read(), select)
+
+
+def _padded(size: int) -> int:
+    return (size + alignment - 1) // alignment * alignment
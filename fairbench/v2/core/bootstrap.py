@@ -0,0 +1,417 @@
+from fairbench.v2.core.values import Value, Descriptor, Number, TargetedNumber
+from fairbench.v2.core.coded import Coded
+from fairbench.v2.core.sensitive import Sensitive, NotComputable, signature
+from fairbench.v2.core.statistics import (
+    Statistics,
+    Distribution,
+    matrix_product,
+    _sorted,
+    _runs,
+    _members,
+)
+from fairbench.v2.core.framework import kernel_dependencies
+import numpy as np
+
+
+class Bootstrap:
+    """
+    Estimates confidence intervals of report values from bootstrap replicates of the data. Each replicate
+    weighs every sample by an independent Poisson(1) count, which approximates resampling the data with
+    replacement. Replicates are never materialized: their weights are drawn in chunks of replicates, the
+    sufficient statistics of each group are computed for all replicates of a chunk at once, and measures are
+    evaluated once per chunk on arrays of those statistics before the weights of the next chunk are drawn.
+    Reductions with a vectorized kernel then reduce all replicates with one call.
+    Pass `bootstrap=N` to reports, or an instance of this class to also set the confidence level and seed.
+
+    Args:
+        replicates: The number of bootstrap replicates.
+        confidence: The probability mass that intervals cover, where bounds are the matching percentiles of replicates.
+        seed: The seed of the random weights, so that the same data yield the same intervals.
+        chunk: The number of replicates whose weights are held in memory at once.
+    """
+
+    def __init__(
+        self,
+        replicates: int = 1000,
+        confidence: float = 0.95,
+        seed: int | None = 0,
+        chunk: int = 64,
+    ):
+        assert replicates > 0, "There should be at least one bootstrap replicate"
+        assert 0 < confidence < 1, "The confidence level should be in (0,1)"
+        assert chunk > 0, "There should be at least one replicate per chunk"
+        self.replicates = int(replicates)
+        self.confidence = confidence
+        self.seed = seed
+        self.chunk = int(chunk)
+        self.lower = Descriptor(
+            "lower",
+            "bound",
+            f"the lower bound of the {confidence:.0%} bootstrap confidence interval",
+        )
+        self.upper = Descriptor(
+            "upper",
+            "bound",
+            f"the upper bound of the {confidence:.0%} bootstrap confidence interval",
+        )
+        # without a seed, the entropy is still fixed here so that all branches of a report share the replicates
+        self._entropy = np.random.SeedSequence(seed).entropy
+
+    def chunks(self) -> int:
+        """Returns the number of chunks of replicates."""
+        return -(-self.replicates // self.chunk)
+
+    def weights(self, samples: int, index: int) -> np.ndarray:
+        """
+        Returns the (replicates x samples) matrix of resampling counts of the index-th chunk of replicates,
+        stored as bytes. Counts are derived from the seed and the chunk index alone, so that all branches of
+        a report share the same replicates without retaining them.
+        """
+        rows = min(self.chunk, self.replicates - index * self.chunk)
+        rng = np.random.default_rng(
+            np.random.SeedSequence(self._entropy, spawn_key=(index,))
+        )
+        counts = rng.poisson(1.0, (rows, samples))
+        return np.minimum(counts, 255, out=counts).astype(np.uint8)
+
+    def interval(self, replicated) -> tuple[float, float] | None:
+        """Returns the percentile bounds of replicated values, ignoring nan values, or None if there are none."""
+        replicated = np.asarray(replicated, dtype=np.float64)
+        replicated = replicated[~np.isnan(replicated)]
+        if not replicated.shape[0]:
+            return None
+        tail = (1 - self.confidence) / 2
+        lower, upper = np.quantile(replicated, [tail, 1 - tail])
+        return float(lower), float(upper)
+
+    def bounded(self, value: Value, replicated) -> Value:
+        """Returns a copy of a value with the bounds of its replicated values as additional dependencies."""
+        interval = self.interval(replicated)
+        if interval is None:
+            return value
+        units = value.value.units
+        return Value(
+            value.value,
+            value.descriptor,
+            list(value.depends.values())
+            + [
+                self.lower(Number(interval[0], units)),
+                self.upper(Number(interval[1], units)),
+            ],
+        )
+
+    def replicate(self, sensitive: Sensitive, measures, kwargs):
+        """Computes the measures of all groups for all replicates, one chunk of replicates at a time."""
+        return Replicates(self, sensitive, measures, kwargs)
+
+
+class Replicates:
+    """Values of the measures of one report for all replicates of a bootstrap, with one number per replicate."""
+
+    def __init__(self, bootstrap: Bootstrap, sensitive: Sensitive, measures, kwargs):
+        self.bootstrap = bootstrap
+        samples = _samples(sensitive)
+        # sorting and the input columns of sums are shared by the statistics of all chunks
+        statistics = kwargs.get("statistics") or Statistics()
+        # measures that do not obtain their statistics from the given ones would only repeat the original values
+        measures = [measure for measure in measures if _resamplable(measure)]
+        self.chunks = list()
+        for index in range(bootstrap.chunks()):
+            weights = bootstrap.weights(samples, index)
+            # each measure is evaluated once per group, on arrays of the statistics of the replicates of the chunk
+            with np.errstate(divide="ignore", invalid="ignore"):
+                results = sensitive.assessment(
+                    measures,
+                    **(kwargs | {"statistics": Resampled(statistics, weights)}),
+                )
+            # only numbers are kept, because values may retain the statistics and weights of the chunk
+            rows = weights.shape[0]
+            values = {
+                (group.descriptor.alias, value.descriptor.alias): _numbers(value, rows)
+                for group in results.depends.values()
+                for value in group.depends.values()
+            }
+            self.chunks.append((rows, values))
+
+    def _replicated(self, key, name: str | None = None) -> np.ndarray:
+        # the numbers of a value, or of its named dependency, for the replicates of all chunks
+        return np.concatenate(
+            [
+                values.get(key, dict()).get(name, np.full(rows, np.nan))
+                for rows, values in self.chunks
+            ]
+        )
+
+    def assessment(self, results: Value) -> Value:
+        """Attaches intervals to the measures of all groups of assessment results."""
+        return results.descriptor(
+            depends=[
+                group.descriptor(
+                    depends=[
+                        self.bootstrap.bounded(
+                            value,
+                            self._replicated(
+                                (group.descriptor.alias, value.descriptor.alias)
+                            ),
+                        )
+                        for value in group.depends.values()
+                    ]
+                )
+                for group in results.depends.values()
+            ]
+        )
+
+    def reduction(self, reduction, value: Value, results: Value) -> Value:
+        """
+        Attaches intervals to the reduced measures of a reduction of assessment results. Only reductions
+        with a vectorized kernel get intervals, because they reduce all replicates with one call. Reductions
+        of curves, like `maxbarea` and `largestmaxbarea`, have none, as curves of replicates are not computed.
+        """
+        kernel = getattr(reduction, "kernel", None)
+        if kernel is None:
+            return value
+        return value.descriptor(
+            depends=[
+                self.bootstrap.bounded(
+                    dep, self._kernel(kernel, dep.descriptor.alias, results)
+                )
+                for dep in value.depends.values()
+            ]
+        )
+
+    def _kernel(self, kernel, alias, results: Value):
+        # reduces the replicates in which all groups have the measure with one call to the kernel
+        groups = [
+            group.descriptor.alias
+            for group in results.depends.values()
+            if alias in group.depends
+        ]
+        if not groups:
+            return []
+        keys = [(group, alias) for group in groups]
+        values = np.column_stack([self._replicated(key) for key in keys])
+        depends = dict()
+        for name in kernel_dependencies(kernel):
+            if any(
+                name not in chunk.get(key, dict())
+                for _, chunk in self.chunks
+                for key in keys
+            ):
+                return []
+            depends[name] = np.column_stack(
+                [self._replicated(key, name) for key in keys]
+            )
+        kept = ~np.isnan(values).any(axis=1)
+        if not kept.any():
+            return []
+        targets = np.array(
+            [
+                (
+                    group.depends[alias].value.target
+                    if isinstance(group.depends[alias].value, TargetedNumber)
+                    else np.nan
+                )
+                for group in results.depends.values()
+                if alias in group.depends
+            ]
+        )
+        reduced, _, computable = kernel(
+            values[kept],
+            np.broadcast_to(targets, values[kept].shape).copy(),
+            **{name: matrix[kept] for name, matrix in depends.items()},
+        )
+        return reduced[computable]
+
+
+class Resampled(Statistics):
+    """
+    Serves the sufficient statistics of a chunk of bootstrap replicates at once to measures, with arrays of
+    one element per replicate in place of each number. Statistics that are sums over samples, such as confusion
+    counts, error sums, and histograms, are products of the (replicates x samples) weight matrix with their
+    input columns, and rankings and roc curves are obtained from weighted cumulative sums over the sorting
+    of scores. Sorting and the input columns of sums are shared with the given statistics, whereas statistics
+    of the weights are only retained by this instance.
+    """
+
+    def __init__(self, statistics: Statistics, weights: np.ndarray):
+        super().__init__()
+        self.memo = statistics.memo
+        self.batches = statistics.batches
+        self.weights = weights
+        self.replicated = dict()
+
+    def _replicated(self, key, compute, *args):
+        key = (key,) + tuple(id(arg) for arg in args)
+        if key not in self.replicated:
+            # also store arguments to prevent their ids from being reused
+            self.replicated[key] = (compute(*args), args)
+        return self.replicated[key][0]
+
+    def _group_members(self, order, sensitive):
+        # group masks may be created anew for each chunk, so their members are only retained for this one
+        return self._replicated("members", _members, order, sensitive), sensitive
+
+    def _sums(self, columns, sensitive):
+        # one array of all replicates for each statistic
+        return self._replicated(
+            "replicate sums", _replicate_sums, self.weights, columns, sensitive
+        ).T
+
+    def distribution(self, scores, sensitive=None, bins=100) -> Distribution:
+        totals = self.confusion(scores, None, sensitive)
+        counts, edges = self._replicated(
+            "replicate histograms",
+            _replicate_histograms,
+            self.weights,
+            scores,
+            sensitive,
+            bins,
+        )
+        return Distribution(totals.samples, totals.positives, counts, edges)
+
+    def order(self, scores):
+        raise NotComputable("Resampled scores cannot be sorted as a whole")
+
+    def ranking(self, scores, labels, sensitive=None) -> "ReplicatedRanking":
+        # measures of the same group share the ranking and thus its top-k statistics
+        return self._replicated(
+            "replicate ranking", self._ranking, self.weights, scores, labels, sensitive
+        )
+
+    def _ranking(self, weights, scores, labels, sensitive):
+        order = super().order(scores)
+        sorted_labels = self._memoized("sorted", _sorted, labels, order)
+        samples = self.confusion(scores, None, sensitive).samples
+        members, _ = self._group_members(order, sensitive)
+        return ReplicatedRanking(
+            weights, order[members], sorted_labels[members], samples
+        )
+
+    def roc(self, scores, labels, sensitive=None) -> "ReplicatedRoc":
+        return self._replicated(
+            "replicate roc", self._roc, self.weights, scores, labels, sensitive
+        )
+
+    def _roc(self, weights, scores, labels, sensitive):
+        order = super().order(scores)
+        sorted_labels = self._memoized("sorted", _sorted, labels, order)
+        sorted_scores = self._memoized("sorted", _sorted, scores, order)
+        runs = self._memoized("runs", _runs, sorted_scores)
+        samples = self.confusion(scores, None, sensitive).samples
+        members, _ = self._group_members(order, sensitive)
+        return ReplicatedRoc(
+            weights, order[members], sorted_labels[members], runs[members], samples
+        )
+
+
+class ReplicatedRanking:
+    """
+    Top-k statistics of one group for all replicates, where each member is repeated as many times as
+    it is drawn. Members are given by their sample indexes in decreasing score order.
+    """
+
+    def __init__(self, weights, indexes, labels, samples):
+        self.weights = weights
+        self.indexes = indexes
+        self.labels = labels
+        self.samples = samples
+        self.tops = dict()
+        self.ap = np.zeros(weights.shape[0])
+        if indexes.shape[0]:
+            self.ap = _drawn(weights, indexes) @ labels
+
+    def top(self, k):
+        """Returns arrays of the hits and the number of members among the top-k members of each replicate."""
+        if k not in self.tops:
+            self.tops[k] = self._top(k)
+        return self.tops[k]
+
+    def _top(self, k):
+        if not self.indexes.shape[0]:
+            return np.zeros(self.weights.shape[0]), np.zeros(self.weights.shape[0])
+        drawn = _drawn(self.weights, self.indexes)
+        cumulative = np.cumsum(drawn, axis=1)
+        # how many of the draws of each member fall within the top-k
+        taken = np.clip(k - cumulative + drawn, 0, drawn)
+        return taken @ self.labels, np.minimum(k, cumulative[:, -1])
+
+
+class ReplicatedRoc:
+    """The area under the receiver operating characteristics curve of one group for all replicates."""
+
+    def __init__(self, weights, indexes, labels, runs, samples):
+        self.samples = samples
+        self.auc = np.full(weights.shape[0], np.nan)
+        if not indexes.shape[0]:
+            return
+        drawn = _drawn(weights, indexes)
+        # members with tied scores form runs, whose counts are summed at once
+        starts = np.flatnonzero(np.r_[True, runs[1:] != runs[:-1]])
+        positives = np.add.reduceat(drawn * (labels == 1), starts, axis=1)
+        negatives = np.add.reduceat(drawn, starts, axis=1) - positives
+        below = negatives.sum(axis=1)[:, np.newaxis] - np.cumsum(negatives, axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.auc = (positives * (below + 0.5 * negatives)).sum(axis=1) / (
+                positives.sum(axis=1) * negatives.sum(axis=1)
+            )
+
+    def curve(self):
+        # so reductions of curves, like maxbarea, get no intervals
+        raise NotComputable("Curves of bootstrap replicates are not computed")
+
+
+def _drawn(weights, indexes):
+    # the weights of the given samples as floats
+    return weights[:, indexes].astype(np.float64)
+
+
+def _numbers(value: Value, rows: int) -> dict:
+    # the numbers of a value under None and those of its dependencies under their aliases, where measures
+    # whose values do not depend on the weights yield the same number for all replicates
+    return {
+        name: np.broadcast_to(np.asarray(number.value.value, dtype=np.float64), rows)
+        for name, number in [(None, value)] + list(value.depends.items())
+        if isinstance(number.value, (Number, TargetedNumber))
+    }
+
+
+def _samples(sensitive: Sensitive) -> int:
+    if isinstance(sensitive.branches, Coded):
+        return sensitive.branches.codes.shape[0]
+    return next(iter(sensitive.branches.values())).shape[0]
+
+
+def _resamplable(measure) -> bool:
+    try:
+        return "statistics" in signature(measure).parameters
+    except TypeError:
+        return False
+
+
+def _replicate_sums(weights, columns, sensitive):
+    # only the weights of group members take part in the product
+    if sensitive is None:
+        return matrix_product(weights, columns)
+    mask = np.asarray(sensitive, dtype=np.float64)
+    members = np.flatnonzero(mask)
+    return matrix_product(weights[:, members], columns[members] * mask[members, None])
+
+
+def _replicate_histograms(weights, scores, sensitive, bins):
+    scores = np.asarray(scores, dtype=np.float64)
+    edges = np.histogram_bin_edges(scores[:0], bins=bins, range=(0, 1))
+    # bins are half-open except for the last one, like in np.histogram
+    valid = (scores >= 0) & (scores <= 1)
+    if sensitive is not None:
+        valid &= np.asarray(sensitive) == 1
+    members = np.flatnonzero(valid)
+    positions = np.searchsorted(edges, scores[members], side="right") - 1
+    positions = np.minimum(positions, edges.shape[0] - 2)
+    order = np.argsort(positions, kind="stable")
+    # the counts of each bin are differences of the cumulative weights of members sorted by bin
+    ends = np.searchsorted(
+        positions[order], np.arange(edges.shape[0] - 1), side="right"
+    )
+    cumulative = np.zeros((weights.shape[0], members.shape[0] + 1))
+    np.cumsum(weights[:, members[order]], axis=1, out=cumulative[:, 1:])
+    return np.diff(cumulative[:, np.r_[0, ends]], axis=1), edges
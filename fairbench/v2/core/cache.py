@@ -0,0 +1,215 @@
+from fairbench.v2.core.coded import Coded
+from fairbench.v2.core.values import Value, Number, TargetedNumber, Curve
+from collections import OrderedDict
+import numpy as np
+import threading
+import hashlib
+import os
+
+
+class Cache:
+    """
+    Retains the values that measures computed for groups, so that assessing the same data again,
+    for example with different reductions, reuses them instead of recomputing them. Values are
+    keyed by hashes of the contents of group masks and of measure inputs, alongside the measure's
+    descriptor and its other arguments. The least recently used values are evicted first.
+    Every retrieval creates new copies of values that can be modified without affecting the cache.
+    Values are retained as they are in memory, so that curves that are computed only when accessed
+    are not computed by caching them. On disk, entries are stored in the binary format of
+    `Value.to_bytes`, so that loading them never executes code. Pass instances as the `cache`
+    argument of reports.
+
+    Args:
+        maxsize: The maximum number of (group, measure) entries to keep in memory.
+        directory: Optionally, a directory in which to also store all entries, so that they persist
+            across sessions and are shared by processes.
+    """
+
+    def __init__(self, maxsize: int = 4096, directory: str | None = None):
+        assert maxsize >= 0, "The cache size cannot be negative"
+        self.maxsize = maxsize
+        self.directory = directory
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def inputs(self, sensitive, kwargs: dict) -> "Inputs":
+        """Hashes the inputs of one assessment, from which the keys of its entries are obtained."""
+        return Inputs(self, sensitive, kwargs)
+
+    def get(self, key: str):
+        """Returns new copies of the values of an entry, or None if it does not exist."""
+        with self._lock:
+            values = self.memory.get(key)
+            if values is not None:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return [_copy(value) for value in values]
+        if self.directory is not None:
+            try:
+                with open(self._path(key), "rb") as file:
+                    data = file.read()
+            except FileNotFoundError:
+                data = None
+            if data is not None:
+                values = _decode(data)
+                self._remember(key, [_copy(value) for value in values])
+                with self._lock:
+                    self.hits += 1
+                return values
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, values: list):
+        """Stores copies of the values of an entry."""
+        self._remember(key, [_copy(value) for value in values])
+        if self.directory is not None:
+            data = _encode(values)
+            # write to a temporary file first, so that readers never see partial entries
+            path = self._path(key)
+            temporary = f"{path}.{os.getpid()}.{threading.get_ident()}"
+            with open(temporary, "wb") as file:
+                file.write(data)
+            os.replace(temporary, path)
+
+    def clear(self):
+        """Removes all entries from memory. On-disk entries are retained."""
+        with self._lock:
+            self.memory.clear()
+
+    def _remember(self, key, values):
+        with self._lock:
+            self.memory[key] = values
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.maxsize:
+                self.memory.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".fbcache")
+
+    def __getstate__(self):
+        # copies in other processes start with empty memory and share only the on-disk entries
+        return {"maxsize": self.maxsize, "directory": self.directory}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+
+class Inputs:
+    """The content hashes of the group masks and keyword arguments of one assessment."""
+
+    def __init__(self, cache: Cache, sensitive, kwargs: dict):
+        self.cache = cache
+        self.arguments = {
+            name: digest(arg) for name, arg in kwargs.items() if name != "statistics"
+        }
+        self.codes = None
+        if isinstance(sensitive.branches, Coded):
+            self.codes = digest(sensitive.branches.codes)
+            self.index = sensitive.branches.index
+            self.everyone = sensitive.branches.everyone
+        self.groups = dict()
+
+    def group(self, key: str, mask) -> str:
+        """Returns the content hash of a group's mask, which is computed only once."""
+        if key not in self.groups:
+            if self.codes is None:
+                self.groups[key] = digest(mask)
+            elif key == self.everyone:
+                self.groups[key] = digest([self.codes, "everyone"])
+            else:
+                # coded masks are determined by the codes and the group's position
+                self.groups[key] = digest([self.codes, str(self.index[key])])
+        return self.groups[key]
+
+    def key(self, measure, group: str, names) -> str:
+        """Returns the key of a measure's values for a group, given the names of the arguments it accepts."""
+        descriptor = getattr(measure, "descriptor", None)
+        identity = [
+            getattr(measure, "__module__", ""),
+            getattr(measure, "__qualname__", repr(measure)),
+            "" if descriptor is None else repr(descriptor),
+            group,
+        ]
+        for name in sorted(names):
+            if name in self.arguments:
+                identity.append(name)
+                identity.append(self.arguments[name])
+        return digest(identity)
+
+
+def _copy(value: Value) -> Value:
+    # copies the numbers and dependencies of values, and leaves curves that are not yet computed deferred
+    number = value.value
+    if isinstance(number, TargetedNumber):
+        number = TargetedNumber(number.value, number.target, number.units)
+    elif isinstance(number, Number):
+        number = Number(number.value, number.units)
+    elif isinstance(number, Curve):
+        if number._points is not None:
+            number = Curve.deferred(number._points, number.units)
+        else:
+            number = Curve(number.x, number.y, number.units)
+    return Value(
+        number, value.descriptor, [_copy(dep) for dep in value.depends.values()]
+    )
+
+
+def _encode(values: list) -> bytes:
+    # the serialized values of an entry, each preceded by its length
+    parts = list()
+    for value in values:
+        data = value.to_bytes()
+        parts.append(len(data).to_bytes(8, "little"))
+        parts.append(data)
+    return b"".join(parts)
+
+
+def _decode(data: bytes) -> list:
+    values = list()
+    start = 0
+    while start < len(data):
+        length = int.from_bytes(data[start : start + 8], "little")
+        start += 8
+        values.append(Value.from_bytes(data[start : start + length]))
+        start += length
+    return values
+
+
+def digest(value) -> str:
+    """Returns a hash of a value's contents. Arrays are hashed based on their type, shape, and data."""
+    hasher = hashlib.blake2b(digest_size=16)
+    _update(hasher, value)
+    return hasher.hexdigest()
+
+
+def _update(hasher, value):
+    if isinstance(value, dict):
+        hasher.update(b"dict")
+        for key, item in value.items():
+            _update(hasher, key)
+            _update(hasher, item)
+        return
+    if isinstance(value, (list, tuple)) and any(
+        isinstance(item, (str, list, tuple, dict)) for item in value
+    ):
+        hasher.update(b"list")
+        for item in value:
+            _update(hasher, item)
+        return
+    if hasattr(value, "raw"):
+        value = value.raw
+    if hasattr(value, "detach"):
+        value = value.detach().cpu().numpy()
+    if isinstance(value, (list, tuple)) or hasattr(value, "__array__"):
+        array = np.ascontiguousarray(np.asarray(value))
+        if array.dtype != object:
+            hasher.update(f"array {array.dtype.str} {array.shape}".encode())
+            hasher.update(array.data)
+            return
+        value = array.tolist()
+    hasher.update(f"{type(value).__name__} {value!r}".encode())
@@ -0,0 +1,72 @@
+from fairbench.v1.core.categorical import factorize
+from collections.abc import Mapping
+import numpy as np
+import weakref
+
+
+class Coded(Mapping):
+    """
+    Integer-coded groups of a categorical sensitive attribute. Instead of one mask per group, this holds
+    one int32 code per sample and a table of group names. It can be used wherever a dict of group masks
+    is expected; masks are then materialized only when accessed, one at a time. Statistics of all groups
+    are aggregated from the codes directly.
+
+    Args:
+        values: The categorical values of samples. These are factorized into codes, unless `names` is provided.
+        names: The names of groups. If provided, `values` should be integer codes that index these names,
+            and -1 for samples that belong to no group.
+        everyone: If provided, a group of this name that contains all samples is added last.
+    """
+
+    def __init__(self, values, names=None, everyone: str | None = None):
+        if names is None:
+            names, codes = factorize(values)
+            names = [str(name) for name in names]
+        else:
+            codes = np.asarray(values, dtype=np.int32)
+        self.codes = codes
+        self.names = list(names)
+        self.everyone = everyone
+        self.index = {name: row for row, name in enumerate(self.names)}
+        if everyone is not None:
+            assert (
+                everyone not in self.index
+            ), f"Group '{everyone}' already exists in the coded sensitive attribute"
+            self.index[everyone] = len(self.names)
+        self._last = (None, None)
+        self._rows = dict()
+
+    def including(self, everyone: str) -> "Coded":
+        """Returns the same groups, sharing their codes, and an additional group of all samples."""
+        return Coded(self.codes, self.names, everyone)
+
+    def row(self, mask):
+        """Returns the group position of a mask obtained from this object, or None for other masks."""
+        reference, row = self._rows.get(id(mask), (None, None))
+        if reference is None or reference() is not mask:
+            return None
+        return row
+
+    def __getitem__(self, name):
+        row = self.index[name]
+        last_row, mask = self._last
+        if row == last_row:
+            return mask
+        if row == len(self.names):
+            mask = np.ones(self.codes.shape[0], dtype=np.int64)
+        else:
+            mask = (self.codes == row).astype(np.int64)
+        # only the last accessed mask is retained, and the rows of masks are tracked while they are alive
+        key = id(mask)
+        self._rows[key] = (weakref.ref(mask, lambda _: self._rows.pop(key, None)), row)
+        self._last = (row, mask)
+        return mask
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self):
+        return len(self.index)
@@ -1,5 +1,7 @@
 from typing import Iterable
+from collections import OrderedDict
 from makefun import wraps
+import numpy as np
 from fairbench.v2.core import (
     Descriptor,
     Value,
@@ -7,6 +9,7 @@ from fairbench.v2.core import (
     TargetedNumber,
     NotComputable,
 )
+from fairbench.v2.core.sensitive import signature
 
 
 def measure(description, unit=True, debug=False):
@@ -36,9 +39,9 @@ def measure(description, unit=True, debug=False):
                 or isinstance(value.value, float)
                 or isinstance(value.value, int)
             ), f"{descriptor} computed {type(value.value)} instead of float, int, Number, or TargetedNumber"
-            assert not unit or (
-                0 <= float(value) <= 1
-            ), f"{descriptor} computed {float(value)} that is not in [0,1]"
+            assert not unit or _in_unit(
+                value.value
+            ), f"{descriptor} computed {_number(value.value)} that is not in [0,1]"
             if isinstance(value.value, Number) or isinstance(
                 value.value, TargetedNumber
             ):
@@ -52,16 +55,44 @@ def measure(description, unit=True, debug=False):
     return strategy
 
 
-def reduction(description, autounits=True):
+def _number(number):
+    return number.value if isinstance(number, (Number, TargetedNumber)) else number
+
+
+def _in_unit(number) -> bool:
+    number = _number(number)
+    if not isinstance(number, np.ndarray):
+        return 0 <= float(number) <= 1
+    # measures evaluated on arrays of statistics yield nan where they cannot be computed
+    return bool(np.all(np.isnan(number) | ((number >= 0) & (number <= 1))))
+
+
+def reduction(description, autounits=True, requires=None, kernel=None):
     """
     Reduction mechanisms take as input an iterable of values.
     Each of those values if flattened to a list of number values.
     A wrapped method runs to aggregate the list of numbers into one number.
     The resulting numbers are all packed as the dependencies of one big value.
+
+    Args:
+        requires: Optionally, what all flattened values should have for the reduction to be computable. This
+            is either a role that their dependencies should have (e.g., "curve"), or the type of their numbers
+            (e.g., TargetedNumber). Compiled report plans use this to skip reductions of measures that lack it.
+        kernel: Optionally, a vectorized equivalent of the wrapped method that reduces many lists of numbers
+            at once. It takes a (lists x numbers) matrix of values and a same-shaped matrix of their targets,
+            which are nan for numbers without targets, and returns an array of results, an array of their
+            targets (nan for no target), and a boolean array of which results are computable. Any further
+            arguments of the kernel receive same-shaped matrices of the numbers of the dependencies with
+            those aliases, such as `samples`. When there are no keyword arguments, all flattened values of
+            the same length that consist only of numbers, and have such dependencies, are reduced with one
+            call to the kernel, and the wrapped method handles the rest.
     """
 
     def strategy(func):
         descriptor = Descriptor(func.__name__, "reduction", description)
+        # descriptors of reduced values are interned, so that all reports share them, and the
+        # least recently used ones are evicted first
+        interned = OrderedDict()
 
         @wraps(func)
         def wrapper(values: Iterable[Value] | Value, **kwargs) -> Value:
@@ -80,9 +111,8 @@ def reduction(description, autounits=True):
                 prepend_alias = ""
                 postpend_details = ""
             values = list(values)
-            ret = list()
+            prepared = list()
             for arg in values:
-                dependencies = list(arg.depends.values())
                 flattened_arg = arg.flatten(to_float=False)
 
                 # TODO: there is a good chance that we may want to check for the same roles too
@@ -98,26 +128,49 @@ def reduction(description, autounits=True):
                 )
 
                 # set descriptor
-                descriptors = Descriptor(
-                    descriptor.name + " " + arg.descriptor.name,
-                    descriptor.role + " " + arg.descriptor.role,
-                    descriptor.details + " of " + arg.descriptor.details,
-                    arg.descriptor.alias,
-                    prototype=arg.descriptor,
-                    preferred_units=(
-                        func.__name__ + " " + str(next(units.__iter__()))
-                        if autounits and units
-                        else None
-                    ),
+                preferred_units = (
+                    func.__name__ + " " + str(next(units.__iter__()))
+                    if autounits and units
+                    else None
                 )
-
-                try:
-                    value = func(flattened_arg, **kwargs)
-                except NotComputable:
-                    continue
+                key = (id(arg.descriptor), preferred_units)
+                prototype, descriptors = interned.get(key, (None, None))
+                if prototype is arg.descriptor:
+                    interned.move_to_end(key)
+                else:
+                    descriptors = Descriptor(
+                        descriptor.name + " " + arg.descriptor.name,
+                        descriptor.role + " " + arg.descriptor.role,
+                        (descriptor, " of ", arg.descriptor),
+                        arg.descriptor.alias,
+                        prototype=arg.descriptor,
+                        preferred_units=preferred_units,
+                    )
+                    interned[key] = (arg.descriptor, descriptors)
+                    interned.move_to_end(key)
+                    if len(interned) > 1024:
+                        interned.popitem(last=False)
+                prepared.append((arg, flattened_arg, descriptors))
+
+            batched = (
+                _batched(kernel, [flattened_arg for _, flattened_arg, _ in prepared])
+                if kernel is not None and not kwargs
+                else dict()
+            )
+            ret = list()
+            for i, (arg, flattened_arg, descriptors) in enumerate(prepared):
+                if i in batched:
+                    value = batched[i]
+                    if value is None:
+                        continue
+                else:
+                    try:
+                        value = func(flattened_arg, **kwargs)
+                    except NotComputable:
+                        continue
                 if not isinstance(value, TargetedNumber):
                     value = Number(value, units=descriptors.preferred_units)
-                ret.append(descriptors(value, dependencies))
+                ret.append(descriptors(value, list(arg.depends.values())))
             return Descriptor(
                 name=prepend_name + descriptor.name,
                 alias=prepend_alias + descriptor.alias,
@@ -126,6 +179,68 @@ def reduction(description, autounits=True):
             )(depends=ret)
 
         wrapper.descriptor = descriptor
+        wrapper.requires = requires
+        wrapper.kernel = kernel
         return wrapper
 
     return strategy
+
+
+def _batched(kernel, flattened: list[list[Value]]) -> dict:
+    """
+    Applies a reduction kernel to all lists of values that hold only numbers, with one call for each list length.
+    Returns the results for the positions of those lists, where None marks results that are not computable.
+    """
+    names = kernel_dependencies(kernel)
+    positions = dict()
+    for i, values in enumerate(flattened):
+        if values and all(
+            _numeric(value) and all(_numeric(value.depends.get(name)) for name in names)
+            for value in values
+        ):
+            positions.setdefault(len(values), list()).append(i)
+    ret = dict()
+    for rows in positions.values():
+        numbers = [[value.value for value in flattened[i]] for i in rows]
+        depends = {
+            name: np.array(
+                [
+                    [value.depends[name].value.value for value in flattened[i]]
+                    for i in rows
+                ],
+                dtype=np.float64,
+            )
+            for name in names
+        }
+        results, targets, computable = kernel(
+            np.array([[number.value for number in row] for row in numbers]),
+            np.array(
+                [
+                    [
+                        number.target if isinstance(number, TargetedNumber) else np.nan
+                        for number in row
+                    ]
+                    for row in numbers
+                ]
+            ),
+            **depends,
+        )
+        for i, result, target, valid in zip(
+            rows, results.tolist(), targets.tolist(), computable.tolist()
+        ):
+            if not valid:
+                ret[i] = None
+            elif np.isnan(target):
+                ret[i] = result
+            else:
+                ret[i] = TargetedNumber(result, target)
+    return ret
+
+
+def kernel_dependencies(kernel) -> tuple:
+    """The aliases of the dependencies whose numbers a reduction kernel takes after values and targets."""
+    return tuple(signature(kernel).parameters)[2:]
+
+
+def _numeric(value) -> bool:
+    return value is not None and isinstance(value.value, (Number, TargetedNumber))
@@ -0,0 +1,241 @@
+from fairbench.v2.core.statistics import Statistics
+from fairbench.v2.core.coded import Coded
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+
+executors = [None, "serial", "threads", "processes"]
+
+
+class Shared:
+    """
+    A numpy array copied to shared memory. It pickles into a reference to that memory, so that worker
+    processes attach to the array instead of receiving a copy.
+    """
+
+    def __init__(self, array: np.ndarray):
+        self.shape = array.shape
+        self.dtype = array.dtype.str
+        self.memory = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        self.name = self.memory.name
+        self.attach()[...] = array
+
+    def attach(self) -> np.ndarray:
+        return np.ndarray(self.shape, np.dtype(self.dtype), buffer=self.memory.buf)
+
+    def release(self):
+        self.memory.close()
+        self.memory.unlink()
+
+    def __getstate__(self):
+        return {"shape": self.shape, "dtype": self.dtype, "name": self.name}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.memory = shared_memory.SharedMemory(name=self.name)
+
+
+class SharedCoded:
+    """The codes of a `Coded` attribute in shared memory, alongside its group names."""
+
+    def __init__(self, coded: Coded, shared: dict):
+        self.codes = _share(coded.codes, shared)
+        self.names = coded.names
+        self.everyone = coded.everyone
+
+
+def in_processes(executor) -> bool:
+    """Whether the executor argument evaluates computations in other processes."""
+    return executor == "processes" or isinstance(executor, ProcessPoolExecutor)
+
+
+def executor_pool(executor):
+    """Returns a pool for the given executor argument and whether it was created here and should thus be shut down."""
+    if isinstance(executor, Executor):
+        return executor, False
+    if executor == "threads":
+        return ThreadPoolExecutor(), True
+    return ProcessPoolExecutor(), True
+
+
+def assess(sensitive, measures, executor, kwargs, inputs=None):
+    """
+    Assesses all groups of a sensitive attribute concurrently, returning their values in the order of groups.
+    Threads share the sufficient statistics of groups. Processes receive contiguous chunks of groups,
+    attach to the group masks and to the array inputs in shared memory, and compute the statistics of
+    their chunk only. If the hashed inputs of a cached assessment are provided, processes share only the
+    on-disk entries of its cache.
+    """
+    assert (
+        isinstance(executor, Executor) or executor in executors
+    ), "The executor can only be None, 'serial', 'threads', 'processes', or a concurrent.futures.Executor"
+    keys = list(sensitive.branches)
+    pool, owned = executor_pool(executor)
+    try:
+        if not isinstance(pool, ProcessPoolExecutor):
+            kwargs = {"statistics": Statistics(sensitive)} | kwargs
+            return list(
+                pool.map(
+                    lambda key: sensitive.group_assessment(
+                        key, measures, kwargs, inputs
+                    ),
+                    keys,
+                )
+            )
+        assert (
+            "statistics" not in kwargs
+        ), "Statistics cannot be shared across processes"
+        workers = getattr(pool, "_max_workers", 1)
+        bounds = np.linspace(0, len(keys), min(len(keys), workers * 4) + 1)
+        bounds = bounds.astype(int)
+        chunks = [keys[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+        shared = dict()
+        try:
+            shared_kwargs = {name: _share(arg, shared) for name, arg in kwargs.items()}
+            if isinstance(sensitive.branches, Coded):
+                state = [_share(sensitive.branches, shared)] * len(chunks)
+            else:
+                state = [
+                    {key: _share(sensitive.branches[key], shared) for key in chunk}
+                    for chunk in chunks
+                ]
+            futures = [
+                pool.submit(
+                    _assess_chunk,
+                    branches,
+                    {key: sensitive.descriptors[key] for key in chunk},
+                    sensitive.descriptor,
+                    sensitive.vectorized,
+                    chunk,
+                    measures,
+                    shared_kwargs,
+                    inputs,
+                )
+                for branches, chunk in zip(state, chunks)
+            ]
+            return [value for future in futures for value in future.result()]
+        finally:
+            for array in shared.values():
+                array.release()
+    finally:
+        if owned:
+            pool.shutdown()
+
+
+def reports(report, tasks, executor, **kwargs):
+    """
+    Computes reports concurrently, one for each (sensitive attribute, keyword arguments) task, and returns them
+    in the order of tasks. In process pools, arrays used by several tasks, such as group masks and labels,
+    are placed in shared memory once and attached to by all of them.
+    """
+    assert (
+        isinstance(executor, Executor) or executor in executors
+    ), "The executor can only be None, 'serial', 'threads', 'processes', or a concurrent.futures.Executor"
+    pool, owned = executor_pool(executor)
+    try:
+        if not isinstance(pool, ProcessPoolExecutor):
+            return list(
+                pool.map(
+                    lambda task: report(sensitive=task[0], **kwargs, **task[1]), tasks
+                )
+            )
+        shared = dict()
+        try:
+            futures = [
+                pool.submit(
+                    _report_task,
+                    report,
+                    _share(sensitive.branches, shared),
+                    sensitive.descriptors,
+                    sensitive.descriptor,
+                    sensitive.vectorized,
+                    _share(kwargs | task_kwargs, shared),
+                )
+                for sensitive, task_kwargs in tasks
+            ]
+            return [future.result() for future in futures]
+        finally:
+            for array in shared.values():
+                array.release()
+    finally:
+        if owned:
+            pool.shutdown()
+
+
+def _share(value, shared: dict):
+    # arrays are shared once, even if they appear in several places
+    if isinstance(value, np.ndarray) and value.dtype != object:
+        if id(value) not in shared:
+            shared[id(value)] = Shared(value)
+        return shared[id(value)]
+    if isinstance(value, Coded):
+        return SharedCoded(value, shared)
+    if isinstance(value, dict):
+        return {key: _share(arg, shared) for key, arg in value.items()}
+    return value
+
+
+def _attach(value, attached: list):
+    if isinstance(value, Shared):
+        attached.append(value)
+        return value.attach()
+    if isinstance(value, SharedCoded):
+        return Coded(_attach(value.codes, attached), value.names, value.everyone)
+    if isinstance(value, dict):
+        return {key: _attach(arg, attached) for key, arg in value.items()}
+    return value
+
+
+def _assess_chunk(
+    branches, descriptors, descriptor, vectorized, keys, measures, kwargs, inputs
+):
+    attached = list()
+    try:
+        return _assess_attached(
+            _attach(branches, attached),
+            descriptors,
+            descriptor,
+            vectorized,
+            keys,
+            measures,
+            _attach(kwargs, attached),
+            inputs,
+        )
+    finally:
+        _close(attached)
+
+
+def _report_task(report, branches, descriptors, descriptor, vectorized, kwargs):
+    attached = list()
+    try:
+        sensitive = _sensitive(
+            _attach(branches, attached), descriptors, descriptor, vectorized
+        )
+        return report(sensitive=sensitive, **_attach(kwargs, attached))
+    finally:
+        _close(attached)
+
+
+def _sensitive(branches, descriptors, descriptor, vectorized):
+    from fairbench.v2.core.sensitive import Sensitive
+
+    sensitive = Sensitive(dict(), descriptor, vectorized)
+    sensitive.descriptors = descriptors
+    sensitive.branches = branches
+    return sensitive
+
+
+def _close(attached):
+    for array in attached:
+        try:
+            array.memory.close()
+        except BufferError:  # pragma: no cover
+            pass  # still referenced, so it is closed when garbage collected
+
+
+def _assess_attached(
+    branches, descriptors, descriptor, vectorized, keys, measures, kwargs, inputs
+):
+    sensitive = _sensitive(branches, descriptors, descriptor, vectorized)
+    kwargs = {"statistics": Statistics(sensitive)} | kwargs
+    return [sensitive.group_assessment(key, measures, kwargs, inputs) for key in keys]
@@ -1,6 +1,217 @@
-from fairbench.v2.core import Sensitive, DataError, NotComputable, Descriptor
+from fairbench.v2.core import Sensitive, DataError, NotComputable, Descriptor, Coded
+from fairbench.v2.core import Statistics, Value, Bootstrap
+from fairbench.v2.core import parallel
+from fairbench.v2.core.sensitive import signature
 from fairbench.v1 import core as deprecated
 from typing import Iterable
+import inspect
+
+
+class Plan:
+    """
+    Measures and reductions compiled into a report that can be computed for fresh data many times.
+    Measure signatures are resolved once, and the measures that apply to each set of input names are
+    found once. All measures and all branches of one computation share the sufficient statistics of
+    groups, so that intermediate quantities like confusion counts are computed once for all measures
+    that need them. Reductions that cannot apply to a measure, such as the area between curves of a
+    measure without curves, are pruned the first time that measure is reduced.
+
+    Pass `bootstrap=N` when calling a plan to attach the lower and upper bounds of 95% confidence
+    intervals, estimated from N bootstrap replicates of the data, to the values of measures for each group
+    and to the values of reductions that have vectorized kernels. Pass a `Bootstrap` instead to set the
+    confidence level and seed.
+
+    Args:
+        measures: The measures to compute for each group.
+        reductions: The reductions that summarize the values of all groups for each measure.
+    """
+
+    def __init__(self, measures: Iterable, reductions: Iterable):
+        self.measures = list(measures)
+        self.reductions = list(reductions)
+        self.required = [_required(measure) for measure in self.measures]
+        self._applicable = dict()
+        self._pruned = dict()
+
+    def applicable(self, names: Iterable[str]) -> list:
+        """Returns the measures whose required arguments are among the given input names."""
+        names = frozenset(names) | {"sensitive"}
+        if names not in self._applicable:
+            self._applicable[names] = [
+                measure
+                for measure, required in zip(self.measures, self.required)
+                if required <= names
+            ]
+        return self._applicable[names]
+
+    def reducible(self, reduction, results: Value) -> list:
+        """Returns the measures of assessment results that the reduction can possibly be computed for."""
+        requires = getattr(reduction, "requires", None)
+        measures = results.keys("measure")
+        if requires is None:
+            return measures
+        ret = list()
+        for measure in measures:
+            key = (reduction, measure.alias)
+            if key not in self._pruned:
+                self._pruned[key] = not all(
+                    _satisfies(value, requires)
+                    for value in (results | measure).flatten()
+                )
+            if not self._pruned[key]:
+                ret.append(measure)
+        return ret
+
+    def __call__(
+        self,
+        sensitive: Sensitive | deprecated.Fork,
+        attach_branches_to_measures: bool = False,
+        vectorized: bool | str | None = None,
+        executor=None,
+        cache=None,
+        bootstrap: int | Bootstrap | None = None,
+        **kwargs,
+    ) -> Value:
+        # the same bootstrap is shared by all branches, so that they are resampled with the same weights
+        if bootstrap is not None and not isinstance(bootstrap, Bootstrap):
+            bootstrap = Bootstrap(bootstrap)
+
+        # prepare the sensitive attribute
+        if isinstance(sensitive, Coded):
+            sensitive = Sensitive(
+                sensitive, vectorized=False if vectorized is None else vectorized
+            )
+        if isinstance(sensitive, dict):
+            sensitive = deprecated.Fork(sensitive)
+        if isinstance(sensitive, deprecated.Fork):
+            sensitive = Sensitive(
+                {k: v.numpy() for k, v in sensitive.branches().items()},
+                vectorized=False if vectorized is None else vectorized,
+            )
+        assert isinstance(
+            sensitive, Sensitive
+        ), "The sensitive attribute can only be a dict, Sensitive, Coded, or Fork. For example, provide `fb.categories@iterable`."
+        if vectorized is not None and vectorized != sensitive.vectorized:
+            sensitive = Sensitive(sensitive.branches, sensitive.descriptor, vectorized)
+
+        # convert forks to dicts
+        kwargs = {
+            name: deprecated.Fork(arg) if isinstance(arg, dict) else arg
+            for name, arg in kwargs.items()
+        }
+        kwargs = {
+            name: (
+                {k: v.raw for k, v in arg.branches().items()}
+                if isinstance(arg, deprecated.Fork)
+                else arg
+            )
+            for name, arg in kwargs.items()
+        }
+
+        # all measures and branches share sufficient statistics, which cannot be shared across processes
+        statistics = kwargs.get("statistics")
+        if statistics is None and not parallel.in_processes(executor):
+            statistics = kwargs["statistics"] = Statistics(sensitive)
+
+        # split (models x samples) inputs into one branch per model, whose statistics are computed together
+        batched = [
+            name
+            for name in ["predictions", "scores"]
+            if getattr(kwargs.get(name), "ndim", 1) == 2
+        ]
+        if batched and statistics is None:
+            statistics = Statistics(sensitive)
+        for name in batched:
+            kwargs[name] = {
+                f"model{i}": row for i, row in enumerate(statistics.batch(kwargs[name]))
+            }
+
+        # branches are gathered in order of appearance, so that sub-reports have a deterministic order
+        gathered_branches = dict.fromkeys(
+            branch_name
+            for arg in kwargs.values()
+            if isinstance(arg, dict)
+            for branch_name in arg
+            if branch_name not in sensitive.branches
+        )
+        if gathered_branches and not attach_branches_to_measures:
+            # make the computations for each branch combination
+            tasks = list()
+            for branch_name in gathered_branches:
+                branch_sensitive = sensitive.rename(
+                    Descriptor(
+                        name=branch_name,
+                        alias=branch_name,
+                        role="branch",
+                        details=f"branch {branch_name}",
+                    )
+                )
+                # for the branch name, specialize each kwarg if the latter is a fork with that value
+                branch_kwargs = dict()
+                specialized_keys = list()
+                for k, v in kwargs.items():
+                    if isinstance(v, dict):
+                        assert branch_name in v, (
+                            f"Analysis argument '{k}' is missing branch '{branch_name}' that is present "
+                            f"in at least one other input argument passed to the report "
+                            "(the conflict is only between Fork inputs with multiple values). Consider "
+                            "creating two reports, pruning branches of other values, or adding such a branch."
+                        )
+                        branch_kwargs[k] = v[branch_name]
+                        specialized_keys.append(k)
+                    else:
+                        branch_kwargs[k] = v
+                tasks.append((branch_sensitive, branch_kwargs))
+            if executor is None or executor == "serial" or len(tasks) == 1:
+                branch_reports = [
+                    self(
+                        sensitive=branch_sensitive,
+                        executor=executor,
+                        cache=cache,
+                        bootstrap=bootstrap,
+                        **branch_kwargs,
+                    )
+                    for branch_sensitive, branch_kwargs in tasks
+                ]
+            else:
+                # independent sub-reports run concurrently, each evaluating its groups serially
+                branch_reports = parallel.reports(
+                    self, tasks, executor, cache=cache, bootstrap=bootstrap
+                )
+            return sensitive.descriptor(depends=branch_reports)
+
+        # make the actual computation
+        try:
+            measures = self.applicable(kwargs)
+            results = sensitive.assessment(
+                measures, executor=executor, cache=cache, **kwargs
+            )
+            replicates = None
+            if bootstrap is not None:
+                # measures are evaluated once for all replicates, without caching
+                replicates = bootstrap.replicate(sensitive, measures, kwargs)
+                results = replicates.assessment(results)
+            reduction_results = list()
+            for reduction in self.reductions:
+                try:
+                    value = reduction(
+                        results | measure
+                        for measure in self.reducible(reduction, results)
+                    )
+                    if replicates is not None:
+                        value = replicates.reduction(reduction, value, results)
+                    reduction_results.append(value)
+                except NotComputable:
+                    pass
+            return sensitive.descriptor(depends=reduction_results)
+        except DataError as e:
+            raise DataError(str(e)) from None
+        except AssertionError as e:
+            raise ValueError(str(e)) from None
+        except ValueError as e:
+            raise ValueError(str(e)) from None
+        except TypeError as e:
+            raise ValueError(str(e)) from None
 
 
 def report(
@@ -8,93 +219,35 @@ def report(
     measures: Iterable,
     reductions: Iterable,
     attach_branches_to_measures: bool = False,
+    vectorized: bool | str | None = None,
+    executor=None,
+    cache=None,
+    bootstrap: int | Bootstrap | None = None,
     **kwargs,
 ):
-    # prepare the sensitive attribute
-    if isinstance(sensitive, dict):
-        sensitive = deprecated.Fork(sensitive)
-    if isinstance(sensitive, deprecated.Fork):
-        sensitive = Sensitive({k: v.numpy() for k, v in sensitive.branches().items()})
-    assert isinstance(
-        sensitive, Sensitive
-    ), "The sensitive attribute can only be a dict, Sensitive, or Fork. For example, provide `fb.categories@iterable`."
-
-    # convert forks to dicts
-    kwargs = {
-        name: deprecated.Fork(arg) if isinstance(arg, dict) else arg
-        for name, arg in kwargs.items()
-    }
-    kwargs = {
-        name: (
-            {k: v.raw for k, v in arg.branches().items()}
-            if isinstance(arg, deprecated.Fork)
-            else arg
-        )
-        for name, arg in kwargs.items()
-    }
-
-    gathered_branches = {
-        branch_name
-        for arg in kwargs.values()
-        if isinstance(arg, dict)
-        for branch_name in arg
-        if branch_name not in sensitive.branches
-    }
-    if gathered_branches and not attach_branches_to_measures:
-        # make the computations for each branch combination
-        branch_reports = list()
-        for branch_name in gathered_branches:
-            branch_sensitive = Sensitive(
-                sensitive.branches,
-                Descriptor(
-                    name=branch_name,
-                    alias=branch_name,
-                    role="branch",
-                    details=f"branch {branch_name}",
-                ),
-            )
-            # for the branch name, specialize each kwarg if the latter is a fork with that value
-            branch_kwargs = dict()
-            specialized_keys = list()
-            for k, v in kwargs.items():
-                if isinstance(v, dict):
-                    assert branch_name in v, (
-                        f"Analysis argument '{k}' is missing branch '{branch_name}' that is present "
-                        f"in at least one other input argument passed to the report "
-                        "(the conflict is only between Fork inputs with multiple values). Consider "
-                        "creating two reports, pruning branches of other values, or adding such a branch."
-                    )
-                    branch_kwargs[k] = v[branch_name]
-                    specialized_keys.append(k)
-                else:
-                    branch_kwargs[k] = v
-            branch_report = report(
-                sensitive=branch_sensitive,
-                measures=measures,
-                reductions=reductions,
-                **branch_kwargs,
-            )
-            branch_reports.append(branch_report)
-        return sensitive.descriptor(depends=branch_reports)
-
-    # make the actual computation
-    try:
-        results = sensitive.assessment(measures, **kwargs)
-        reduction_results = list()
-        for reduction in reductions:
-            try:
-                value = reduction(
-                    results | measure for measure in results.keys("measure")
-                )
-                reduction_results.append(value)
-            except NotComputable:
-                pass
-        return sensitive.descriptor(depends=reduction_results)
-    except DataError as e:
-        raise DataError(str(e)) from None
-    except AssertionError as e:
-        raise ValueError(str(e)) from None
-    except ValueError as e:
-        raise ValueError(str(e)) from None
-    except TypeError as e:
-        raise ValueError(str(e)) from None
+    return Plan(measures, reductions)(
+        sensitive,
+        attach_branches_to_measures=attach_branches_to_measures,
+        vectorized=vectorized,
+        executor=executor,
+        cache=cache,
+        bootstrap=bootstrap,
+        **kwargs,
+    )
+
+
+def _required(measure) -> frozenset:
+    # the arguments without defaults, without which calling the measure raises a TypeError
+    return frozenset(
+        name
+        for name, parameter in signature(measure).parameters.items()
+        if parameter.default is inspect.Parameter.empty
+        and parameter.kind
+        not in (inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD)
+    )
+
+
+def _satisfies(value: Value, requires) -> bool:
+    if isinstance(requires, str):
+        return bool(value.values(requires))
+    return isinstance(value.value, requires)
@@ -1,6 +1,9 @@
-from fairbench.v2.core import Descriptor
+from fairbench.v2.core import Descriptor, Statistics, Coded
+from fairbench.v2.core import Value, Number, TargetedNumber
+from fairbench.v2.core import parallel
 import numpy as np
 import inspect
+import weakref
 
 
 class NotComputable(Exception):
@@ -19,15 +22,85 @@ multidimensional = Descriptor(
     "multidim", "analysis", "analysis that compares several groups"
 )
 
+_signatures = weakref.WeakKeyDictionary()
+
+
+def signature(measure) -> inspect.Signature:
+    """Returns the signature of a measure, which is resolved only the first time it is needed."""
+    try:
+        if measure not in _signatures:
+            _signatures[measure] = inspect.signature(measure)
+        return _signatures[measure]
+    except TypeError:  # measures that cannot be weakly referenced
+        return inspect.signature(measure)
+
 
 class Sensitive:
-    def __init__(self, branches, multidimensional=multidimensional):
+    """
+    Holds the group masks of a sensitive attribute.
+
+    Args:
+        branches: A dict from group names to their masks, or a `Coded` attribute whose masks are
+            materialized only when accessed.
+        multidimensional: The descriptor of analysis over all groups.
+        vectorized: Whether group statistics should be computed all at once from a (groups x samples)
+            mask matrix instead of group-by-group. Set to "sparse" to store that matrix in sparse
+            format, which requires scipy. Measures that accept a `statistics` argument are then also
+            evaluated once for all groups, on arrays of their statistics. Such measures should thus
+            access group data only through those statistics.
+    """
+
+    def __init__(
+        self,
+        branches,
+        multidimensional=multidimensional,
+        vectorized: bool | str = False,
+    ):
         self.descriptors = {
             key: Descriptor(key, "group", "the value for group '" + key + "'")
             for key in branches
         }
-        self.branches = {key: np.array(value) for key, value in branches.items()}
+        if isinstance(branches, Coded):
+            self.branches = branches
+        else:
+            self.branches = {key: np.array(value) for key, value in branches.items()}
         self.descriptor = multidimensional
+        assert vectorized in [
+            True,
+            False,
+            "sparse",
+        ], "Sensitive attributes can only be vectorized with True, False, or 'sparse'"
+        self.vectorized = vectorized
+        self._matrix = None
+
+    @property
+    def matrix(self):
+        """The (groups x samples) matrix of group masks, in the order of branches. Binary masks are stored as booleans."""
+        if self._matrix is None:
+            masks = list(self.branches.values())
+            matrix = np.stack(masks) if masks else np.zeros((0, 0))
+            if np.all((matrix == 0) | (matrix == 1)):
+                matrix = matrix.astype(bool)
+            else:
+                matrix = matrix.astype(np.float64)
+            if self.vectorized == "sparse":
+                try:
+                    from scipy.sparse import csr_matrix
+                except ModuleNotFoundError:
+                    raise ModuleNotFoundError(
+                        "Sparse sensitive attributes require scipy. Install it with `pip install scipy`."
+                    )
+                matrix = csr_matrix(matrix, dtype=np.float64)
+            self._matrix = matrix
+        return self._matrix
+
+    def rename(self, descriptor: Descriptor) -> "Sensitive":
+        """Returns the same groups under a different analysis descriptor, sharing their masks."""
+        ret = Sensitive(dict(), descriptor, self.vectorized)
+        ret.descriptors = self.descriptors
+        ret.branches = self.branches
+        ret._matrix = self.matrix if self.vectorized else None
+        return ret
 
     def keys(self):
         return self.branches.keys()
@@ -38,66 +111,152 @@ class Sensitive:
         item = item.descriptor
         return self.branches[item.alias]
 
-    def assessment(self, measures, **kwargs):
-        assessment_values = list()
+    def assessment(self, measures, executor=None, cache=None, **kwargs):
+        """
+        Computes the given measures for each group.
 
-        for key, sensitive in self.branches.items():
-            descriptor = self.descriptors[key]
-            measure_values = list()
-            for measure in measures:
-                try:
-                    sig = inspect.signature(measure)
-                    valid_params = set(sig.parameters)
-                    valid_kwargs = {
-                        k: v for k, v in kwargs.items() if k in valid_params
-                    }
-                    # gather all kwarg branches that are different from the sensitive attribute's branches
-                    gathered_branches = {
-                        branch_name
-                        for arg in valid_kwargs.values()
-                        if isinstance(arg, dict)
-                        for branch_name in arg
-                        if branch_name not in self.branches
-                    }
-                    if gathered_branches:
-                        # make the computations for each branch combination
-                        for branch_name in gathered_branches:
-                            # for the branch name, specialize each kwarg if the latter is a fork with that value
-                            branch_kwargs = dict()
-                            specialized_keys = list()
-                            for k, v in valid_kwargs.items():
-                                if isinstance(v, dict):
-                                    assert branch_name in v, (
-                                        f"Analysis argument '{k}' is missing branch '{branch_name}' that is present "
-                                        f"in at least one other input argument passed to '{measure.descriptor}' "
-                                        "(the conflict is only between Fork inputs with multiple values). "
-                                        f"This measure's input arguments are: {', '.join(valid_kwargs.keys())}"
-                                    )
-                                    branch_kwargs[k] = v[branch_name]
-                                    specialized_keys.append(k)
-                                else:
-                                    branch_kwargs[k] = v
-                            # print(branch_kwargs)
-                            result = measure(**branch_kwargs, sensitive=sensitive)
-                            result.descriptor = Descriptor(
-                                result.descriptor.name + branch_name,
-                                result.descriptor.role,
-                                details=f"{result.descriptor.details} for "
-                                f"{' and '.join(specialized_keys)} being {branch_name}",
-                                alias=result.descriptor.alias + branch_name,
-                            )
-                            measure_values.append(result)
-                    else:
-                        # this is what would normally happen if only the sensitive attribute has branches
-                        result = measure(**valid_kwargs, sensitive=sensitive)
+        Args:
+            measures: The measures to compute. Only the keyword arguments in their signatures are passed to them.
+            executor: How to evaluate groups. This can be None or "serial" to evaluate them one after the other,
+                "threads" to evaluate them concurrently in a thread pool, "processes" to evaluate chunks
+                of groups in a process pool that accesses array inputs through shared memory, or an existing
+                `concurrent.futures.Executor`. In all cases, results are returned in the order of groups.
+            cache: Optionally, a `Cache` from which to reuse the values of measures that were already computed
+                for the same groups and inputs, and in which to store newly computed ones.
+        """
+        inputs = None if cache is None else cache.inputs(self, kwargs)
+        if executor is None or executor == "serial":
+            # measures that accept this argument share sufficient statistics instead of recomputing them
+            kwargs = {"statistics": Statistics(self)} | kwargs
+            grouped = (
+                self.grouped_assessment(measures, kwargs) if inputs is None else dict()
+            )
+            assessment_values = [
+                self.group_assessment(key, measures, kwargs, inputs, grouped.get(key))
+                for key in self.branches
+            ]
+        else:
+            assessment_values = parallel.assess(
+                self, measures, executor, kwargs, inputs
+            )
+        return self.descriptor(
+            depends=[value for value in assessment_values if value is not None]
+        )
+
+    def grouped_assessment(self, measures, kwargs) -> dict:
+        """
+        Computes measures once for all groups, if their shared statistics are computed for all groups at once.
+        Measures that accept a `statistics` argument then receive the sensitive attribute itself as their group,
+        operate on arrays with one element per group, and their values are split into one value per group.
+        Returns the values of each group by measure. Measures that are missing, such as those that rank scores
+        or that attach curves, are to be computed for each group separately.
+        """
+        ret = dict()
+        statistics = kwargs.get("statistics")
+        if not isinstance(statistics, Statistics) or not statistics.grouped(self):
+            return ret
+        for measure in measures:
+            try:
+                valid_params = signature(measure).parameters
+            except TypeError:
+                continue
+            if "statistics" not in valid_params:
+                continue
+            valid_kwargs = {k: v for k, v in kwargs.items() if k in valid_params}
+            if any(isinstance(v, dict) for v in valid_kwargs.values()):
+                continue
+            try:
+                values = _split(
+                    measure(**valid_kwargs, sensitive=self), len(self.branches)
+                )
+            except (NotComputable, TypeError):
+                # measures that cannot be evaluated on arrays, or lack arguments, are evaluated for each group
+                continue
+            for key, value in zip(self.branches, values):
+                ret.setdefault(key, dict())[measure] = value
+        return ret
+
+    def group_assessment(self, key, measures, kwargs, inputs=None, grouped=None):
+        """
+        Computes the given measures for one group, returning None if none of them can be computed.
+        If the hashed inputs of a cached assessment are provided, measure values are retrieved from
+        and stored in its cache. Values already computed for all groups at once can be provided
+        by measure.
+        """
+        descriptor = self.descriptors[key]
+        if grouped is not None and all(measure in grouped for measure in measures):
+            # masks, which may have to be materialized, are not needed
+            return descriptor(depends=[grouped[measure] for measure in measures])
+        sensitive = self.branches[key]
+        measure_values = list()
+        for measure in measures:
+            if grouped is not None and measure in grouped:
+                measure_values.append(grouped[measure])
+                continue
+            try:
+                valid_params = signature(measure).parameters
+            except TypeError:
+                continue
+            if inputs is not None:
+                cache_key = inputs.key(
+                    measure, inputs.group(key, sensitive), valid_params
+                )
+                cached = inputs.cache.get(cache_key)
+                if cached is not None:
+                    measure_values.extend(cached)
+                    continue
+                values_before = len(measure_values)
+            try:
+                valid_kwargs = {k: v for k, v in kwargs.items() if k in valid_params}
+                # gather all kwarg branches that are different from the sensitive attribute's branches, in order of appearance
+                gathered_branches = dict.fromkeys(
+                    branch_name
+                    for arg in valid_kwargs.values()
+                    if isinstance(arg, dict)
+                    for branch_name in arg
+                    if branch_name not in self.branches
+                )
+                if gathered_branches:
+                    # make the computations for each branch combination
+                    for branch_name in gathered_branches:
+                        # for the branch name, specialize each kwarg if the latter is a fork with that value
+                        branch_kwargs = dict()
+                        specialized_keys = list()
+                        for k, v in valid_kwargs.items():
+                            if isinstance(v, dict):
+                                assert branch_name in v, (
+                                    f"Analysis argument '{k}' is missing branch '{branch_name}' that is present "
+                                    f"in at least one other input argument passed to '{measure.descriptor}' "
+                                    "(the conflict is only between Fork inputs with multiple values). "
+                                    f"This measure's input arguments are: {', '.join(valid_kwargs.keys())}"
+                                )
+                                branch_kwargs[k] = v[branch_name]
+                                specialized_keys.append(k)
+                            else:
+                                branch_kwargs[k] = v
+                        # print(branch_kwargs)
+                        result = measure(**branch_kwargs, sensitive=sensitive)
+                        result.descriptor = Descriptor(
+                            result.descriptor.name + branch_name,
+                            result.descriptor.role,
+                            details=f"{result.descriptor.details} for "
+                            f"{' and '.join(specialized_keys)} being {branch_name}",
+                            alias=result.descriptor.alias + branch_name,
+                        )
                         measure_values.append(result)
-                except NotComputable:
-                    pass
-                except TypeError:
-                    pass
-            if measure_values:
-                assessment_values.append(descriptor(depends=measure_values))
-        return self.descriptor(depends=assessment_values)
+                else:
+                    # this is what would normally happen if only the sensitive attribute has branches
+                    result = measure(**valid_kwargs, sensitive=sensitive)
+                    measure_values.append(result)
+            except NotComputable:
+                pass
+            except TypeError:
+                continue
+            if inputs is not None:
+                inputs.cache.put(cache_key, measure_values[values_before:])
+        if measure_values:
+            return descriptor(depends=measure_values)
+        return None
 
     """
     def specialize(self, other: dict, name: str = ""):
@@ -129,3 +288,28 @@ class Sensitive:
             new_other = other_value + new_other
         return Sensitive(new_branches, self.descriptor), new_other
     """
+
+
+def _split(value: Value, groups: int) -> list[Value]:
+    # splits a value whose numbers are arrays of all groups into one value per group
+    number = value.value
+    if number is not None and not isinstance(number, (Number, TargetedNumber)):
+        raise ValueError("Only numbers can be split into groups")
+    if number is not None and isinstance(number.value, np.ndarray):
+        assert number.value.shape == (groups,), "There should be one number per group"
+    depends = [_split(dep, groups) for dep in value.depends.values()]
+    ret = list()
+    for i in range(groups):
+        item = number
+        if number is not None:
+            item = (
+                number.value[i]
+                if isinstance(number.value, np.ndarray)
+                else number.value
+            )
+            if isinstance(number, TargetedNumber):
+                item = TargetedNumber(item, number.target, number.units)
+            else:
+                item = Number(item, number.units)
+        ret.append(Value(item, value.descriptor, [dep[i] for dep in depends]))
+    return ret
@@ -0,0 +1,592 @@
+from fairbench.v2.core.coded import Coded
+import numpy as np
+
+
+class Confusion:
+    """Confusion counts of one group. Counts that can be derived from others are not stored."""
+
+    def __init__(self, samples, positives, ap=None, tp=None):
+        self.samples = samples
+        self.positives = positives
+        self.ap = ap
+        self.tp = tp
+
+    @property
+    def negatives(self):
+        return self.samples - self.positives
+
+    @property
+    def an(self):
+        return self.samples - self.ap
+
+    @property
+    def tn(self):
+        return self.samples - self.positives - self.ap + self.tp
+
+    def __add__(self, other: "Confusion") -> "Confusion":
+        if self.ap is None or other.ap is None:
+            return Confusion(
+                self.samples + other.samples, self.positives + other.positives
+            )
+        return Confusion(
+            self.samples + other.samples,
+            self.positives + other.positives,
+            self.ap + other.ap,
+            self.tp + other.tp,
+        )
+
+    def to_dict(self):
+        return {
+            "samples": self.samples,
+            "positives": self.positives,
+            "ap": self.ap,
+            "tp": self.tp,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["samples"], data["positives"], data.get("ap"), data.get("tp"))
+
+
+class Errors:
+    """Sums of absolute and square errors of one group."""
+
+    def __init__(self, samples, absolute, square):
+        self.samples = samples
+        self.absolute = absolute
+        self.square = square
+
+    def __add__(self, other: "Errors") -> "Errors":
+        return Errors(
+            self.samples + other.samples,
+            self.absolute + other.absolute,
+            self.square + other.square,
+        )
+
+    def to_dict(self):
+        return {
+            "samples": self.samples,
+            "absolute": self.absolute,
+            "square": self.square,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["samples"], data["absolute"], data["square"])
+
+
+class Distribution:
+    """Score sums and histogram counts of one group."""
+
+    def __init__(self, samples, total, counts, edges):
+        self.samples = samples
+        self.total = total
+        self.counts = counts
+        self.edges = edges
+
+    def density(self):
+        """Returns histogram densities like those of `np.histogram(..., density=True)`."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.counts / np.diff(self.edges) / self.counts.sum()
+
+    def __add__(self, other: "Distribution") -> "Distribution":
+        assert (
+            self.edges.shape == other.edges.shape
+            and np.abs(self.edges - other.edges).sum() == 0
+        ), "Cannot merge score distributions with different histogram bins"
+        return Distribution(
+            self.samples + other.samples,
+            self.total + other.total,
+            self.counts + other.counts,
+            self.edges,
+        )
+
+    def to_dict(self):
+        return {
+            "samples": self.samples,
+            "total": self.total,
+            "counts": self.counts,
+            "edges": self.edges,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data["samples"],
+            data["total"],
+            np.asarray(data["counts"]),
+            np.asarray(data["edges"]),
+        )
+
+
+class Ranking:
+    """
+    Cumulative hits of the members of one group, ordered by decreasing score. Top-k statistics
+    of the group are read from this for any number of k values. Hits may be retained only for
+    the first few members, in which case the total number of members and their hits are
+    provided separately.
+    """
+
+    def __init__(self, hits, samples, members=None, ap=None):
+        self.hits = hits
+        self.samples = samples
+        self.members = hits.shape[0] if members is None else members
+        if ap is None:
+            ap = hits[-1] if hits.shape[0] else 0.0
+        self.ap = ap
+
+    def top(self, k):
+        """Returns the hits and the number of members among the top-k members of the group. Supports arrays of k."""
+        members = np.minimum(k, self.members)
+        if not self.members:
+            return members * 0.0, members
+        hits = np.where(members > 0, self.hits[np.maximum(members, 1) - 1], 0.0)
+        return hits, members
+
+
+class Roc:
+    """
+    Cumulative true and false positives of one group at each of its distinct scores, in decreasing
+    score order and starting from zero. Tied scores are collapsed into one point.
+    """
+
+    def __init__(self, tps, fps, samples, thresholds):
+        self.tps = tps
+        self.fps = fps
+        self.samples = samples
+        self.thresholds = thresholds
+
+    def curve(self):
+        """Returns the false and true positive rates of the receiver operating characteristics curve."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.fps / self.fps[-1], self.tps / self.tps[-1]
+
+    @property
+    def auc(self):
+        """The area under the curve, computed from the rank sum of positives with ties counted as one half."""
+        positives = np.diff(self.tps)
+        negatives = np.diff(self.fps)
+        # negatives ranked below each run of tied scores, plus half of the negatives tied with it
+        below = self.fps[-1] - self.fps[1:] + 0.5 * negatives
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return float((positives * below).sum() / (self.tps[-1] * self.fps[-1]))
+
+    def __add__(self, other: "Roc") -> "Roc":
+        thresholds = np.r_[self.thresholds, other.thresholds]
+        positives = np.r_[np.diff(self.tps), np.diff(other.tps)]
+        negatives = np.r_[np.diff(self.fps), np.diff(other.fps)]
+        thresholds, inverse = np.unique(thresholds, return_inverse=True)
+        positives = np.bincount(inverse, positives, thresholds.shape[0])[::-1]
+        negatives = np.bincount(inverse, negatives, thresholds.shape[0])[::-1]
+        return Roc(
+            np.r_[0, np.cumsum(positives)],
+            np.r_[0, np.cumsum(negatives)],
+            self.samples + other.samples,
+            thresholds[::-1],
+        )
+
+    def to_dict(self):
+        return {
+            "tps": self.tps,
+            "fps": self.fps,
+            "samples": self.samples,
+            "thresholds": self.thresholds,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            np.asarray(data["tps"]),
+            np.asarray(data["fps"]),
+            data["samples"],
+            np.asarray(data["thresholds"]),
+        )
+
+
+class Statistics:
+    """
+    Memoizes sufficient statistics that several measures share, so that they are computed with
+    one fused pass over the data of each group instead of once per measure. Sensitive attribute
+    assessments create one instance and pass it to all measures that accept a `statistics` argument.
+    Memoization is based on the identity of input arrays, which are thus retained while the
+    instance lives.
+
+    If a vectorized sensitive attribute is provided, the statistics of all its groups are computed
+    at once, with one product between its (groups x samples) mask matrix and the stacked columns
+    of each input. If its groups are integer-coded, the statistics of all groups are instead aggregated
+    from the codes, without materializing group masks.
+
+    Rows of (models x samples) matrices registered with `batch` are also recognized when passed
+    as predictions or scores, in which case confusion counts and error sums are computed for all
+    models at once.
+
+    When the statistics of all groups are computed at once, passing the sensitive attribute itself
+    instead of a group mask yields confusion counts and error sums whose fields are arrays with one
+    element per group, so that measures can be evaluated once for all groups.
+    """
+
+    def __init__(self, sensitive=None):
+        self.memo = dict()
+        self.sensitive = sensitive
+        self.rows = dict()
+        self.coded = None
+        self.batches = dict()
+        if sensitive is not None and isinstance(sensitive.branches, Coded):
+            self.coded = sensitive.branches
+        elif sensitive is not None and sensitive.vectorized:
+            self.rows = {
+                id(branch): row
+                for row, branch in enumerate(sensitive.branches.values())
+            }
+
+    def batch(self, matrix) -> list:
+        """
+        Registers a (models x samples) matrix of predictions or scores and returns its rows. Statistics
+        of any of those rows are then computed for all of them at once.
+        """
+        matrix = np.asarray(matrix)
+        assert matrix.ndim == 2, "Only (models x samples) matrices can be batched"
+        rows = list(matrix)
+        for i, row in enumerate(rows):
+            # also store rows to prevent their ids from being reused
+            self.batches[id(row)] = (matrix, i, row)
+        return rows
+
+    def _batch(self, values):
+        matrix, row, _ = self.batches.get(id(values), (None, None, None))
+        return matrix, row
+
+    def _memoized(self, key, compute, *args):
+        key = (key,) + tuple(id(arg) for arg in args)
+        if key not in self.memo:
+            # also store arguments to prevent their ids from being reused
+            self.memo[key] = (compute(*args), args)
+        return self.memo[key][0]
+
+    def grouped(self, sensitive) -> bool:
+        """Whether the statistics of all groups of a sensitive attribute are computed at once."""
+        return (
+            self.sensitive is not None
+            and getattr(sensitive, "branches", None) is self.sensitive.branches
+            and (self.coded is not None or bool(self.rows))
+        )
+
+    def _ungrouped(self, sensitive, kind):
+        if self.grouped(sensitive):
+            from fairbench.v2.core import NotComputable
+
+            raise NotComputable(f"{kind} are computed for one group at a time")
+
+    def _sums(self, columns, sensitive):
+        if sensitive is None:
+            return columns.sum(axis=0)
+        if self.grouped(sensitive):
+            # one array of all groups for each statistic
+            if self.coded is not None:
+                return self._memoized("coded sums", self._coded_sums, columns).T
+            return self._memoized("matrix sums", self._matrix_sums, columns).T
+        row = self._coded_row(sensitive)
+        if row is not None:
+            return self._memoized("coded sums", self._coded_sums, columns)[row]
+        row = self.rows.get(id(sensitive))
+        if row is None:
+            return self._memoized("sums", _weighted_sums, columns, sensitive)
+        return self._memoized("matrix sums", self._matrix_sums, columns)[row]
+
+    def _matrix_sums(self, columns):
+        return matrix_product(self.sensitive.matrix, columns)
+
+    def _coded_row(self, sensitive):
+        return None if self.coded is None else self.coded.row(sensitive)
+
+    def _coded_sums(self, columns):
+        return coded_sums(self.coded, columns)
+
+    def _coded_members(self, order):
+        return _coded_members(self.coded, order)
+
+    def _coded_histogram(self, scores, bins):
+        return _coded_histogram(self.coded, scores, bins)
+
+    def _group_members(self, order, sensitive):
+        # returns the positions of group members in the order, and the mask to count group samples with
+        row = self._coded_row(sensitive)
+        if row is None:
+            return self._memoized("members", _members, order, sensitive), sensitive
+        # coded groups are binary, so their samples are counted from their members
+        return self._memoized("coded members", self._coded_members, order)[row], None
+
+    def confusion(self, predictions, labels=None, sensitive=None) -> Confusion:
+        matrix, row = self._batch(predictions)
+        if matrix is not None:
+            models = matrix.shape[0]
+            columns = self._memoized(
+                "batch confusion columns", _batch_confusion_columns, matrix, labels
+            )
+            sums = self._sums(columns, sensitive)
+            if labels is None:
+                return Confusion(sums[0], sums[1 + row])
+            return Confusion(
+                sums[0], sums[1 + row], sums[1 + models], sums[2 + models + row]
+            )
+        columns = self._memoized(
+            "confusion columns", _confusion_columns, predictions, labels
+        )
+        sums = self._sums(columns, sensitive)
+        if labels is None:
+            return Confusion(sums[0], sums[1])
+        return Confusion(sums[0], sums[1], sums[2], sums[3])
+
+    def errors(self, scores, targets, sensitive=None) -> Errors:
+        matrix, row = self._batch(scores)
+        if matrix is not None:
+            models = matrix.shape[0]
+            columns = self._memoized(
+                "batch error columns", _batch_error_columns, matrix, targets
+            )
+            sums = self._sums(columns, sensitive)
+            return Errors(sums[0], sums[1 + row], sums[1 + models + row])
+        columns = self._memoized("error columns", _error_columns, scores, targets)
+        sums = self._sums(columns, sensitive)
+        return Errors(sums[0], sums[1], sums[2])
+
+    def distribution(self, scores, sensitive=None, bins=100) -> Distribution:
+        self._ungrouped(sensitive, "Score distributions")
+        totals = self.confusion(scores, None, sensitive)
+        row = self._coded_row(sensitive)
+        if row is None:
+            counts, edges = self._memoized(
+                "histogram", _histogram, scores, sensitive, bins
+            )
+        else:
+            counts, edges = self._memoized(
+                "coded histogram", self._coded_histogram, scores, bins
+            )
+            counts = counts[row]
+        return Distribution(totals.samples, totals.positives, counts, edges)
+
+    def order(self, scores):
+        """Sample indexes that sort scores in decreasing order. Sorting happens once per scores."""
+        return self._memoized("order", _decreasing_order, scores)
+
+    def ranking(self, scores, labels, sensitive=None) -> Ranking:
+        self._ungrouped(sensitive, "Rankings")
+        order = self.order(scores)
+        sorted_labels = self._memoized("sorted", _sorted, labels, order)
+        members, sensitive = self._group_members(order, sensitive)
+        return self._memoized("ranking", _ranking, sorted_labels, members, sensitive)
+
+    def roc(self, scores, labels, sensitive=None) -> Roc:
+        self._ungrouped(sensitive, "Receiver operating characteristics")
+        order = self.order(scores)
+        sorted_labels = self._memoized("sorted", _sorted, labels, order)
+        sorted_scores = self._memoized("sorted", _sorted, scores, order)
+        runs = self._memoized("runs", _runs, sorted_scores)
+        members, sensitive = self._group_members(order, sensitive)
+        return self._memoized(
+            "roc", _roc, sorted_labels, sorted_scores, runs, members, sensitive
+        )
+
+
+def _confusion_columns(predictions, labels):
+    predictions = np.asarray(predictions, dtype=np.float64)
+    if labels is None:
+        return np.column_stack([np.ones_like(predictions), predictions])
+    labels = np.asarray(labels, dtype=np.float64)
+    return np.column_stack(
+        [np.ones_like(predictions), predictions, labels, predictions * labels]
+    )
+
+
+def _batch_confusion_columns(matrix, labels):
+    # a column of ones, one column per model, and if there are labels, a column of them and one column per model
+    matrix = np.asarray(matrix, dtype=np.float64)
+    ones = np.ones((matrix.shape[1], 1))
+    if labels is None:
+        return np.hstack([ones, matrix.T])
+    labels = np.asarray(labels, dtype=np.float64)
+    return np.hstack([ones, matrix.T, labels[:, None], (matrix * labels).T])
+
+
+def _batch_error_columns(matrix, targets):
+    errors = np.asarray(matrix, dtype=np.float64) - np.asarray(
+        targets, dtype=np.float64
+    )
+    return np.hstack([np.ones((errors.shape[1], 1)), np.abs(errors).T, (errors**2).T])
+
+
+def _error_columns(scores, targets):
+    error = np.asarray(scores, dtype=np.float64) - np.asarray(targets, dtype=np.float64)
+    return np.column_stack([np.ones_like(error), np.abs(error), error**2])
+
+
+def _decreasing_order(scores):
+    # a stable sort makes later samples rank first among ties, like taking the last of an ascending sort
+    return np.argsort(np.asarray(scores, dtype=np.float64), kind="stable")[::-1]
+
+
+def _sorted(values, order):
+    return np.asarray(values, dtype=np.float64)[order]
+
+
+def _members(order, sensitive):
+    if sensitive is None:
+        return np.arange(order.shape[0])
+    return np.flatnonzero(np.asarray(sensitive)[order] == 1)
+
+
+def _samples(members, sensitive):
+    if sensitive is None:
+        return float(members.shape[0])
+    return np.asarray(sensitive).sum()
+
+
+def _ranking(sorted_labels, members, sensitive):
+    return Ranking(np.cumsum(sorted_labels[members]), _samples(members, sensitive))
+
+
+def _runs(sorted_scores):
+    # identifiers of runs of tied scores
+    return np.cumsum(np.r_[0, sorted_scores[1:] != sorted_scores[:-1]])
+
+
+def _roc(sorted_labels, sorted_scores, runs, members, sensitive):
+    runs = runs[members]
+    ends = np.flatnonzero(np.r_[runs[1:] != runs[:-1], runs.shape[0] > 0])
+    tps = np.r_[0, np.cumsum(sorted_labels[members] == 1)[ends]]
+    fps = np.r_[0, ends + 1] - tps
+    thresholds = sorted_scores[members][ends]
+    return Roc(tps, fps, _samples(members, sensitive), thresholds)
+
+
+def _histogram(scores, sensitive, bins):
+    scores = np.asarray(scores, dtype=np.float64)
+    if sensitive is not None:
+        scores = scores[np.asarray(sensitive) == 1]
+    return np.histogram(scores, bins=bins, range=(0, 1))
+
+
+def _coded_members(coded, order):
+    sorted_codes = coded.codes[order]
+    # a stable sort keeps the members of each group in the order
+    positions = np.argsort(sorted_codes, kind="stable")
+    counts = np.bincount(sorted_codes + 1, minlength=len(coded.names) + 1)
+    ret = np.split(positions, np.cumsum(counts)[:-1])[1:]
+    if coded.everyone is not None:
+        ret.append(np.arange(order.shape[0]))
+    return ret
+
+
+def _coded_histogram(coded, scores, bins):
+    scores = np.asarray(scores, dtype=np.float64)
+    edges = np.histogram_bin_edges(scores[:0], bins=bins, range=(0, 1))
+    # bins are half-open except for the last one, like in np.histogram
+    valid = (scores >= 0) & (scores <= 1)
+    positions = np.searchsorted(edges, scores[valid], side="right") - 1
+    positions = np.minimum(positions, edges.shape[0] - 2)
+    groups = len(coded.names) + 1
+    counts = np.bincount(
+        (coded.codes[valid] + 1) * (edges.shape[0] - 1) + positions,
+        minlength=groups * (edges.shape[0] - 1),
+    ).reshape(groups, -1)
+    if coded.everyone is not None:
+        counts = np.vstack([counts, counts.sum(axis=0)])
+    return counts[1:], edges
+
+
+def coded_sums(coded: Coded, columns):
+    """
+    Sums (samples x statistics) columns over the integer-coded groups of a sensitive attribute,
+    with one weighted bincount per column.
+    """
+    codes = coded.codes + 1  # samples of no group are coded with -1
+    groups = len(coded.names) + 1
+    ret = np.zeros((groups - 1, columns.shape[1]))
+    for i in range(columns.shape[1]):
+        ret[:, i] = np.bincount(codes, columns[:, i], minlength=groups)[1:]
+    if coded.everyone is not None:
+        ret = np.vstack([ret, columns.sum(axis=0)])
+    return ret
+
+
+def _weighted_sums(columns, sensitive):
+    return np.asarray(sensitive, dtype=np.float64) @ columns
+
+
+def matrix_product(matrix, columns, chunk: int = 65536):
+    """
+    Multiplies a (groups x samples) mask matrix with (samples x statistics) columns. Sparse matrices
+    are multiplied directly, whereas dense ones are converted to floats in chunks of samples
+    to keep memory bounded when they are boolean.
+    """
+    if not isinstance(matrix, np.ndarray):
+        return np.asarray(matrix @ columns)
+    if matrix.dtype == np.float64:
+        return matrix @ columns
+    ret = np.zeros((matrix.shape[0], columns.shape[1]))
+    for start in range(0, matrix.shape[1], chunk):
+        ret += (
+            matrix[:, start : start + chunk].astype(np.float64)
+            @ columns[start : start + chunk]
+        )
+    return ret
+
+
+def fraction(numerator, denominator):
+    """
+    Divides statistics, where zero denominators yield zero. This works both for numbers and for
+    arrays of them, like the statistics of all groups.
+    """
+    if not isinstance(denominator, np.ndarray):
+        return 0 if denominator == 0 else numerator / denominator
+    numerator, denominator = np.broadcast_arrays(
+        np.asarray(numerator, dtype=np.float64), denominator
+    )
+    return np.divide(
+        numerator,
+        denominator,
+        out=np.zeros(denominator.shape),
+        where=denominator != 0,
+    )
+
+
+def confusion(predictions, labels=None, sensitive=None, statistics=None) -> Confusion:
+    """Computes the confusion counts of a group, reusing them if they are memoized by the given statistics."""
+    if statistics is None:
+        statistics = Statistics()
+    return statistics.confusion(predictions, labels, sensitive)
+
+
+def errors(scores, targets, sensitive=None, statistics=None) -> Errors:
+    """Computes the error sums of a group, reusing them if they are memoized by the given statistics."""
+    if statistics is None:
+        statistics = Statistics()
+    return statistics.errors(scores, targets, sensitive)
+
+
+def distribution(scores, sensitive=None, bins=100, statistics=None) -> Distribution:
+    """Computes the score sums and histogram of a group, reusing them if they are memoized by the given statistics."""
+    if statistics is None:
+        statistics = Statistics()
+    return statistics.distribution(scores, sensitive, bins)
+
+
+def ranking(scores, labels, sensitive=None, statistics=None) -> Ranking:
+    """Ranks the members of a group by decreasing scores, reusing the sorting if it is memoized by the given statistics."""
+    if statistics is None:
+        statistics = Statistics()
+    return statistics.ranking(scores, labels, sensitive)
+
+
+def order(scores, statistics=None):
+    """Sorts scores in decreasing order, reusing the sorting if it is memoized by the given statistics."""
+    if statistics is None:
+        statistics = Statistics()
+    return statistics.order(scores)
+
+
+def roc(scores, labels, sensitive=None, statistics=None) -> Roc:
+    """Computes the receiver operating characteristics of a group, reusing the sorting of scores if it is memoized by the given statistics."""
+    if statistics is None:
+        statistics = Statistics()
+    return statistics.roc(scores, labels, sensitive)
@@ -7,6 +7,15 @@ def number(values: Iterable[Value]) -> list[float]:
     return [float(value) for value in values]
 
 
+def _pairs(values, compared_to) -> tuple[np.ndarray, np.ndarray]:
+    # numbers as a column and those compared to as a row, whose broadcasting covers all pairs
+    values = np.array(number(values), dtype=np.float64)
+    compared_to = (
+        values if compared_to is None else np.array(number(compared_to), np.float64)
+    )
+    return values[:, np.newaxis], compared_to[np.newaxis, :]
+
+
 def single_role(values: Iterable[Value], role: str) -> list[any]:
     ret = list()
     for value in values:
@@ -23,35 +32,73 @@ def single_role(values: Iterable[Value], role: str) -> list[any]:
 
 def diff(
     values: Iterable[Value], compared_to: Iterable[Value] | None = None
-) -> list[float]:
-    values = number(values)
-    compared_to = values if compared_to is None else number(compared_to)
-    return [abs(i - j) for i in values for j in compared_to]
+) -> np.ndarray:
+    values, compared_to = _pairs(values, compared_to)
+    return np.abs(values - compared_to).ravel()
 
 
 def ratio(
     values: Iterable[Value], compared_to: Iterable[Value] | None = None
-) -> list[float]:
-    values = number(values)
-    compared_to = values if compared_to is None else number(compared_to)
+) -> np.ndarray:
+    values, compared_to = _pairs(values, compared_to)
     # assert all(value!=0 for value in compared_to), "Cannot compute ratio with zero values"
-    return [
-        min(i, j) / max(i, j) if i != 0 and j != 0 else 1
-        for i in values
-        for j in compared_to
-    ]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ret = np.minimum(values, compared_to) / np.maximum(values, compared_to)
+    return np.where((values != 0) & (compared_to != 0), ret, 1).ravel()
 
 
 def relative(
     values: Iterable[Value], compared_to: Iterable[Value] | None = None
-) -> list[float]:
-    values = number(values)
-    compared_to = values if compared_to is None else number(compared_to)
-    return [
-        abs(1 - min(i, j) / max(i, j)) if i != 0 and j != 0 else 0
-        for i in values
-        for j in compared_to
-    ]
+) -> np.ndarray:
+    values, compared_to = _pairs(values, compared_to)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ret = np.abs(
+            1 - np.minimum(values, compared_to) / np.maximum(values, compared_to)
+        )
+    return np.where((values != 0) & (compared_to != 0), ret, 0).ravel()
+
+
+def max_diff(
+    values: Iterable[Value], compared_to: Iterable[Value] | None = None
+) -> float:
+    """The maximum of `diff`, found from the extremes of values in O(n) instead of from all pairs."""
+    values = np.array(number(values), dtype=np.float64)
+    compared_to = (
+        values if compared_to is None else np.array(number(compared_to), np.float64)
+    )
+    if not len(values) or not len(compared_to):
+        return np.max(diff(values, compared_to))  # fails like it for empty values
+    return np.max([values.max() - compared_to.min(), compared_to.max() - values.min()])
+
+
+def max_relative(
+    values: Iterable[Value], compared_to: Iterable[Value] | None = None
+) -> float:
+    """
+    The maximum of `relative`, found from the extremes of non-zero values in O(n) instead of from all pairs.
+    Pairs with zeros have no relative difference. Among other pairs, the smallest ratio of the smaller to the
+    larger value involves the smallest and largest value. This holds only for positive values that are
+    not nan on either side, so otherwise all pairs are compared.
+    """
+    values = np.array(number(values), dtype=np.float64)
+    compared_to = (
+        values if compared_to is None else np.array(number(compared_to), np.float64)
+    )
+    if (
+        (values < 0).any()
+        or (compared_to < 0).any()
+        or np.isnan(values).any()
+        or np.isnan(compared_to).any()
+    ):
+        return np.max(relative(values, compared_to))
+    values = values[values != 0]
+    compared_to = compared_to[compared_to != 0]
+    if not len(values) or not len(compared_to):
+        return 0.0
+    smallest = np.minimum(
+        values.min() / compared_to.max(), compared_to.min() / values.max()
+    )
+    return np.abs(1 - smallest)
 
 
 def at_max_samples(values: Iterable[Value]) -> list[Value]:
@@ -77,7 +124,43 @@ def curve_diff(
         )
     except AssertionError as e:
         raise NotComputable(e)
-    return [curve_pair_diff(i.value, j.value) for i in values for j in compared_to]
+    return curve_pair_diffs(
+        [value.value for value in values], [value.value for value in compared_to]
+    )
+
+
+def curve_pair_diffs(curves1: list[Curve], curves2: list[Curve]) -> np.ndarray:
+    """
+    Computes `curve_pair_diff` for all pairs of curves and returns the outcomes in the order of pairs. Each pair
+    is compared on a grid with as many points as its shorter curve. Thus, instead of resampling both curves of
+    every pair, all curves are resampled once for each distinct number of points, and each curve is compared
+    at once to all others that share its grid.
+    """
+    for curve in curves1 + curves2:
+        assert isinstance(curve, Curve), "Cannot compare non-curves"
+    lengths1 = np.array([len(curve.x) for curve in curves1], dtype=np.int64)
+    lengths2 = np.array([len(curve.x) for curve in curves2], dtype=np.int64)
+    ret = np.zeros((len(curves1), len(curves2)))
+    for n in np.unique(np.concatenate([lengths1, lengths2])).tolist():
+        rows = np.flatnonzero(lengths1 >= n)
+        cols = np.flatnonzero(lengths2 >= n)
+        # the pairs among curves with at least n points whose shorter curve has exactly n points
+        pairs = (lengths1[rows, np.newaxis] == n) | (lengths2[np.newaxis, cols] == n)
+        if not pairs.any():
+            continue
+        needed_rows = pairs.any(axis=1)
+        needed_cols = pairs.any(axis=0)
+        pairs = pairs[needed_rows][:, needed_cols]
+        rows = rows[needed_rows]
+        cols = cols[needed_cols]
+        grid1 = np.array([curves1[i].to_grid(n).y for i in rows])
+        grid2 = np.array([curves2[j].to_grid(n).y for j in cols])
+        for row, i in enumerate(rows.tolist()):
+            compared = np.flatnonzero(pairs[row])
+            ret[i, cols[compared]] = np.mean(
+                np.abs(grid2[compared] - grid1[row]), axis=1
+            )
+    return ret.ravel()
 
 
 def curve_pair_diff(
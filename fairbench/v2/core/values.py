@@ -1,5 +1,6 @@
 from typing import Optional
 import numpy as np
+import weakref
 
 complicated_mode = False
 
@@ -18,10 +19,66 @@ def mismatch(item, keys):
 
 
 class Curve:
+    __slots__ = ("_x", "_y", "units", "_grid", "_points")
+
     def __init__(self, x, y, units: str = ""):
-        self.x = np.array(x)
-        self.y = np.array(y)
+        self._x = np.array(x)
+        self._y = np.array(y)
         self.units = units
+        self._grid = None
+        self._points = None
+
+    @classmethod
+    def deferred(cls, points, units: str = ""):
+        """
+        Creates a curve whose points are computed only when first accessed, where `points`
+        is a callable that returns the x and y arrays. Values of reports that never use
+        the curve thus never compute it.
+        """
+        ret = cls.__new__(cls)
+        ret._x = None
+        ret._y = None
+        ret.units = units
+        ret._grid = None
+        ret._points = points
+        return ret
+
+    def _materialize(self):
+        if self._points is not None:
+            x, y = self._points()
+            self._x = np.array(x)
+            self._y = np.array(y)
+            self._points = None
+
+    @property
+    def x(self):
+        self._materialize()
+        return self._x
+
+    @x.setter
+    def x(self, x):
+        self._x = x
+        self._points = None
+
+    @property
+    def y(self):
+        self._materialize()
+        return self._y
+
+    @y.setter
+    def y(self, y):
+        self._y = y
+        self._points = None
+
+    def __getstate__(self):
+        return {"x": self.x, "y": self.y, "units": self.units}
+
+    def __setstate__(self, state):
+        self._x = state["x"]
+        self._y = state["y"]
+        self.units = state["units"]
+        self._grid = None
+        self._points = None
 
     def to_dict(self):
         return {
@@ -31,9 +88,14 @@ class Curve:
         }
 
     def to_grid(self, grid):
+        # the last grid is retained, as curves are usually compared to several others with the same number of points
+        cached = getattr(self, "_grid", None)
+        if cached is not None and cached.x.shape[0] == grid:
+            return cached
         new_x = np.linspace(self.x.min(), self.x.max(), num=grid)
         approx_y = np.interp(new_x, self.x, self.y)
-        return Curve(new_x, approx_y, self.units)
+        self._grid = Curve(new_x, approx_y, self.units)
+        return self._grid
 
     def __str__(self):
         return f"{self.units} curve of {len(self.x)} points"
@@ -57,9 +119,18 @@ class Curve:
         )
 
 
+def _number(value):
+    # arrays hold the numbers of all groups or replicates for which a measure is evaluated at once
+    if isinstance(value, np.ndarray) and value.ndim:
+        return value
+    return float(value)
+
+
 class Number:
+    __slots__ = ("value", "units")
+
     def __init__(self, value, units: str = ""):
-        self.value = float(value)
+        self.value = _number(value)
         self.units = units
 
     def __float__(self):
@@ -81,8 +152,10 @@ class Number:
 
 
 class TargetedNumber:
+    __slots__ = ("value", "units", "target")
+
     def __init__(self, value, target, units: str = ""):
-        value = float(value)
+        value = _number(value)
         target = float(target)
         self.value = value
         self.units = units
@@ -103,25 +176,63 @@ class TargetedNumber:
 
 
 class Descriptor:
+    """
+    Describes values. Details can also be provided as a tuple of strings and descriptors, whose
+    details are then joined only when accessed, so that descriptors derived from others do not
+    each hold their own long strings.
+    """
+
+    __slots__ = ("name", "role", "_details", "alias", "prototype", "_preferred_units")
+
     def __init__(
         self,
         name,
         role,
-        details: Optional[str] = None,
+        details: Optional[str | tuple] = None,
         alias: Optional[str] = None,
         prototype: Optional["Descriptor"] = None,
         preferred_units: Optional[str] = None,
     ):
         self.name = name
         self.role = role
-        self.details = name + " " + role if details is None else str(details)
+        self._details = (
+            details if details is None or isinstance(details, tuple) else str(details)
+        )
         self.alias = name if alias is None else str(alias)
-        self.descriptor = self  # interoperability with methods
         self.prototype = self if prototype is None else prototype
-        self.preferred_units = (
-            self.prototype.alias if preferred_units is None else str(preferred_units)
+        self._preferred_units = (
+            None if preferred_units is None else str(preferred_units)
         )
 
+    @property
+    def descriptor(self) -> "Descriptor":
+        return self  # interoperability with methods
+
+    @property
+    def details(self) -> str:
+        if self._details is None:
+            return self.name + " " + self.role
+        if isinstance(self._details, tuple):
+            return "".join(
+                part if isinstance(part, str) else part.details
+                for part in self._details
+            )
+        return self._details
+
+    @details.setter
+    def details(self, details: str):
+        self._details = str(details)
+
+    @property
+    def preferred_units(self) -> str:
+        if self._preferred_units is None:
+            return self.prototype.alias
+        return self._preferred_units
+
+    @preferred_units.setter
+    def preferred_units(self, preferred_units: str):
+        self._preferred_units = str(preferred_units)
+
     def __str__(self):
         return f"[{self.role}] {self.name}"
 
@@ -159,7 +270,186 @@ class Descriptor:
 missing_descriptor = Descriptor("unknown", "any role", prototype=None)
 
 
+class Dependencies(dict):
+    """
+    The dependencies of a value by alias. The key indexes of values whose trees contain these dependencies
+    are registered as watchers, and changing the dependencies or the descriptor of their value invalidates
+    only those indexes.
+    """
+
+    __slots__ = ("watchers",)
+
+    def __reduce__(self):
+        # watchers are not retained by copies
+        return Dependencies, (dict(self),)
+
+    def watch(self, reference: weakref.ref):
+        """Registers a weak reference to an index that contains these dependencies."""
+        # most dependencies are contained in only one index, whose reference is stored without a list
+        watchers = getattr(self, "watchers", None)
+        if watchers is None or watchers is reference:
+            self.watchers = reference
+        elif isinstance(watchers, weakref.ref):
+            self.watchers = [watchers, reference]
+        else:
+            if len(watchers) >= 4 and not len(watchers) & (len(watchers) - 1):
+                # references to indexes that were rebuilt or discarded are dropped as lists double
+                watchers[:] = [watcher for watcher in watchers if watcher() is not None]
+            watchers.append(reference)
+
+    def changed(self):
+        """Invalidates the indexes that contain these dependencies."""
+        watchers = getattr(self, "watchers", None)
+        if watchers is None:
+            return
+        if isinstance(watchers, weakref.ref):
+            watchers = [watchers]
+        for watcher in watchers:
+            index = watcher()
+            if index is not None:
+                index.valid = False
+        self.watchers = None
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.changed()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.changed()
+
+    def __ior__(self, other):
+        ret = super().__ior__(other)
+        self.changed()
+        return ret
+
+    def pop(self, *args):
+        ret = super().pop(*args)
+        self.changed()
+        return ret
+
+    def popitem(self):
+        ret = super().popitem()
+        self.changed()
+        return ret
+
+    def setdefault(self, key, default=None):
+        ret = super().setdefault(key, default)
+        self.changed()
+        return ret
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self.changed()
+
+    def clear(self):
+        super().clear()
+        self.changed()
+
+
+class _ReadOnly(Dependencies):
+    """
+    The dependencies of views created by lookups, which repeated lookups share. These cannot be modified,
+    and neither can the descriptors of their values.
+    """
+
+    __slots__ = ()
+
+    def denied(self, *args, **kwargs):
+        raise TypeError(
+            "Values obtained by looking up keys of other values are shared by repeated lookups "
+            "and cannot be modified. Modify a `copy.deepcopy` of them instead."
+        )
+
+    __setitem__ = __delitem__ = __ior__ = denied
+    pop = popitem = setdefault = update = clear = denied
+
+
+class _Index:
+    """
+    The aliases in the tree of a value, which are found by traversing the tree when the value is queried
+    and are retained only by that value. The dependencies of all values in the tree watch the index,
+    and it becomes invalid when any of them changes. Also retains the views of lookups in the tree.
+    """
+
+    __slots__ = ("valid", "roles", "subtrees", "containing", "views", "__weakref__")
+
+    def __init__(self, value: "Value"):
+        self.valid = True
+        self.views = dict()
+        self.subtrees = None
+        self.containing = dict()
+        reference = weakref.ref(self)
+        value.depends.watch(reference)
+        # values shared by several parts of the tree are visited once
+        everything = dict()
+        for node in _walk(value):
+            node.depends.watch(reference)
+            everything[node._descriptor.alias] = node._descriptor.prototype
+        self.roles = {None: everything}
+
+    def keys(self, value: "Value", role) -> dict:
+        """The aliases of the tree with the given role and their prototypes, in order of appearance."""
+        if role not in self.roles:
+            self.roles[role] = {
+                node._descriptor.alias: node._descriptor.prototype
+                for node in _walk(value)
+                if node._descriptor.role == role
+            }
+        return self.roles[role]
+
+    def found(self, value: "Value", alias: str) -> list:
+        """The dependencies whose trees contain the given alias, including their own."""
+        if self.subtrees is None:
+            # the aliases of each dependency's tree, which are equal for many dependencies and thus shared
+            computed, interned = dict(), dict()
+            self.subtrees = [
+                _aliases(dep, computed, interned) for dep in value.depends.values()
+            ]
+        if alias not in self.containing:
+            self.containing[alias] = [
+                dep
+                for dep, aliases in zip(value.depends.values(), self.subtrees)
+                if alias in aliases
+            ]
+        return self.containing[alias]
+
+
+def _walk(value: "Value"):
+    # yields each value of the tree below the given one once, in depth-first order
+    visited = set()
+    stack = list(reversed(value.depends.values()))
+    while stack:
+        node = stack.pop()
+        if id(node) in visited:
+            continue
+        visited.add(id(node))
+        yield node
+        depends = node.depends
+        if depends:
+            stack.extend(reversed(depends.values()))
+
+
+def _aliases(value: "Value", computed: dict, interned: dict) -> frozenset:
+    # the aliases of the tree of a value including its own, computed once for values shared by several trees
+    ret = computed.get(id(value))
+    if ret is None:
+        ret = {value._descriptor.alias}
+        for dep in value.depends.values():
+            ret |= _aliases(dep, computed, interned)
+        ret = frozenset(ret)
+        ret = interned.setdefault(ret, ret)
+        computed[id(value)] = ret
+    return ret
+
+
+_attributes = ("_descriptor", "_depends", "_index", "_lazy")
+_empty = dict()
+
+
 class Value:
+    __slots__ = ("value",) + _attributes
+
     def __init__(
         self,
         value: any = None,
@@ -175,23 +465,47 @@ class Value:
         ):
             value = Number(value, units)
         self.value = value
-        self.descriptor: Descriptor = descriptor.descriptor
+        # new values are not yet part of any index, so they are created without invalidating indexes
+        self._descriptor: Descriptor = descriptor.descriptor
+        self._index = None
+        self._lazy = None
+        self._depends = self._dependencies(depends)
+
+    def _dependencies(self, depends, kind=Dependencies) -> Dependencies:
         if depends is None:
             depends = []
         depends = [dep for dep in depends if dep.exists()]
-        self.depends = {dep.descriptor.alias: dep for dep in depends}
+        ret = kind((dep.descriptor.alias, dep) for dep in depends)
 
-        if len(depends) != len(self.depends):
+        if len(depends) != len(ret):
             for dep in depends:
-                assert dep == self.depends[dep.descriptor.alias], (
+                assert dep == ret[dep.descriptor.alias], (
                     "A descriptor with the same alias was provided more than once but with different values "
                     f"as a dependency of '{self.descriptor}': {', '.join([str(dep.descriptor.alias) for dep in depends])}\n"
                     "The mis-matching values follow:\n\n"
                     f"{str(dep)}\n\n"
-                    f"{str(self.depends[dep.descriptor.alias])}\n\n"
+                    f"{str(ret[dep.descriptor.alias])}\n\n"
                 )
+        return ret
+
+    def __getstate__(self):
+        # cached indexes are rebuilt when needed instead of being serialized
+        return {
+            "value": self.value,
+            "descriptor": self._descriptor,
+            "depends": dict(self.depends),
+        }
+
+    def __setstate__(self, state):
+        self.value = state["value"]
+        self._descriptor = state["descriptor"]
+        self._depends = Dependencies(state["depends"])
+        self._index = None
+        self._lazy = None
 
     def __eq__(self, other: "Value"):
+        if self is other:
+            return True
         if not isinstance(other, Value):
             return False
         if self.descriptor != other.descriptor:
@@ -213,6 +527,36 @@ class Value:
                 return False
         return True
 
+    @property
+    def descriptor(self) -> Descriptor:
+        return self._descriptor
+
+    @descriptor.setter
+    def descriptor(self, descriptor: Descriptor):
+        if isinstance(self._depends, _ReadOnly):
+            self._depends.denied()
+        self._descriptor = descriptor
+        # indexes that contain this value watch its dependencies
+        self._depends.changed()
+
+    @property
+    def depends(self) -> Dependencies:
+        if self._lazy is not None:
+            # views obtain their dependencies from the viewed tree only when first accessed
+            depends, _ = self._lazy
+            self._depends = self._dependencies(depends(), type(self._depends))
+            self._lazy = None
+        return self._depends
+
+    @depends.setter
+    def depends(self, depends: dict):
+        previous = self._depends
+        if isinstance(previous, _ReadOnly):
+            previous.denied()
+        self._depends = Dependencies(depends)
+        self._lazy = None
+        previous.changed()
+
     @property
     def units(self):
         assert isinstance(self.value, Number) or isinstance(
@@ -232,14 +576,17 @@ class Value:
             raise NotComputable("Tried to represent None as a float")
         return float(self.value)
 
-    def _keys(self, role=None, add_to: dict[str, Descriptor] = None):
-        if add_to is None:
-            add_to = dict()
-        for dep in self.depends.values():
-            if role is None or dep.descriptor.role == role:
-                add_to[dep.descriptor.alias] = dep.descriptor.prototype
-            dep._keys(role, add_to)
-        return add_to
+    def _cached(self) -> _Index:
+        # key indexes and views of the tree are retained until some value of the tree changes
+        if self._index is None or not self._index.valid:
+            self._index = _Index(self)
+        return self._index
+
+    def _keys(self, role=None) -> dict[str, Descriptor]:
+        # the aliases of all values in the tree are indexed once per role
+        if not self.depends:
+            return _empty
+        return self._cached().keys(self, role)
 
     def keys(self, role=None):
         return list(self._keys(role).values())
@@ -247,6 +594,7 @@ class Value:
     def values(self, role):
         assert role is not None
         keys = self.keys(role)
+        # each of these is a view that is materialized only when accessed
         return [self | key for key in keys]
 
     def single_entry(self):
@@ -302,12 +650,20 @@ class Value:
     def exists(self) -> bool:
         if self.value is not None:
             return True
+        if self._lazy is not None:
+            depends, exists = self._lazy
+            if callable(exists):
+                exists = exists()
+                self._lazy = (depends, exists)
+            return exists
         for dep in self.depends.values():
             if dep.exists():
                 return True
         return False
 
     def rebase(self, dep: Descriptor):
+        if self._lazy is not None:
+            return _view(dep, *self._lazy, value=self.value)
         return Value(self.value, dep, list(self.depends.values()))
 
     def tostring(self, tab="", depth=0, details: bool = False):
@@ -352,7 +708,6 @@ class Value:
             if item in self.depends:
                 item = self.depends[item]
             else:
-                # TODO: accelerate this code path in the future
                 keys = self._keys()
                 assert item in keys, (
                     mismatch(item, keys.keys()) + "Run fb.help(value) for details."
@@ -377,7 +732,6 @@ class Value:
             if item in self.depends:
                 item = self.depends[item]
             else:
-                # TODO: accelerate this code path in the future
                 keys = self._keys()
                 assert item in keys, (
                     mismatch(item, keys.keys()) + "Run `fb.help(value)` for details."
@@ -391,6 +745,12 @@ class Value:
             return self.depends[item_hasher]
         if item_hasher == self.descriptor.alias:
             return self
+        # views are shared by repeated lookups, such as those of several reductions, and are thus read-only
+        index = self._cached()
+        views = index.views
+        view_item, view = views.get(item_hasher, (None, None))
+        if view_item is item and not complicated_mode:
+            return view
         """ret = Value(
             None,
             descriptor=Descriptor(
@@ -415,9 +775,15 @@ class Value:
                 alias=item.alias,
             )
 
-        ret = item(
-            depends=[dep[item].rebase(dep.descriptor) for dep in self.depends.values()]
+        # dependencies whose trees do not contain the item would only contribute empty values
+        found = index.found(self, item_hasher)
+        ret = _view(
+            item,
+            lambda: [_read_only(dep[item].rebase(dep.descriptor)) for dep in found],
+            bool(found),
         )
+        ret._depends = _ReadOnly()
+        views[item_hasher] = (item, ret)
         return ret
 
     def __or__(self, other):
@@ -429,6 +795,9 @@ class Value:
         return self.reshape(other)
 
     def __getattr__(self, item):
+        if item.startswith("__") and item.endswith("__") or item in _attributes:
+            # special attributes are never value keys, which also lets pickle and copy work
+            raise AttributeError(item)
         if item in dir(self):
             return self.__getattribute__(item)
         return self.__getitem__(item)
@@ -480,20 +849,23 @@ class Value:
         gathered_keys = list()
         for value in self.depends.values():
             gathered_keys.extend(value.depends.keys())
-        all = [self | key for key in gathered_keys]
         item = self.descriptor
         item = Descriptor(
             name=item.name + " explain",
             role="explanation " + item.role,
-            details=item.details + " viewed for inner details",
+            details=(item, " viewed for inner details"),
+        )
+        return _view(
+            item, lambda: [self | key for key in gathered_keys], bool(gathered_keys)
         )
-        return item(depends=all)
 
     @property
     def details(self):
         if self.value is None:
-            return self.descriptor(
-                depends=[dependency.details for dependency in self.depends.values()]
+            return _view(
+                self.descriptor,
+                lambda: [dependency.details for dependency in self.depends.values()],
+                lambda: _has_details(self),
             )
         item = self.descriptor
         item = Descriptor(
@@ -517,11 +889,78 @@ class Value:
         }
 
     @classmethod
-    def from_dict(cls, data):
-        value = Number.from_dict(data["value"]) if data["value"] else None
-        descriptor = Descriptor.from_dict(data["descriptor"])
-        depends = [Value.from_dict(dep) for dep in data["depends"]]
-        return cls(value=value, descriptor=descriptor, depends=depends)
+    def from_dict(cls, data, select: Optional[str] = None):
+        """
+        Restores a value from the outcome of `to_dict`. The tree is rebuilt without recursion, and equal
+        descriptors are created once. If a `select` path of aliases is given, such as "min.acc", only the
+        subtrees at that path are restored alongside their ancestors. Path segments can also be "*" to match
+        any alias, like in "*.acc".
+        """
+        segments = _segments(select)
+        descriptors = dict()
+        built = list()
+        stack = [(data, 0, None)]
+        while stack:
+            node, depth, count = stack.pop()
+            if count is None:
+                depends = node["depends"]
+                if depth < len(segments):
+                    depends = [
+                        dep
+                        for dep in depends
+                        if _matches(
+                            dep["descriptor"].get("alias") or dep["descriptor"]["name"],
+                            segments[depth],
+                        )
+                    ]
+                stack.append((node, depth, len(depends)))
+                stack.extend((dep, depth + 1, None) for dep in reversed(depends))
+                continue
+            depends = built[len(built) - count :]
+            del built[len(built) - count :]
+            value = Number.from_dict(node["value"]) if node["value"] else None
+            fields = node["descriptor"]
+            key = tuple(
+                fields.get(field)
+                for field in ["name", "role", "details", "alias", "preferred_units"]
+            )
+            if key not in descriptors:
+                descriptors[key] = Descriptor.from_dict(fields)
+            built.append(_restored(value, descriptors[key], depends, depth == 0))
+        return built[0]
+
+    def to_bytes(self) -> bytes:
+        """Serializes the value to a compact binary format with deduplicated strings and raw curve points."""
+        from fairbench.v2.core.binary import to_bytes
+
+        return to_bytes(self)
+
+    @classmethod
+    def from_bytes(cls, data, select: Optional[str] = None) -> "Value":
+        """
+        Restores a value from the outcome of `to_bytes`, given as bytes or another buffer. If a `select` path
+        is given, only the matching subtrees are restored, like in `from_dict`.
+        """
+        from fairbench.v2.core.binary import from_bytes
+
+        return from_bytes(data, select)
+
+    def save(self, path: str):
+        """Writes the outcome of `to_bytes` to a file."""
+        with open(path, "wb") as file:
+            file.write(self.to_bytes())
+
+    @classmethod
+    def load(
+        cls, path: str, mmap: bool = True, select: Optional[str] = None
+    ) -> "Value":
+        """
+        Loads a value saved with `save`. By default, the file is memory-mapped instead of read, so that
+        only the parts needed by a `select` path are read from disk.
+        """
+        from fairbench.v2.core.binary import load
+
+        return load(path, mmap, select)
 
     """
     def explain(self):
@@ -537,3 +976,52 @@ class Value:
         )
         return self.show(depth=2)
     """
+
+
+def _view(descriptor: Descriptor, depends, exists, value=None) -> Value:
+    """
+    Creates a value whose dependencies are obtained by calling `depends` only when they are first accessed.
+    Whether the value exists is known without this; it is either a boolean or a callable that computes it.
+    """
+    ret = Value(value, descriptor)
+    ret._lazy = (depends, exists)
+    return ret
+
+
+def _read_only(value: Value) -> Value:
+    # makes a newly created value read-only, including dependencies that it obtains later if it is a view
+    value._depends = _ReadOnly(value._depends)
+    return value
+
+
+def _has_details(value: Value) -> bool:
+    # whether the details of a value would exist, found without creating them
+    if value.value is not None:
+        return bool(value.depends)
+    return any(_has_details(dep) for dep in value.depends.values())
+
+
+def _restored(value, descriptor: Descriptor, depends: list, root: bool = True):
+    """
+    Creates a value from deserialized data, whose dependencies already have unique aliases. This skips the
+    checks of the constructor. Dependencies that are None are skipped, and None is returned instead of
+    values that would not exist, unless they are the root.
+    """
+    depends = [dep for dep in depends if dep is not None]
+    if value is None and not depends and not root:
+        return None
+    ret = Value.__new__(Value)
+    ret.value = value
+    ret._descriptor = descriptor
+    ret._index = None
+    ret._lazy = None
+    ret._depends = Dependencies((dep._descriptor.alias, dep) for dep in depends)
+    return ret
+
+
+def _segments(select: Optional[str]) -> list[str]:
+    return [] if select is None else select.split(".")
+
+
+def _matches(alias: str, segment: str) -> bool:
+    return segment == "*" or alias == segment
@@ -6,3 +6,4 @@ from fairbench.v2.export.formats.html_table import HtmlTable
 from fairbench.v2.export.formats.plotly_heatmap import PlotlyHeatMap
 from fairbench.v2.export.formats.tojson import ToJson
 from fairbench.v2.export.formats.todict import ToDict
+from fairbench.v2.export.formats.table import ToTable, Table
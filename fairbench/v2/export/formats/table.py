@@ -0,0 +1,211 @@
+from fairbench.v2.core import Value, TargetedNumber, Curve
+import numpy as np
+
+columns = [
+    "path",
+    "branch",
+    "reduction",
+    "measure",
+    "group",
+    "quantity",
+    "role",
+    "value",
+    "target",
+    "units",
+    "samples",
+]
+numeric = ["value", "target", "samples"]
+aggregations = ["mean", "sum", "min", "max", "count"]
+
+
+class Table:
+    """
+    A report flattened into a columnar table, with one row for each numeric value of its tree. Rows are
+    held in a numpy structured array whose columns are the `path` of aliases from the root to the value,
+    the aliases of the `branch`, `reduction`, `measure`, `group`, and `quantity` it belongs to (empty if
+    none), its `role`, its `value`, its ideal `target` (nan if none), its `units`, and the `samples` of its
+    group (nan if unknown). Filters, sorts, and group-bys are vectorized over these columns.
+    """
+
+    def __init__(self, rows: np.ndarray):
+        self.rows = rows
+
+    @classmethod
+    def from_value(cls, value: Value) -> "Table":
+        """Flattens the tree of a value into a table."""
+        gathered = {column: list() for column in columns}
+        stack = [(value, "", dict())]
+        while stack:
+            node, path, context = stack.pop()
+            for dep in reversed(list(node.depends.values())):
+                alias = dep.descriptor.alias
+                dep_path = alias if not path else path + "." + alias
+                dep_context = context | {_column(dep.descriptor.role): alias}
+                stack.append((dep, dep_path, dep_context))
+            if node is value or node.value is None or isinstance(node.value, Curve):
+                continue
+            samples = node.depends.get("samples")
+            gathered["path"].append(path)
+            for column in ["branch", "reduction", "measure", "group", "quantity"]:
+                gathered[column].append(context.get(column, ""))
+            gathered["role"].append(node.descriptor.role)
+            gathered["value"].append(float(node.value))
+            gathered["target"].append(
+                node.value.target if isinstance(node.value, TargetedNumber) else np.nan
+            )
+            gathered["units"].append(node.value.units)
+            gathered["samples"].append(
+                np.nan
+                if samples is None or samples.value is None
+                else float(samples.value)
+            )
+        dtype = [
+            (
+                column,
+                (
+                    np.float64
+                    if column in numeric
+                    else f"U{max([len(item) for item in gathered[column]], default=1)}"
+                ),
+            )
+            for column in columns
+        ]
+        rows = np.empty(len(gathered["path"]), dtype=dtype)
+        for column in columns:
+            rows[column] = gathered[column]
+        return cls(rows)
+
+    @property
+    def columns(self) -> list[str]:
+        return list(self.rows.dtype.names)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __getitem__(self, item):
+        """Returns a column by its name, or the table of rows selected by a boolean mask, indexes, or a slice."""
+        if isinstance(item, str):
+            return self.rows[item]
+        return Table(self.rows[item])
+
+    def where(self, **conditions) -> "Table":
+        """
+        Keeps the rows whose columns have the given values. Each condition can be a single value,
+        a list of accepted values, or a callable that takes the column and returns a boolean mask.
+        For example, `table.where(measure="acc", reduction=["min", "max"], value=lambda v: v < 0.5)`.
+        """
+        mask = np.ones(len(self.rows), dtype=bool)
+        for column, condition in conditions.items():
+            assert (
+                column in self.rows.dtype.names
+            ), f"There is no table column '{column}'"
+            values = self.rows[column]
+            if callable(condition):
+                mask &= np.asarray(condition(values), dtype=bool)
+            elif isinstance(condition, (list, tuple, set, np.ndarray)):
+                mask &= np.isin(values, list(condition))
+            else:
+                mask &= values == condition
+        return Table(self.rows[mask])
+
+    def sort(self, *by: str, descending: bool = False) -> "Table":
+        """Sorts rows by the given columns, where earlier columns take precedence. The sort is stable."""
+        assert by, "Provide at least one column to sort by"
+        order = np.lexsort([self.rows[column] for column in reversed(by)])
+        if descending:
+            order = order[::-1]
+        return Table(self.rows[order])
+
+    def groupby(
+        self, *by: str, column: str = "value", aggregate: str = "mean"
+    ) -> "Table":
+        """
+        Aggregates a numeric column over the rows that share the same values in the given columns. The result has
+        the grouping columns, the aggregated column, and a `count` column of aggregated rows, sorted by the groups.
+
+        Args:
+            by: The columns whose values define the groups of rows.
+            column: The numeric column to aggregate.
+            aggregate: One of "mean", "sum", "min", "max", or "count".
+        """
+        assert by, "Provide at least one column to group by"
+        assert (
+            column in numeric
+        ), f"Only the numeric columns {numeric} can be aggregated"
+        assert (
+            aggregate in aggregations
+        ), f"The aggregation can only be one of {aggregations}"
+        keys, inverse = np.unique(self.rows[list(by)], return_inverse=True)
+        inverse = inverse.ravel()
+        values = self.rows[column]
+        counts = np.bincount(inverse, minlength=len(keys))
+        if aggregate == "sum" or aggregate == "mean":
+            result = np.bincount(inverse, weights=values, minlength=len(keys))
+            if aggregate == "mean":
+                result = result / np.maximum(counts, 1)
+        elif aggregate == "min":
+            result = np.full(len(keys), np.inf)
+            np.minimum.at(result, inverse, values)
+        elif aggregate == "max":
+            result = np.full(len(keys), -np.inf)
+            np.maximum.at(result, inverse, values)
+        else:
+            result = counts.astype(np.float64)
+        dtype = [(name, keys.dtype[name]) for name in by]
+        rows = np.empty(
+            len(keys), dtype=dtype + [(column, np.float64), ("count", np.int64)]
+        )
+        for name in by:
+            rows[name] = keys[name]
+        rows[column] = result
+        rows["count"] = counts
+        return Table(rows)
+
+    def to_pandas(self):
+        """Converts the table to a pandas DataFrame (requires pandas)."""
+        try:
+            import pandas as pd
+        except ModuleNotFoundError:
+            raise ModuleNotFoundError(
+                "Converting tables to DataFrames requires pandas. Install it with `pip install pandas`."
+            )
+        return pd.DataFrame({name: self.rows[name] for name in self.rows.dtype.names})
+
+    def to_arrow(self):
+        """Converts the table to a pyarrow Table (requires pyarrow)."""
+        try:
+            import pyarrow as pa
+        except ModuleNotFoundError:
+            raise ModuleNotFoundError(
+                "Converting tables to Arrow requires pyarrow. Install it with `pip install pyarrow`."
+            )
+        return pa.table({name: self.rows[name] for name in self.rows.dtype.names})
+
+    def __str__(self):
+        return "\n".join(
+            [" | ".join(self.columns)]
+            + [" | ".join(map(str, row)) for row in self.rows]
+        )
+
+
+class ToTable:
+    """Exports a value to a columnar `Table`, for example with `report.show(fb.export.ToTable)`."""
+
+    def direct_show(self, value):
+        return Table.from_value(value)
+
+
+def _column(role: str) -> str:
+    # the column of a value's alias, based on its role
+    if role == "branch":
+        return "branch"
+    if role == "reduction":
+        return "reduction"
+    if "measure" in role.split(" "):
+        return "measure"
+    if role == "group":
+        return "group"
+    return "quantity"
@@ -1,2 +1,3 @@
 from fairbench.v2.core import report as custom
 from fairbench.v2.reports.adhoc import pairwise, vsall
+from fairbench.v2.reports.accumulator import Accumulator
@@ -0,0 +1,420 @@
+from fairbench.v2.core import Sensitive, Statistics, NotComputable, Coded, report
+from fairbench.v2.core.sensitive import multidimensional
+from fairbench.v2.core.statistics import Ranking, Confusion, Errors, Distribution, Roc
+from fairbench.v2.reports.adhoc import (
+    all_measures,
+    reductions_pairwise,
+    reductions_vs_any,
+    vsall_descriptor,
+)
+from fairbench.v1 import core as deprecated
+import numpy as np
+import json
+import io
+
+inputs = ["predictions", "labels", "scores", "targets"]
+
+
+class Top:
+    """The highest-scored members of one group, retained to compute top-k statistics over batches."""
+
+    def __init__(self, scores, indexes, labels, samples, members, ap, k):
+        self.scores = scores
+        self.indexes = indexes
+        self.labels = labels
+        self.samples = samples
+        self.members = members
+        self.ap = ap
+        self.k = k
+
+    def ranking(self) -> Ranking:
+        return Ranking(np.cumsum(self.labels), self.samples, self.members, self.ap)
+
+    def __add__(self, other: "Top") -> "Top":
+        scores = np.r_[self.scores, other.scores]
+        indexes = np.r_[self.indexes, other.indexes]
+        labels = np.r_[self.labels, other.labels]
+        # later samples rank first among ties, like in non-accumulated rankings
+        kept = np.lexsort((-indexes, -scores))[: self.k]
+        return Top(
+            scores[kept],
+            indexes[kept],
+            labels[kept],
+            self.samples + other.samples,
+            self.members + other.members,
+            self.ap + other.ap,
+            self.k,
+        )
+
+    def shifted(self, offset) -> "Top":
+        """Returns the same members as if they were accumulated after the given number of samples."""
+        return Top(
+            self.scores,
+            self.indexes + offset,
+            self.labels,
+            self.samples,
+            self.members,
+            self.ap,
+            self.k,
+        )
+
+    def to_dict(self):
+        return {
+            "scores": self.scores,
+            "indexes": self.indexes,
+            "labels": self.labels,
+            "samples": self.samples,
+            "members": self.members,
+            "ap": self.ap,
+            "k": self.k,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            np.asarray(data["scores"]),
+            np.asarray(data["indexes"]),
+            np.asarray(data["labels"]),
+            data["samples"],
+            data["members"],
+            data["ap"],
+            data["k"],
+        )
+
+
+kinds = {
+    "confusion": Confusion,
+    "errors": Errors,
+    "distribution": Distribution,
+    "roc": Roc,
+    "top": Top,
+}
+
+
+class Streamed:
+    """Stands in for an accumulated input when computing reports, in which it can only be accessed through statistics."""
+
+    def __init__(self, name, samples):
+        self.name = name
+        self.samples = samples
+
+    def __len__(self):
+        return self.samples
+
+
+class Accumulated(Statistics):
+    """Serves the accumulated statistics of each group to measures."""
+
+    def __init__(self, sensitive, partials):
+        super().__init__()
+        self.groups = {id(branch): name for name, branch in sensitive.branches.items()}
+        self.partials = partials
+
+    def _partial(self, kind, sensitive):
+        partial = self.partials[self.groups[id(sensitive)]]
+        if kind not in partial:
+            raise NotComputable(f"No {kind} statistics were accumulated")
+        return partial[kind]
+
+    def confusion(self, predictions, labels=None, sensitive=None):
+        ret = self._partial("confusion", sensitive)
+        if labels is not None and ret.ap is None:
+            raise NotComputable("No labels were accumulated")
+        return ret
+
+    def errors(self, scores, targets, sensitive=None):
+        return self._partial("errors", sensitive)
+
+    def distribution(self, scores, sensitive=None, bins=100):
+        ret = self._partial("distribution", sensitive)
+        if ret.counts.shape[0] != bins:
+            raise NotComputable(f"Score distributions were accumulated for other bins")
+        return ret
+
+    def ranking(self, scores, labels, sensitive=None):
+        return self._partial("top", sensitive).ranking()
+
+    def roc(self, scores, labels, sensitive=None):
+        return self._partial("roc", sensitive)
+
+    def order(self, scores):
+        raise NotComputable("Accumulated scores cannot be sorted as a whole")
+
+
+class Accumulator:
+    """
+    Accumulates mergeable statistics of each group over batches of data, so that reports can be
+    computed without holding all data in memory at once. Only counts, sums, score histograms, the
+    distinct scores of receiver operating characteristic curves, and the top scores of each group
+    are retained. Measures that need more information, like `avgrepr`, are skipped when
+    finalizing the report.
+
+    Args:
+        vsall: Whether to create the report of `fb.reports.vsall` instead of `fb.reports.pairwise`.
+        measures: The measures to compute. By default, these are the same as for `fb.reports.pairwise`.
+        reductions: The reductions to compute. By default, these depend on the report type.
+        top: The number of top scores considered by ranking measures.
+        bins: The number of histogram bins of score distributions.
+        resolution: If provided, scores are rounded to this many levels per unit before adding them
+            to receiver operating characteristic curves, which bounds the size of the latter. By default,
+            all distinct scores are retained and curves are exact.
+        vectorized: Whether to compute the statistics of each batch in vectorized mode.
+    """
+
+    def __init__(
+        self,
+        vsall: bool = False,
+        measures=None,
+        reductions=None,
+        top: int = 3,
+        bins: int = 100,
+        resolution: int | None = None,
+        vectorized: bool | str = False,
+    ):
+        self.vsall = vsall
+        self.measures = all_measures if measures is None else measures
+        if reductions is None:
+            reductions = reductions_vs_any if vsall else reductions_pairwise
+        self.reductions = reductions
+        self.top = int(top)
+        self.bins = int(bins)
+        self.resolution = resolution
+        self.vectorized = vectorized
+        self.partials = dict()
+        self.inputs = None
+        self.samples = 0
+
+    def update(self, sensitive: Sensitive | deprecated.Fork, **kwargs):
+        """Adds a batch of data, where the sensitive attribute holds the batch's group masks."""
+        if isinstance(sensitive, Coded):
+            sensitive = Sensitive(sensitive)
+        if isinstance(sensitive, dict):
+            sensitive = deprecated.Fork(sensitive)
+        if isinstance(sensitive, deprecated.Fork):
+            sensitive = Sensitive(
+                {
+                    k: v.numpy() if hasattr(v, "numpy") else v
+                    for k, v in sensitive.branches().items()
+                }
+            )
+        assert isinstance(
+            sensitive, Sensitive
+        ), "The sensitive attribute can only be a dict, Sensitive, Coded, or Fork. For example, provide `fb.categories@iterable`."
+        for name, arg in kwargs.items():
+            assert (
+                name in inputs
+            ), f"Only the following inputs can be accumulated: {', '.join(inputs)}"
+            assert not isinstance(
+                arg, dict
+            ), f"Accumulated input '{name}' cannot have multiple branches"
+        batch = {
+            name: np.asarray(arg, dtype=np.float64)
+            for name, arg in kwargs.items()
+            if arg is not None
+        }
+        assert batch, "At least one input should be provided"
+        if self.inputs is None:
+            self.inputs = set(batch)
+        assert self.inputs == set(batch), (
+            f"All batches should provide the same inputs, but {', '.join(sorted(batch))} were "
+            f"provided instead of {', '.join(sorted(self.inputs))}"
+        )
+        samples = next(iter(batch.values())).shape[0]
+
+        if isinstance(sensitive.branches, Coded):
+            branches = sensitive.branches
+            if self.vsall:
+                branches = branches.including("all")
+        else:
+            branches = dict(sensitive.branches)
+            if self.vsall:
+                branches["all"] = np.ones(samples)
+        sensitive = Sensitive(branches, vectorized=self.vectorized)
+        statistics = Statistics(sensitive)
+        if self.resolution is not None and "scores" in batch:
+            batch["roc scores"] = (
+                np.round(batch["scores"] * self.resolution) / self.resolution
+            )
+        for name, mask in sensitive.branches.items():
+            partial = self._partial(statistics, mask, batch)
+            if name in self.partials:
+                previous = self.partials[name]
+                partial = {kind: previous[kind] + partial[kind] for kind in partial}
+            self.partials[name] = partial
+        self.samples += samples
+        return self
+
+    def _partial(self, statistics, mask, batch):
+        ret = dict()
+        predictions = batch.get("predictions")
+        labels = batch.get("labels")
+        scores = batch.get("scores")
+        targets = batch.get("targets")
+        if predictions is not None:
+            ret["confusion"] = statistics.confusion(predictions, labels, mask)
+        if scores is not None and targets is not None:
+            ret["errors"] = statistics.errors(scores, targets, mask)
+        if scores is not None:
+            ret["distribution"] = statistics.distribution(scores, mask, self.bins)
+        if scores is not None and labels is not None:
+            ret["roc"] = statistics.roc(batch.get("roc scores", scores), labels, mask)
+            order = statistics.order(scores)
+            members = order[mask[order] == 1]
+            kept = members[: self.top]
+            ret["top"] = Top(
+                scores[kept],
+                kept + self.samples,
+                labels[kept],
+                mask.sum(),
+                members.shape[0],
+                labels[members].sum(),
+                self.top,
+            )
+        return ret
+
+    def __add__(self, other: "Accumulator") -> "Accumulator":
+        """
+        Merges the statistics of two accumulators, for example computed for different shards of data in
+        different processes. Samples of the second accumulator are considered to come after those of the first.
+        """
+        if other == 0:
+            return self
+        assert isinstance(other, Accumulator), "Can only merge accumulators"
+        for setting in ["vsall", "top", "bins", "resolution"]:
+            assert getattr(self, setting) == getattr(
+                other, setting
+            ), f"Cannot merge accumulators with different {setting}"
+        if not other.partials:
+            return self
+        if not self.partials:
+            return other
+        assert self.inputs == other.inputs, (
+            f"Cannot merge accumulators of {', '.join(sorted(self.inputs))} "
+            f"with accumulators of {', '.join(sorted(other.inputs))}"
+        )
+        ret = Accumulator(
+            self.vsall,
+            self.measures,
+            self.reductions,
+            self.top,
+            self.bins,
+            self.resolution,
+            self.vectorized,
+        )
+        ret.inputs = set(self.inputs)
+        ret.samples = self.samples + other.samples
+        ret.partials = dict(self.partials)
+        for name, partial in other.partials.items():
+            if "top" in partial:
+                partial = partial | {"top": partial["top"].shifted(self.samples)}
+            if name in ret.partials:
+                previous = ret.partials[name]
+                partial = {kind: previous[kind] + partial[kind] for kind in partial}
+            ret.partials[name] = partial
+        return ret
+
+    def __radd__(self, other):
+        # supports sum(accumulators)
+        if other == 0:
+            return self
+        return other + self
+
+    def to_dict(self):
+        """
+        Returns the accumulated statistics and settings as a dictionary whose leaves are numbers,
+        strings, or numpy arrays. Measures and reductions are not included.
+        """
+        return {
+            "vsall": self.vsall,
+            "top": self.top,
+            "bins": self.bins,
+            "resolution": self.resolution,
+            "vectorized": self.vectorized,
+            "samples": self.samples,
+            "inputs": None if self.inputs is None else sorted(self.inputs),
+            "partials": {
+                name: {kind: stat.to_dict() for kind, stat in partial.items()}
+                for name, partial in self.partials.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data, measures=None, reductions=None):
+        """Restores an accumulator from the outcome of `to_dict`, using the given measures and reductions."""
+        ret = cls(
+            data["vsall"],
+            measures,
+            reductions,
+            data["top"],
+            data["bins"],
+            data["resolution"],
+            data["vectorized"],
+        )
+        ret.samples = data["samples"]
+        ret.inputs = None if data["inputs"] is None else set(data["inputs"])
+        ret.partials = {
+            name: {kind: kinds[kind].from_dict(stat) for kind, stat in partial.items()}
+            for name, partial in data["partials"].items()
+        }
+        return ret
+
+    def to_bytes(self) -> bytes:
+        """
+        Serializes the accumulator to bytes that can be cheaply sent across processes or machines.
+        Arrays are stored in their binary form in an npz archive, and everything else in a json header.
+        """
+        arrays = list()
+        header = json.dumps(_encode(self.to_dict(), arrays))
+        out = io.BytesIO()
+        np.savez(
+            out,
+            header=np.array(header),
+            **{str(i): array for i, array in enumerate(arrays)},
+        )
+        return out.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes, measures=None, reductions=None):
+        """Restores an accumulator from the outcome of `to_bytes`, using the given measures and reductions."""
+        with np.load(io.BytesIO(data), allow_pickle=False) as archive:
+            header = json.loads(str(archive["header"]))
+            return cls.from_dict(_decode(header, archive), measures, reductions)
+
+    def finalize(self):
+        """Computes the report of all accumulated data."""
+        assert self.partials, "No batches have been accumulated"
+        names = [name for name in self.partials if name != "all"]
+        if self.vsall:
+            names.append("all")
+        sensitive = Sensitive(
+            {name: np.zeros(0) for name in names},
+            vsall_descriptor if self.vsall else multidimensional,
+        )
+        return report(
+            sensitive=sensitive,
+            measures=self.measures,
+            reductions=self.reductions,
+            statistics=Accumulated(sensitive, self.partials),
+            top=self.top,
+            bins=self.bins,
+            **{name: Streamed(name, self.samples) for name in self.inputs},
+        )
+
+
+def _encode(data, arrays):
+    if isinstance(data, dict):
+        return {key: _encode(value, arrays) for key, value in data.items()}
+    if isinstance(data, np.ndarray):
+        arrays.append(data)
+        return {"__array__": len(arrays) - 1}
+    if isinstance(data, np.generic):
+        return data.item()
+    return data
+
+
+def _decode(data, archive):
+    if isinstance(data, dict):
+        if len(data) == 1 and "__array__" in data:
+            return archive[str(data["__array__"])]
+        return {key: _decode(value, archive) for key, value in data.items()}
+    return data
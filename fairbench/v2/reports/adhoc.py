@@ -1,6 +1,6 @@
 from fairbench.v2.core import report
 from fairbench.v2 import blocks as blocks
-from fairbench.v2.core import Sensitive, Descriptor
+from fairbench.v2.core import Sensitive, Descriptor, Coded
 from fairbench.v1 import core as deprecated
 import numpy as np
 
@@ -62,18 +62,30 @@ def pairwise(
     )
 
 
-def vsall(sensitive: Sensitive | deprecated.Fork, measures=None, **kwargs):
+def vsall(
+    sensitive: Sensitive | deprecated.Fork,
+    measures=None,
+    vectorized: bool | str | None = None,
+    **kwargs,
+):
     if measures is None:
         measures = all_measures
     # prepare the sensitive attribute, because we are going to add one more branch here
+    if isinstance(sensitive, Coded):
+        sensitive = Sensitive(sensitive)
     if isinstance(sensitive, dict):
         sensitive = deprecated.Fork(sensitive)
     if isinstance(sensitive, deprecated.Fork):
         sensitive = Sensitive({k: v.numpy() for k, v in sensitive.branches().items()})
-    branches = sensitive.branches | {
-        "all": np.ones_like(next(sensitive.branches.values().__iter__()))
-    }
-    sensitive = Sensitive(branches, vsall_descriptor)
+    if vectorized is None:
+        vectorized = sensitive.vectorized
+    if isinstance(sensitive.branches, Coded):
+        branches = sensitive.branches.including("all")
+    else:
+        branches = sensitive.branches | {
+            "all": np.ones_like(next(sensitive.branches.values().__iter__()))
+        }
+    sensitive = Sensitive(branches, vsall_descriptor, vectorized)
     return report(
         sensitive=sensitive, measures=measures, reductions=reductions_vs_any, **kwargs
     )
@@ -64,6 +64,26 @@ def test_categories():
         assert "attr3" in branches
 
 
+def test_mixed_categories():
+    groups = fb.categories @ ["b", "a", 1, "b", 1.0, np.nan]
+    assert list(groups) == ["b", "a", "1", "nan"]
+    assert groups["1"].numpy().tolist() == [0, 0, 1, 0, 1, 0]
+    assert groups["b"].numpy().tolist() == [1, 0, 0, 1, 0, 0]
+    assert groups["nan"].numpy().tolist() == [0, 0, 0, 0, 0, 1]
+    groups = fb.categories @ [2, 1.0, 2.0, 1]
+    assert list(groups) == ["2", "1.0"]
+    assert groups["2"].numpy().tolist() == [1, 0, 1, 0]
+
+
+def test_category_order():
+    # groups appear in the order of their first values, and all nans form one group
+    groups = fb.categories @ np.array([3.0, np.nan, 1.0, 3.0, np.nan])
+    assert list(groups) == ["3.0", "nan", "1.0"]
+    assert groups["nan"].numpy().tolist() == [0, 1, 0, 0, 1]
+    groups = fb.categories @ ["c", "a", "c", "b"]
+    assert list(groups) == ["c", "a", "b"]
+
+
 def test_intersectional():
     branches = (
         fb.Fork(
@@ -237,3 +257,34 @@ def test_fork_direct_explain():
     )
     explanation = report.explain
     assert "min" in explanation.branches()
+
+
+def test_intersectional_pruning():
+    rng = np.random.default_rng(0)
+    fork = fb.Fork(**{f"x{i}": fb.binary @ rng.integers(0, 2, 1000) for i in range(10)})
+    branches = fork.intersectional(max_order=2).branches()
+    assert len(branches) == 20 + 45 * 4
+    branches = fork.intersectional(min_support=200).branches()
+    assert all(mask.numpy().sum() >= 200 for mask in branches.values())
+    assert "x00&x10" in branches
+    assert "x01&x00" not in branches
+    assert len(list(fork.iterate_intersections(max_order=1))) == 20
+
+
+def test_strict_and_complements():
+    fork = fb.Fork(
+        gender=fb.categories @ ["Man", "Woman", "Man", "Woman", "Man", "Woman"],
+        race=fb.categories @ ["Black", "Black", "White", "White", "White", "Black"],
+    )
+    strict = fork.intersectional().strict().branches()
+    assert set(strict) == {
+        "genderMan&raceBlack",
+        "genderMan&raceWhite",
+        "genderWoman&raceBlack",
+        "genderWoman&raceWhite",
+    }
+    branches = fb.Fork(
+        a=np.array([1, 0, 1]), b=np.array([0, 1, 0]), c=np.array([0.5, 1, 0])
+    )
+    branches = branches.withcomplements().branches()
+    assert set(branches) == {"a", "b", "c", "c'"}
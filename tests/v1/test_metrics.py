@@ -110,6 +110,18 @@ def test_auc():
         )
 
 
+def test_auc_ties():
+    for _ in environment():
+        # all scores are tied, so the curve is one diagonal segment
+        assert (
+            fb.auc(
+                scores=fb.astensor([0.5, 0.5, 0.5, 0.5]),
+                labels=fb.astensor([1, 0, 1, 0]),
+            )
+            == 0.5
+        )
+
+
 def test_f1k():
     for _ in environment():
         assert (
@@ -81,3 +81,16 @@ def test_areduce():
         )
         < 1.0e-6
     )
+
+
+def test_explainable_extremes():
+    values = [
+        fb.Explainable(0.5, samples=3),
+        fb.Explainable(0.25, samples=4),
+        fb.Explainable(0.75, samples=5),
+    ]
+    assert float(fb.min(values)) == 0.25
+    assert float(fb.min(values).explain.samples) == 4
+    assert float(fb.max(values).explain.samples) == 5
+    assert fb.min([]) == float("inf") and fb.max([]) == float("-inf")
+    assert fb.min([0.5, 0.25]).numpy() == 0.25  # stacked into one tensor
@@ -1,5 +1,6 @@
 import fairbench as fb
 import numpy as np
+import os
 
 
 def test_sensitive_conversion():
@@ -186,3 +187,353 @@ def test_attachment_to_measures():
     )
 
     report.accFalse.show(fb.export.ConsoleTable)
+
+
+def test_accumulator():
+    rng = np.random.default_rng(0)
+    groups = rng.choice(["a", "b", "c"], 1000)
+    labels = rng.integers(0, 2, 1000)
+    scores = np.round(rng.random(1000), 2)
+    predictions = (scores > 0.5).astype(int)
+    for vsall in [False, True]:
+        report = (fb.reports.vsall if vsall else fb.reports.pairwise)(
+            sensitive=fb.Dimensions(fb.categories @ groups),
+            predictions=predictions,
+            labels=labels,
+            scores=scores,
+            targets=labels,
+        )
+        accumulator = fb.reports.Accumulator(vsall=vsall)
+        for start in range(0, 1000, 300):
+            batch = slice(start, start + 300)
+            accumulator.update(
+                sensitive={k: (groups[batch] == k).astype(float) for k in "abc"},
+                predictions=predictions[batch],
+                labels=labels[batch],
+                scores=scores[batch],
+                targets=labels[batch],
+            )
+        accumulated = accumulator.finalize()
+        for reduction, measure in [
+            ("min", "acc"),
+            ("min", "tpr"),
+            ("min", "avgscore"),
+            ("min", "auc"),
+            ("min", "tophr"),
+            ("max", "mabs"),
+        ]:
+            expected = float(report[reduction][measure])
+            assert abs(expected - float(accumulated[reduction][measure])) < 1.0e-9
+
+
+def test_accumulator_merge():
+    rng = np.random.default_rng(1)
+    groups = rng.choice(["a", "b", "c"], 900)
+    labels = rng.integers(0, 2, 900)
+    scores = np.round(rng.random(900), 2)
+    predictions = (scores > 0.5).astype(int)
+
+    def shard(batch):
+        return (
+            fb.reports.Accumulator()
+            .update(
+                sensitive={k: (groups[batch] == k).astype(float) for k in "abc"},
+                predictions=predictions[batch],
+                labels=labels[batch],
+                scores=scores[batch],
+            )
+            .to_bytes()
+        )
+
+    whole = fb.reports.Accumulator.from_bytes(shard(slice(0, 900))).finalize()
+    shards = [shard(slice(start, start + 300)) for start in range(0, 900, 300)]
+    merged = sum(fb.reports.Accumulator.from_bytes(data) for data in shards)
+    merged = merged.finalize()
+    for reduction, measure in [
+        ("min", "acc"),
+        ("min", "tpr"),
+        ("min", "avgscore"),
+        ("min", "auc"),
+        ("min", "tophr"),
+    ]:
+        expected = float(whole[reduction][measure])
+        assert abs(expected - float(merged[reduction][measure])) < 1.0e-9
+
+
+def test_executors():
+    import pickle
+
+    rng = np.random.default_rng(2)
+    groups = rng.integers(0, 6, 300)
+    labels = rng.integers(0, 2, 300)
+    scores = rng.random(300)
+    kwargs = dict(predictions=scores > 0.5, labels=labels, scores=scores)
+    expected = fb.reports.pairwise(
+        sensitive=fb.Dimensions(fb.categories @ groups), **kwargs
+    )
+    assert pickle.loads(pickle.dumps(expected)) == expected
+    for executor in ["threads", "processes"]:
+        for sensitive in [fb.Dimensions(fb.categories @ groups), fb.Coded(groups)]:
+            report = fb.reports.pairwise(
+                sensitive=sensitive, executor=executor, **kwargs
+            )
+            assert report.to_dict() == expected.to_dict()
+
+
+def test_branch_executors():
+    rng = np.random.default_rng(3)
+    groups = rng.integers(0, 3, 200)
+    labels = rng.integers(0, 2, 200)
+    predictions = {f"model{i}": rng.integers(0, 2, 200).tolist() for i in range(4)}
+    kwargs = dict(
+        sensitive=fb.Dimensions(fb.categories @ groups),
+        predictions=fb.Dimensions(predictions),
+        labels=labels,
+    )
+    expected = fb.reports.pairwise(**kwargs)
+    assert list(expected.depends) == list(predictions)
+    for executor in ["threads", "processes"]:
+        report = fb.reports.pairwise(executor=executor, **kwargs)
+        assert report.to_dict() == expected.to_dict()
+
+
+def test_plan():
+    measures = fb.reports.adhoc.all_measures
+    reductions = fb.reports.adhoc.reductions_pairwise
+    plan = fb.core.Plan(measures, reductions)
+    assert plan.applicable(["predictions"]) == [fb.measures.pr]
+    rng = np.random.default_rng(4)
+    for _ in range(3):
+        groups = rng.integers(0, 4, 200)
+        labels = rng.integers(0, 2, 200)
+        scores = rng.random(200)
+        kwargs = dict(
+            sensitive=fb.Dimensions(fb.categories @ groups),
+            predictions=scores > 0.5,
+            labels=labels,
+            scores=scores,
+        )
+        expected = fb.reports.pairwise(**kwargs)
+        assert plan(**kwargs).to_dict() == expected.to_dict()
+    # area between curves applies only to measures with curves, i.e., avgscore and auc
+    kept = {
+        alias
+        for (reduction, alias), pruned in plan._pruned.items()
+        if reduction is fb.reduction.maxbarea and not pruned
+    }
+    assert kept == {"avgscore", "auc"}
+
+
+def test_cache(tmp_path):
+    rng = np.random.default_rng(5)
+    groups = rng.integers(0, 4, 300)
+    labels = rng.integers(0, 2, 300)
+    scores = rng.random(300)
+    kwargs = dict(predictions=scores > 0.5, labels=labels, scores=scores)
+    expected = fb.reports.pairwise(sensitive=fb.Coded(groups), **kwargs)
+    cache = fb.core.Cache(directory=str(tmp_path))
+    fb.reports.pairwise(sensitive=fb.Coded(groups), cache=cache, **kwargs)
+    assert cache.hits == 0
+    computed = cache.misses
+    report = fb.reports.pairwise(sensitive=fb.Coded(groups), cache=cache, **kwargs)
+    assert report.to_dict() == expected.to_dict()
+    assert cache.hits == computed and cache.misses == computed
+    # a fresh cache finds the same entries on disk, even for equal copies of the inputs
+    cache = fb.core.Cache(maxsize=2, directory=str(tmp_path))
+    kwargs = {name: arg.copy() for name, arg in kwargs.items()}
+    report = fb.reports.pairwise(
+        sensitive=fb.Coded(groups.copy()), cache=cache, **kwargs
+    )
+    assert report.to_dict() == expected.to_dict()
+    assert cache.hits == computed and cache.misses == 0
+    assert len(cache.memory) == 2
+    # entries are stored in the binary format of values, and every hit returns new copies
+    assert all(name.endswith(".fbcache") for name in os.listdir(tmp_path))
+    key = next(iter(cache.memory))
+    first, second = cache.get(key), cache.get(key)
+    assert first[0] is not second[0] and first[0] == second[0]
+    first[0].value.value = -1
+    assert cache.get(key)[0] == second[0]
+    # different inputs are not retrieved from the cache
+    kwargs["labels"] = 1 - kwargs["labels"]
+    report = fb.reports.pairwise(sensitive=fb.Coded(groups), cache=cache, **kwargs)
+    assert report.to_dict() != expected.to_dict()
+
+
+def test_cache_deferred_curves(monkeypatch):
+    from fairbench.v2.core.statistics import Roc
+
+    calls = list()
+    curve = Roc.curve
+    monkeypatch.setattr(Roc, "curve", lambda self: calls.append(self) or curve(self))
+    rng = np.random.default_rng(5)
+    groups = rng.integers(0, 4, 300)
+    kwargs = dict(labels=rng.integers(0, 2, 300), scores=rng.random(300))
+    cache = fb.core.Cache()
+    for _ in range(2):
+        report = fb.core.report(
+            sensitive=fb.Coded(groups),
+            measures=[fb.measures.auc],
+            reductions=[fb.reduction.min],
+            cache=cache,
+            **kwargs,
+        )
+    # caching in memory does not compute curves, but retrieved values can still compute them
+    assert cache.hits == 4 and not calls
+    assert report.min.auc.depends["0"].roc.value.x.shape[0] > 2
+    assert len(calls) == 1
+
+
+def test_table():
+    rng = np.random.default_rng(6)
+    groups = rng.integers(0, 3, 200)
+    labels = rng.integers(0, 2, 200)
+    scores = rng.random(200)
+    report = fb.reports.pairwise(
+        sensitive=fb.Coded(groups), predictions=scores > 0.5, labels=labels
+    )
+    table = report.show(fb.export.ToTable)
+    assert "min.acc.1.samples" in table["path"]
+    row = table.where(path="min.acc")
+    assert len(row) == 1 and row["reduction"][0] == "min"
+    assert row["value"][0] == float(report.min.acc)
+    assert row["target"][0] == 1
+    groups = table.where(reduction="min", measure="acc", role="group")
+    assert len(groups) == 3
+    assert groups["value"].min() == row["value"][0]
+    assert groups["samples"].sum() == 200
+    ordered = groups.sort("value", descending=True)
+    assert ordered["value"][0] == groups["value"].max()
+    minimums = table.where(role="group").groupby("measure", aggregate="min")
+    assert minimums.where(measure="acc")["value"][0] == row["value"][0]
+    assert len(table.where(reduction=["min", "max"], value=lambda v: v > 1)) > 0
+
+
+def test_reduction_kernels():
+    rng = np.random.default_rng(9)
+    report = fb.reports.pairwise(
+        sensitive=fb.Coded(rng.integers(0, 40, 500)),
+        predictions=rng.integers(0, 2, 500),
+        labels=rng.integers(0, 2, 500),
+        scores=rng.random(500),
+    )
+    for reduction in report.depends.values():
+        reduce = getattr(fb.reduction, reduction.descriptor.name)
+        if reduce.kernel is None:
+            continue
+        for measure in reduction.depends.values():
+            # batched results match those of reducing each measure on its own
+            groups = list(measure.depends.values())
+            expected = reduce.__wrapped__(groups)
+            assert abs(float(measure) - float(expected)) < 1.0e-12
+    values = rng.random(300)
+    pairs = np.abs(values[:, np.newaxis] - values[np.newaxis, :]).sum()
+    gini, _, _ = fb.reduction.gini.kernel(values[np.newaxis], None)
+    assert abs(gini[0] - pairs / (2 * 300 * 300 * values.mean())) < 1.0e-12
+    # without samples, the batched and the fallback weighted averages are both plain means
+    tpr = fb.core.Descriptor("tpr", "measure", "the true positive rate")
+    samples = fb.measures.quantities.samples
+    groups = fb.core.Descriptor("groups", "analysis", "the groups")(
+        depends=[
+            tpr(
+                depends=[
+                    fb.core.Descriptor(name, "group", f"group {name}")(
+                        fb.core.Number(value), [samples(0)]
+                    )
+                    for name, value in [("a", 0.5), ("b", 0.25)]
+                ]
+            )
+        ]
+    )
+    batched = fb.reduction.wmean(groups)
+    fallback = fb.reduction.wmean(groups, weight_by=samples)
+    assert float(batched.tpr) == float(fallback.tpr) == 0.375
+
+
+def test_pairwise_transforms():
+    transform = fb.core.transform
+    rng = np.random.default_rng(10)
+    for values in [rng.random(30), [0, 0.5, 0.2, 0], [0.3, -0.2, 0.1], [0, 0]]:
+        compared_to = rng.random(3)
+        assert transform.diff(values).shape == (len(values) ** 2,)
+        for others in [None, compared_to]:
+            assert (
+                transform.max_diff(values, others)
+                == transform.diff(values, others).max()
+            )
+            assert (
+                transform.max_relative(values, others)
+                == transform.relative(values, others).max()
+            )
+    assert list(transform.ratio([0.5, 0, 1])) == [1, 1, 0.5, 1, 1, 1, 0.5, 1, 1]
+    # a nan reference value propagates like in the comparison of all pairs
+    for values, compared_to in [
+        ([0.5, 0.2, 0.4], [0.3, np.nan]),
+        ([0.5, 0], [0, np.nan]),
+        ([0, 0], [np.nan]),
+    ]:
+        np.testing.assert_equal(
+            transform.max_relative(values, compared_to),
+            transform.relative(values, compared_to).max(),
+        )
+
+
+def test_curve_pair_diffs():
+    transform = fb.core.transform
+    rng = np.random.default_rng(11)
+    curves = [
+        fb.core.Curve(np.linspace(0, 1, n), np.sort(rng.random(n)))
+        for n in [5, 12, 12, 30, 7]
+    ]
+    for compared_to in [curves, curves[3:4]]:
+        expected = [
+            transform.curve_pair_diff(i, j) for i in curves for j in compared_to
+        ]
+        assert (
+            np.abs(transform.curve_pair_diffs(curves, compared_to) - expected).max()
+            == 0
+        )
+    grid = curves[3].to_grid(12)
+    assert curves[3].to_grid(12) is grid  # retained for comparisons on the same grid
+
+
+def test_bootstrap():
+    rng = np.random.default_rng(12)
+    groups = rng.integers(0, 3, 400)
+    labels = rng.integers(0, 2, 400)
+    scores = rng.random(400)
+    kwargs = dict(
+        sensitive=fb.Coded(groups),
+        predictions=scores > 0.5,
+        labels=labels,
+        scores=scores,
+    )
+    expected = fb.reports.vsall(**kwargs)
+    # replicates that draw every sample once reproduce the values of the report
+    bootstrap = fb.core.Bootstrap(2, chunk=1)
+    bootstrap.weights = lambda samples, index: np.ones((1, samples), np.uint8)
+    report = fb.reports.vsall(bootstrap=bootstrap, **kwargs)
+    assert float(report.largestmaxdiff.acc) == float(expected.largestmaxdiff.acc)
+    for reduction in report.depends.values():
+        for value in reduction.depends.values():
+            if reduction.descriptor.name == "largestmaxbarea":
+                # reductions of curves have no kernel and thus no intervals
+                assert "lower" not in value.depends
+                continue
+            assert abs(float(value.lower) - float(value)) < 1.0e-12
+            assert abs(float(value.upper) - float(value)) < 1.0e-12
+    for measure in ["acc", "avgscore", "auc", "tophr", "toprec", "topf1"]:
+        # the value of the measure for that group
+        value = report.largestmaxdiff[measure].depends["all"]
+        assert abs(float(value.lower) - float(value)) < 1.0e-12
+    # the weights of each chunk of replicates are drawn again from the seed and the chunk index alone
+    for seed in [0, None]:
+        bootstrap = fb.core.Bootstrap(100, seed=seed)
+        assert bootstrap.weights(400, 1).shape == (36, 400)
+        assert (bootstrap.weights(400, 1) == bootstrap.weights(400, 1)).all()
+        assert (bootstrap.weights(400, 0)[:36] != bootstrap.weights(400, 1)).any()
+    report = fb.reports.pairwise(bootstrap=200, **kwargs)
+    for measure in ["acc", "auc", "topf1"]:
+        value = report.maxdiff[measure]
+        assert float(value.lower) < float(value.upper)
+    assert fb.reports.pairwise(bootstrap=200, **kwargs).to_dict() == report.to_dict()
@@ -0,0 +1,243 @@
+import fairbench as fb
+import numpy as np
+import pytest
+
+
+def _data(n=100, seed=0):
+    rng = np.random.default_rng(seed)
+    predictions = rng.integers(0, 2, n)
+    labels = rng.integers(0, 2, n)
+    sensitive = rng.integers(0, 2, n)
+    return predictions, labels, sensitive
+
+
+def test_shared_confusion():
+    predictions, labels, sensitive = _data()
+    statistics = fb.core.Statistics()
+    for measure in [
+        fb.measures.acc,
+        fb.measures.tpr,
+        fb.measures.tnr,
+        fb.measures.tar,
+        fb.measures.trr,
+    ]:
+        shared = measure(
+            predictions=predictions,
+            labels=labels,
+            sensitive=sensitive,
+            statistics=statistics,
+        )
+        direct = measure(predictions=predictions, labels=labels, sensitive=sensitive)
+        assert shared == direct
+    counts = statistics.confusion(predictions, labels, sensitive)
+    assert counts.tp == (predictions * labels * sensitive).sum()
+    assert counts.tn == ((1 - predictions) * (1 - labels) * sensitive).sum()
+    assert counts.samples == sensitive.sum()
+
+
+def test_vectorized_sensitive():
+    predictions, labels, _ = _data()
+    rng = np.random.default_rng(1)
+    groups = rng.integers(0, 5, len(predictions))
+    sensitive = fb.Dimensions(fb.categories @ groups)
+    for vectorized in [True, "sparse"]:
+        report = fb.reports.pairwise(
+            sensitive=sensitive,
+            predictions=predictions,
+            labels=labels,
+            scores=predictions,
+            targets=labels,
+        )
+        vectorized_report = fb.reports.pairwise(
+            sensitive=sensitive,
+            predictions=predictions,
+            labels=labels,
+            scores=predictions,
+            targets=labels,
+            vectorized=vectorized,
+        )
+        assert report == vectorized_report
+
+
+def test_ranking_engine():
+    rng = np.random.default_rng(2)
+    scores = rng.random(200)
+    labels = rng.integers(0, 2, 200)
+    sensitive = rng.integers(0, 2, 200)
+    statistics = fb.core.Statistics()
+    ranking = statistics.ranking(scores, labels, sensitive)
+    members = np.flatnonzero(sensitive == 1)
+    ranked_labels = labels[members][np.argsort(-scores[members])]
+    ks = np.array([1, 5, 20, len(members), len(members) + 10])
+    hits, counts = ranking.top(ks)
+    for k, k_hits, k_counts in zip(ks, hits, counts):
+        assert k_hits == ranked_labels[:k].sum()
+        assert k_counts == min(k, len(members))
+    assert ranking.ap == labels[members].sum()
+    assert statistics.ranking(scores, labels, sensitive) is ranking
+
+
+def test_group_auc_from_global_sort():
+    from fairbench.fallbacks.learning.auc import roc_curve, auc
+
+    rng = np.random.default_rng(3)
+    scores = np.round(rng.random(500), 1)  # many ties
+    labels = rng.integers(0, 2, 500)
+    groups = rng.integers(0, 3, 500)
+    statistics = fb.core.Statistics()
+    for group in range(3):
+        sensitive = (groups == group).astype(float)
+        fpr, tpr, _ = roc_curve(labels[groups == group], scores[groups == group])
+        value = fb.measures.auc(
+            scores=scores, labels=labels, sensitive=sensitive, statistics=statistics
+        )
+        assert abs(float(value) - auc(fpr, tpr)) < 1.0e-12
+        assert np.abs(value.roc.value.x - fpr).max() == 0
+        assert np.abs(value.roc.value.y - tpr).max() == 0
+
+
+def test_downsampled_roc():
+    from fairbench import v1
+
+    rng = np.random.default_rng(4)
+    scores = rng.random(1000)
+    labels = (rng.random(1000) < scores).astype(int)
+    full = fb.measures.auc(scores=scores, labels=labels)
+    value = fb.measures.auc(scores=scores, labels=labels, max_points=10)
+    assert float(value) == float(full)
+    assert value.roc.value.x.shape[0] == 10
+    assert value.roc.value.x[0] == 0 and value.roc.value.x[-1] == 1
+    sensitive = v1.Fork(a=np.ones(1000))
+    value = v1.auc(scores=scores, labels=labels, sensitive=sensitive, max_points=10)
+    assert abs(float(value.a.value) - float(full)) < 1.0e-12
+    assert len(value.a.explain.curve.x) == 10
+
+
+def test_deferred_roc_curve(monkeypatch):
+    from fairbench.v2.core.statistics import Roc
+
+    calls = list()
+    curve = Roc.curve
+    monkeypatch.setattr(Roc, "curve", lambda self: calls.append(self) or curve(self))
+    rng = np.random.default_rng(5)
+    scores = rng.random(300)
+    labels = rng.integers(0, 2, 300)
+    sensitive = fb.Dimensions(fb.categories @ rng.choice(["a", "b"], 300))
+    fb.core.report(
+        sensitive=sensitive,
+        scores=scores,
+        labels=labels,
+        measures=[fb.measures.auc],
+        reductions=[fb.reduction.min, fb.reduction.maxdiff],
+    )
+    assert not calls
+    fb.core.report(
+        sensitive=sensitive,
+        scores=scores,
+        labels=labels,
+        measures=[fb.measures.auc],
+        reductions=[fb.reduction.maxbarea],
+    )
+    assert len(calls) == 2
+    value = fb.measures.auc(scores=scores, labels=labels)
+    assert value.roc.value == fb.core.Value.from_bytes(value.to_bytes()).roc.value
+
+
+def test_coded_sensitive():
+    predictions, labels, _ = _data()
+    rng = np.random.default_rng(3)
+    groups = rng.choice(["a", "b", "c"], len(predictions))
+    coded = fb.Coded(groups)
+    assert coded.names == ["c", "a", "b"]  # in order of first appearance
+    assert coded.codes.dtype == np.int32
+    assert (coded["b"] == (groups == "b")).all()
+    scores = rng.random(len(predictions))
+    for report in [fb.reports.pairwise, fb.reports.vsall]:
+        expected = report(
+            sensitive=fb.Dimensions(fb.categories @ groups),
+            predictions=predictions,
+            labels=labels,
+            scores=scores,
+        )
+        assert expected == report(
+            sensitive=coded, predictions=predictions, labels=labels, scores=scores
+        )
+
+
+def test_batched_models():
+    _, labels, sensitive = _data()
+    rng = np.random.default_rng(4)
+    predictions = rng.integers(0, 2, (3, len(labels)))
+    statistics = fb.core.Statistics()
+    rows = statistics.batch(predictions)
+    for row, model in zip(rows, predictions):
+        assert fb.measures.tpr(
+            predictions=row, labels=labels, sensitive=sensitive, statistics=statistics
+        ) == fb.measures.tpr(predictions=model, labels=labels, sensitive=sensitive)
+    report = fb.reports.pairwise(
+        sensitive=fb.Dimensions(fb.categories @ sensitive),
+        predictions=predictions,
+        labels=labels,
+    )
+    expected = fb.reports.pairwise(
+        sensitive=fb.Dimensions(fb.categories @ sensitive),
+        predictions=fb.Dimensions(
+            {f"model{i}": model.tolist() for i, model in enumerate(predictions)}
+        ),
+        labels=labels,
+    )
+    assert report.to_dict() == expected.to_dict()
+
+
+def test_grouped_measures():
+    predictions, labels, _ = _data(300, seed=8)
+    groups = np.random.default_rng(9).integers(0, 6, len(predictions))
+    for sensitive in [
+        fb.core.Sensitive(fb.Coded(groups)),
+        fb.core.Sensitive(
+            {str(group): groups == group for group in range(6)}, vectorized=True
+        ),
+    ]:
+        statistics = fb.core.Statistics(sensitive)
+        assert statistics.grouped(sensitive)
+        # measures on counts and error sums are evaluated once on arrays of all groups
+        counts = statistics.confusion(predictions, labels, sensitive)
+        assert counts.tp.shape == (6,)
+        tpr = fb.measures.tpr(
+            predictions=predictions,
+            labels=labels,
+            sensitive=sensitive,
+            statistics=statistics,
+        )
+        for i, mask in enumerate(sensitive.branches.values()):
+            expected = fb.measures.tpr(
+                predictions=predictions, labels=labels, sensitive=mask
+            )
+            assert abs(tpr.value.value[i] - float(expected)) < 1.0e-12
+        grouped = sensitive.grouped_assessment(
+            [fb.measures.acc, fb.measures.auc],
+            {
+                "predictions": predictions,
+                "labels": labels,
+                "scores": predictions,
+                "statistics": statistics,
+            },
+        )
+        # rankings are computed for each group separately
+        assert all(list(values) == [fb.measures.acc] for values in grouped.values())
+
+    @fb.core.measure("a measure with a bug", unit=False)
+    def broken(predictions, sensitive=None, statistics=None):
+        counts = fb.core.statistics.confusion(predictions, None, sensitive, statistics)
+        return counts.samples[:2]  # not one number per group
+
+    # errors other than not being computable are not hidden by evaluating groups separately
+    with pytest.raises(AssertionError):
+        sensitive.grouped_assessment(
+            [broken], {"predictions": predictions, "statistics": statistics}
+        )
+    kwargs = dict(predictions=predictions, labels=labels, scores=predictions)
+    assert (
+        fb.reports.pairwise(sensitive=fb.Coded(groups), **kwargs).to_dict()
+        == fb.reports.pairwise(sensitive=fb.categories @ groups, **kwargs).to_dict()
+    )
@@ -1,4 +1,5 @@
 import fairbench as fb
+import numpy as np
 import random
 import pytest
 
@@ -118,3 +119,174 @@ def test_conflicting_dependencies():
         assert descriptor_child.name in str(e_info.value)
         assert descriptor_child.role in str(e_info.value)
         assert descriptor_child.alias in str(e_info.value)
+
+
+def test_key_index_invalidation():
+    group = fb.core.Descriptor("group", "group")
+    measure = fb.core.Descriptor("acc", "measure")
+    other = fb.core.Descriptor("pr", "measure")
+    inner = group(depends=[measure(0.5)])
+    value = fb.core.Descriptor("report", "analysis")(depends=[inner])
+    assert [key.alias for key in value.keys("measure")] == ["acc"]
+    assert float(value["acc"]["group"]) == 0.5
+    with pytest.raises(Exception):
+        _ = value["pr"]
+
+    # changing the dependencies of any value in the tree updates lookups
+    inner.depends["pr"] = other(0.25)
+    assert [key.alias for key in value.keys("measure")] == ["acc", "pr"]
+    assert float(value["pr"]["group"]) == 0.25
+    inner.depends = {"acc": measure(0.75)}
+    assert [key.alias for key in value.keys("measure")] == ["acc"]
+    assert float(value.acc.group) == 0.75
+
+    # only the queried value is indexed, and changes to other trees keep its index
+    assert inner._index is None
+    index = value._index
+    fb.core.Descriptor("other", "analysis")(depends=[other(0.1)]).depends.clear()
+    value.keys("measure")
+    assert value._index is index
+    inner.descriptor = fb.core.Descriptor("renamed", "group")
+    assert [key.alias for key in value.keys("group")] == ["renamed"]
+    assert value._index is not index
+
+
+def test_compact_values():
+    import pickle
+
+    measure = fb.core.Descriptor("acc", "measure", "the accuracy")
+    derived = fb.core.Descriptor("min acc", "reduction measure", ("min of ", measure))
+    assert derived.details == "min of the accuracy"
+    assert derived.preferred_units == "min acc"
+    value = fb.core.Descriptor("report", "analysis")(
+        depends=[
+            fb.core.Descriptor(f"group{i}", "group")(depends=[measure(i / 10)])
+            for i in range(3)
+        ]
+    )
+    for obj in [
+        measure,
+        value,
+        value.acc,
+        fb.core.Number(1),
+        fb.core.TargetedNumber(1, 0),
+    ]:
+        assert not hasattr(obj, "__dict__")
+    # repeated views are shared instead of being recreated
+    assert value.acc is value["acc"]
+    restored = pickle.loads(pickle.dumps(value))
+    assert restored == value
+    assert restored.acc.details.to_dict() == value.acc.details.to_dict()
+
+
+def test_interned_reductions():
+    group = fb.core.Descriptor("group", "group")
+
+    def reduced(measure):
+        value = fb.core.Descriptor("report", "analysis")(
+            depends=[group(depends=[measure(0.5)])]
+        )
+        return fb.reduction.min([value | measure]).depends[measure.alias].descriptor
+
+    frequent = fb.core.Descriptor("acc", "measure")
+    descriptor = reduced(frequent)
+    # frequently reduced measures keep sharing descriptors while many others are reduced
+    others = [fb.core.Descriptor(f"m{i}", "measure") for i in range(2048)]
+    for i, measure in enumerate(others):
+        reduced(measure)
+        if i % 100 == 0:
+            assert reduced(frequent) is descriptor
+
+
+def test_lazy_views():
+    measure = fb.core.Descriptor("acc", "measure")
+    samples = fb.core.Descriptor("samples", "quantity")
+    groups = [
+        fb.core.Descriptor(f"group{i}", "group")(
+            depends=[measure(i / 10, depends=[samples(i)] if i else [])]
+        )
+        for i in range(3)
+    ]
+    value = fb.core.Descriptor("report", "analysis")(depends=groups)
+    view = value.details
+    assert view._lazy is not None  # nothing is created until dependencies are accessed
+    # details only exist for values with dependencies
+    assert list(view.depends) == ["group1", "group2"]
+    assert float(view.group2["acc details"].samples) == 2
+    assert list(value.explain.depends) == ["acc"]
+    assert [float(dep) for dep in value.acc.depends.values()] == [0, 0.1, 0.2]
+    assert value.values("measure")[0] == value.acc
+
+
+def test_read_only_views():
+    import copy
+
+    measure = fb.core.Descriptor("acc", "measure")
+    value = fb.core.Descriptor("report", "analysis")(
+        depends=[
+            fb.core.Descriptor(f"group{i}", "group")(depends=[measure(i / 10)])
+            for i in range(3)
+        ]
+    )
+    view = value.acc
+    assert view is value.acc  # shared by repeated lookups
+    with pytest.raises(TypeError):
+        view.descriptor = fb.core.Descriptor("other", "measure")
+    with pytest.raises(TypeError):
+        view.depends = []
+    with pytest.raises(TypeError):
+        view.depends.pop("group0")
+    with pytest.raises(TypeError):
+        view.group0.descriptor = fb.core.Descriptor("other", "group")
+    # mutating a copy does not leak into later lookups
+    changed = copy.deepcopy(view)
+    changed.descriptor = fb.core.Descriptor("other", "measure")
+    del changed.depends["group0"]
+    assert value.acc.descriptor == measure
+    assert list(value.acc.depends) == ["group0", "group1", "group2"]
+    # values of the tree itself remain modifiable
+    value.group0.descriptor = fb.core.Descriptor("first", "group")
+    assert list(value.acc.depends) == ["first", "group1", "group2"]
+
+
+def test_binary_serialization(tmp_path):
+    rng = np.random.default_rng(7)
+    scores = rng.random(200)
+    report = fb.reports.pairwise(
+        sensitive=fb.Coded(rng.integers(0, 3, 200)),
+        predictions=scores > 0.5,
+        scores=scores,
+        labels=rng.integers(0, 2, 200),
+    )
+    data = report.to_bytes()
+    assert len(data) < len(report.show(fb.export.ToJson))
+    restored = fb.core.Value.from_bytes(data)
+    assert restored.to_dict() == report.to_dict()
+    path = str(tmp_path / "report.fb")
+    report.save(path)
+    loaded = fb.core.Value.load(path)
+    assert loaded.to_dict() == report.to_dict()
+    curve = loaded.min.auc["0"].roc.value
+    assert isinstance(curve.x.base, np.ndarray)  # a view of the memory map
+    assert fb.core.Value.load(path, mmap=False).to_dict() == report.to_dict()
+
+
+def test_selective_loading(tmp_path):
+    rng = np.random.default_rng(8)
+    report = fb.reports.pairwise(
+        sensitive=fb.Coded(rng.integers(0, 3, 100)),
+        predictions=rng.integers(0, 2, 100),
+        labels=rng.integers(0, 2, 100),
+    )
+    path = str(tmp_path / "report.fb")
+    report.save(path)
+    loaded = fb.core.Value.load(path, select="min.acc")
+    assert list(loaded.depends) == ["min"] and list(loaded.min.depends) == ["acc"]
+    assert loaded.min.acc.to_dict() == report.min.acc.to_dict()
+    assert fb.core.Value.from_dict(report.to_dict(), "min.acc") == loaded
+    loaded = fb.core.Value.load(path, select="*.acc")
+    assert list(loaded.depends) == [
+        key for key in report.depends if "acc" in report[key].depends
+    ]
+    assert fb.core.Value.from_dict(report.to_dict(), "*.acc") == loaded
+    assert not fb.core.Value.load(path, select="missing").depends